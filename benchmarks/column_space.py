@@ -0,0 +1,65 @@
+'''
+Benchmark of `linalgPP.column_space` and the projector lattice operations on growing qubit numbers.
+
+Run from the repository root:
+
+    python -m benchmarks.column_space
+'''
+
+import time
+
+import numpy as np
+
+from rem.qplcomp import linalgPP, QOpt
+
+PREC = 1e-10
+
+def gram_schmidt(A : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    The former column-by-column Gram-Schmidt implementation, kept here as the reference.
+    '''
+    dim = A.shape[0]
+    ortho = np.array([]).reshape((dim, 0))
+    for i in range(A.shape[1]):
+        if ortho.shape[1] == dim:
+            break
+        veci = A[:, i]
+        for j in range(ortho.shape[1]):
+            veci = veci - np.sum(veci * ortho[:, j].conj()) * ortho[:, j]
+        if not linalgPP.general.close_zero(veci, precision):
+            ortho = np.hstack((ortho, (veci / np.linalg.norm(veci)).reshape((dim, 1))))
+    return ortho
+
+def random_projector(dim : int, rank : int, rng : np.random.Generator) -> np.ndarray:
+    A = rng.normal(size=(dim, rank)) + 1j * rng.normal(size=(dim, rank))
+    Q, _ = np.linalg.qr(A)
+    return Q @ Q.transpose().conj()
+
+def timeit(f, repeat : int = 3) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    rng = np.random.default_rng(0)
+
+    print(f"{'qubits':>6} {'gram-schmidt':>14} {'column_space':>14} {'disjunct':>10} {'conjunct':>10}")
+    for n in range(4, 11):
+        dim = 2**n
+        P = random_projector(dim, dim // 2, rng)
+        Q = random_projector(dim, dim // 2, rng)
+
+        t_gs = timeit(lambda: gram_schmidt(P, PREC), 1) if n <= 8 else float('nan')
+        t_cs = timeit(lambda: linalgPP.column_space(P, PREC))
+
+        # fresh operators, so that no subspace is cached
+        t_or = timeit(lambda: QOpt(P, is_projector=True) | QOpt(Q, is_projector=True))
+        t_and = timeit(lambda: QOpt(P, is_projector=True) & QOpt(Q, is_projector=True))
+
+        print(f"{n:>6} {t_gs:>14.4f} {t_cs:>14.4f} {t_or:>10.4f} {t_and:>10.4f}")
+
+if __name__ == "__main__":
+    main()
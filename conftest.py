@@ -0,0 +1,45 @@
+'''
+The fixtures shared by the tests of the program generation.
+'''
+
+import pytest
+
+from rem.qrefine.mls import MLS
+from rem.qrefine.language import AstPres
+from rem.qrefine.language.refine import wlp_check
+from rem.qplcomp import QVar, Var, EQVar
+from rem.qplcomp.qexpr.eiqopt import EIQOptPair
+
+@pytest.fixture(scope="session")
+def example_env():
+    '''
+    The environment of `examples/sec6_1.rem` before the refinement of `pf`.
+    '''
+    code = open("examples/sec6_1.rem").read()
+    m = MLS()
+    for _ in range(18):
+        code = m.step_forward(code)[0]
+    return m.prover.current_frame.env
+
+@pytest.fixture(scope="session")
+def goal(example_env):
+    '''
+    Build the goal `[P[qvars], Q[qvars]]` from the definitions `P` and `Q`.
+    '''
+    def goal(P: str, Q: str, qvars: list[str]) -> AstPres:
+        qvar = EQVar(QVar(qvars))
+        return AstPres(EIQOptPair(Var(P, example_env), qvar), EIQOptPair(Var(Q, example_env), qvar))    # type: ignore
+    return goal
+
+@pytest.fixture(scope="session")
+def passes(example_env):
+    '''
+    Decide whether a program refines a goal by the full `wlp_check`.
+    '''
+    def passes(pres: AstPres, prog) -> bool:
+        try:
+            wlp_check(pres, prog, example_env)
+            return True
+        except Exception:
+            return False
+    return passes
@@ -1,3 +1,6 @@
-from .app import app_run
+from .qplcomp import predefined
 
-from .qplcomp import predefined
\ No newline at end of file
+def app_run(*args, **kwargs):
+    # the user interface is imported on demand, so that the headless tools (e.g. `rem.check`) start fast
+    from .app import app_run
+    return app_run(*args, **kwargs)
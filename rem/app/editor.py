@@ -5,7 +5,7 @@ from textual.binding import Binding
 from textual.app import ComposeResult
 from textual.containers import Grid, Horizontal, Vertical, Container, ScrollableContainer
 from textual.screen import Screen, ModalScreen
-from textual.widgets import Header, Footer, TextArea, Button, Static, Switch, Label, TabbedContent, TabPane, Placeholder, Checkbox, ListView, ListItem, Input, DirectoryTree
+from textual.widgets import Header, Footer, TextArea, Button, Static, Switch, Label, TabbedContent, TabPane, Placeholder, Checkbox, ListView, ListItem, Input, DirectoryTree, Select
 from textual.app import ComposeResult
 from textual.reactive import reactive
 from textual.events import Event
@@ -15,6 +15,7 @@ from rem.mTLC.env import TermError
 from ..mTLC import Env
 
 from ..qrefine import mls, AstPres
+from ..qrefine.mls.cache import CACHE_ENABLED
 
 from ..qrefine.prover.gen.gen_machine import GenMachine
 import datetime
@@ -26,6 +27,9 @@ is_windows = platform.system()=="Windows"
 if not is_windows:
     from .rem_syntax import PY_REM, rem_highlight_query, REM_THEME, REM_THEME_VERIFIED
 
+# the generation modes offered in the panel, with their labels (see `GenMachine.mode`)
+GEN_MODE_LABELS = {"random": "Random", "enum": "Enumerate", "backward": "Backward"}
+
 
 def rem_greetings() -> str:
     now = datetime.datetime.now()
@@ -367,6 +371,7 @@ class Editor(Screen):
             
     gen_worker_num = reactive(8)
     gen_max_depth = reactive(3)
+    gen_mode = reactive("random")
 
     def watch_gen_worker_num(self, value: int) -> None:
         self.gen_machine.worker_num = value
@@ -376,12 +381,22 @@ class Editor(Screen):
         self.gen_machine.max_depth = value
         self.append_log(f"Generation max depth set to {value}.")
 
+    def watch_gen_mode(self, value: str) -> None:
+        self.gen_machine.mode = value
+        if value == "enum":
+            self.append_log(f"Generation mode set to {value}. Max Depth is the program size in this mode.")
+        elif value == "backward":
+            self.append_log(f"Generation mode set to {value}. Max Depth is the number of atomic statements in this mode.")
+        else:
+            self.append_log(f"Generation mode set to {value}.")
+
     ############################################################
 
     def compose(self) -> ComposeResult:
 
         # backend components
-        self.mls = mls.MLS()
+        # reopened scripts are replayed from the proof cache, unless it is turned off
+        self.mls = mls.MLS(mls.ProofCache() if CACHE_ENABLED else None)
         self.gen_machine = GenMachine(self.mls.selected_frame.env)
 
         # timer
@@ -471,6 +486,11 @@ class Editor(Screen):
                 Label("Max Depth", id="max_depth_label"),
                 Input(str(self.gen_max_depth), type = "integer", id = "gen_max_depth"),
             ),
+            Horizontal(
+                Label("Mode", id="mode_label"),
+                Select([(label, mode) for mode, label in GEN_MODE_LABELS.items()],
+                       allow_blank = False, value = self.gen_mode, id = "gen_mode"),
+            ),
             id = "gen_container"
         )
         #######################################################
@@ -543,6 +563,11 @@ class Editor(Screen):
             except ValueError:
                 pass
 
+    @on(Select.Changed, "#gen_mode")
+    def gen_mode_changed(self, event: Select.Changed) -> None:
+        if event.value in GEN_MODE_LABELS:
+            self.gen_mode = event.value     # type: ignore
+
     @on(Switch.Changed)
     def on_switch_changed(self, event: Switch.Changed) -> None:
         if event.switch == self.gen_switch:
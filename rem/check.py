@@ -0,0 +1,192 @@
+'''
+The non-interactive checker of Rem proof scripts.
+
+It executes the commands of `.rem` files one by one through `MLS.step_forward`, exactly as the editor does, and reports the time and the result of every command. Independent files are checked in parallel processes, or alternatively (`--goal-jobs`) the independent refinement goals within a file. The exit code is `1` if any file fails.
+
+Run from the repository root:
+
+    python -m rem.check examples/ex4_3.rem examples/sec6_1.rem examples/sec6_2.rem
+'''
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+from functools import partial
+from multiprocessing.pool import Pool
+
+from .qrefine.mls import MLS, ProofCache
+from .qrefine.mls.cache import CACHE_DIR
+from .qrefine.mls.prover_parsing_build import first_sentence, lexer
+
+# the maximum length of the command text in the report
+CMD_DISPLAY_LEN = 60
+
+
+class CommandResult:
+    '''
+    The result of one command in a proof script.
+    '''
+    def __init__(self, line: int, code: str, time: float, error: str | None):
+        self.line = line
+        self.code = code
+        self.time = time
+        self.error = error
+
+    @property
+    def passed(self) -> bool:
+        return self.error is None
+
+    def __str__(self) -> str:
+        code = " ".join(self.code.split())
+        if len(code) > CMD_DISPLAY_LEN:
+            code = code[:CMD_DISPLAY_LEN - 3] + "..."
+        res = f"{self.line:>5}  {'ok' if self.passed else 'FAIL':<4}  {self.time:8.3f}s  {code}"
+        if not self.passed:
+            res += "\n" + "\n".join("             " + line for line in str(self.error).splitlines())
+        return res
+
+
+class FileResult:
+    '''
+    The result of checking a proof script.
+    '''
+    def __init__(self, path: str):
+        self.path = path
+        self.commands : list[CommandResult] = []
+        # the error which is not caused by a command (e.g. unfinished refinements)
+        self.error : str | None = None
+        self.time : float = 0.
+
+    @property
+    def passed(self) -> bool:
+        return self.error is None and all(cmd.passed for cmd in self.commands)
+
+    def summary(self) -> str:
+        status = "PASS" if self.passed else "FAIL"
+        res = f"{status} {self.path}: {len(self.commands)} commands in {self.time:.3f}s"
+        if self.error is not None:
+            res += f"\n      {self.error}"
+        return res
+
+    def __str__(self) -> str:
+        return "\n".join([self.path] + [str(cmd) for cmd in self.commands] + [self.summary()])
+
+
+def _has_tokens(code: str) -> bool:
+    '''
+    Check whether the code contains anything other than spaces and comments.
+    '''
+    lexer.input(code)
+    return any(True for _ in lexer)
+
+def _locate(line: int, code: str) -> tuple[int, str]:
+    '''
+    Return the line where the command `code` starts, and the command without the leading spaces and comments.
+    '''
+    lexer.input(code)
+    token = lexer.token()
+    pos = token.lexpos if token is not None else len(code) - len(code.lstrip())
+    return line + code[:pos].count("\n"), code[pos:]
+
+def check_file(path: str, pool: Pool | None = None, cache_dir: str | None = None) -> FileResult:
+    '''
+    Check the proof script at `path`. The checking stops at the first failed command.
+
+    If `pool` is given, the refinement checks of successive `Step` commands run in parallel in it (see `MLS.step_forward_steps`). If `cache_dir` is given, the verified commands are replayed from and stored in the proof cache there.
+    '''
+    res = FileResult(path)
+    start = time.perf_counter()
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            code = f.read()
+    except OSError as e:
+        res.error = str(e)
+        return res
+
+    mls = MLS(ProofCache(cache_dir) if cache_dir is not None else None)
+    line = 1
+    while True:
+        try:
+            if first_sentence(code)[0] is None:
+                if _has_tokens(code):
+                    res.error = f"({line}) The last command is not finished by '.'."
+                break
+        except Exception as e:
+            res.commands.append(CommandResult(*_locate(line, code), 0., str(e)))
+            break
+
+        cmd_start = time.perf_counter()
+        if pool is None:
+            step = mls.step_forward(code)
+            steps = [] if step is None else [(step[0], step[1], time.perf_counter() - cmd_start)]
+        else:
+            steps = mls.step_forward_steps(code, pool)
+        total_time = time.perf_counter() - cmd_start
+
+        cmd_codes = mls.code_stack[len(mls.code_stack) - len(steps):]
+        for (remaining, _, cmd_time), cmd_code in zip(steps, cmd_codes):
+            res.commands.append(CommandResult(*_locate(line, cmd_code), cmd_time, None))
+            line += cmd_code.count("\n")
+            code = remaining
+            total_time -= cmd_time
+
+        if mls.error:
+            res.commands.append(CommandResult(*_locate(line, first_sentence(code)[0] or code), max(total_time, 0.), mls.error))
+            break
+
+    if res.passed and mls.prover.current_frame.refinement_mode:
+        res.error = "The refinement is not finished."
+
+    res.time = time.perf_counter() - start
+    return res
+
+def check_files(paths: list[str], jobs: int, goal_jobs: int = 1, cache_dir: str | None = None) -> list[FileResult]:
+    '''
+    Check the proof scripts with `jobs` processes. The results are in the order of `paths`.
+
+    If `goal_jobs > 1`, the files are checked one by one instead, and the independent goals in each file are checked by `goal_jobs` processes.
+    '''
+    if goal_jobs > 1:
+        with mp.Pool(goal_jobs) as pool:
+            return [check_file(path, pool, cache_dir) for path in paths]
+
+    if jobs <= 1 or len(paths) <= 1:
+        return [check_file(path, None, cache_dir) for path in paths]
+
+    with mp.Pool(min(jobs, len(paths))) as pool:
+        return pool.map(partial(check_file, cache_dir=cache_dir), paths, chunksize=1)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m rem.check",
+        description="Check Rem proof scripts without the user interface.")
+    parser.add_argument("files", nargs="+", help="the proof scripts to check")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="the number of processes checking files in parallel (default: the number of cores)")
+    parser.add_argument("-g", "--goal-jobs", type=int, default=1,
+                        help="the number of processes checking the independent goals of a file in parallel; the files are then checked one by one (default: 1)")
+    parser.add_argument("--cache", nargs="?", const=CACHE_DIR, default=None, metavar="DIR",
+                        help=f"replay the verified commands from the proof cache (default directory: {CACHE_DIR})")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="only report the summary of every file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = check_files(args.files, args.jobs, args.goal_jobs, args.cache)
+
+    for res in results:
+        print(res.summary() if args.quiet else str(res) + "\n")
+
+    failed = sum(not res.passed for res in results)
+    print(f"{len(results) - failed} passed, {failed} failed in {time.perf_counter() - start:.3f}s")
+    return 1 if failed > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
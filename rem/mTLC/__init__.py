@@ -1,4 +1,6 @@
 # a micro type language core
 # all variables are explicitly typed
 
-from .env import TypedTerm, Types, Env, TermError
\ No newline at end of file
+from .env import TypedTerm, Types, Env, TermError, eval_stats
+from .hashcons import intern
+from .rewrite import rule, simplify
@@ -8,6 +8,10 @@ This package provides a simple variable system. It includes:
 - class `Variable`: It is the expression constructed by a variable.
 - class `Env`: environments for the variable system. It is a dictionary from identifiers (`str`) to its definitions (`TypedTerm`).
 
+Terms are compared by their string representations. Terms interned through `hashcons.intern` additionally carry their string and hash, so that hashing and comparing them is O(1).
+
+The evaluations of interned terms are memoized. Every definition in an environment carries a unique stamp, and the memo of a term is keyed by the stamps of all the definitions it (transitively) depends on. Since environments are append-only, an unchanged key guarantees an unchanged value. Before a term is calculated, it is simplified by the rules in `rewrite`.
+
 '''
 
 from __future__ import annotations
@@ -16,6 +20,9 @@ from typing import Type, Any
 
 from abc import ABC, abstractmethod
 
+import functools
+import itertools
+
 class TermError(Exception):
     pass
 
@@ -33,12 +40,89 @@ class Types(ABC):
         return isinstance(other, Types) and str(self) == str(other)
 
 
+# The methods of the term classes are wrapped, so that the string and hash preserved in interned terms are reused (see `hashcons.intern`).
+
+def _memo_str(f):
+    @functools.wraps(f)
+    def __str__(self) -> str:
+        res = self.__dict__.get("_str")
+        if res is None:
+            res = f(self)
+            if "_interned" in self.__dict__:
+                self._str = res
+        return res
+    return __str__
+
+def _memo_hash(f):
+    @functools.wraps(f)
+    def __hash__(self) -> int:
+        res = self.__dict__.get("_hash")
+        if res is None:
+            res = f(self)
+        return res
+    return __hash__
+
+def _fast_eq(f):
+    @functools.wraps(f)
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        
+        # different hashes imply inequality
+        h0 = self.__dict__.get("_hash")
+        h1 = getattr(other, "__dict__", {}).get("_hash")
+        if h0 is not None and h1 is not None and h0 != h1:
+            return False
+        
+        return f(self, other)
+    return __eq__
+
+def _memo_eval(f):
+    @functools.wraps(f)
+    def eval(self, env : Env) -> TypedTerm:
+        term = intern(self)
+        if not term.interned:
+            return f(self, env)
+
+        key = env.version_key(free_vars(term))
+        memo = term.__dict__.get("_eval_memo")
+        if memo is not None and memo[0] == key:
+            eval_stats["hits"] += 1
+            return memo[1]
+
+        eval_stats["misses"] += 1
+
+        # evaluate the simplified term instead, if any rule applies (see `rewrite`)
+        simple = rewrite(term, env)
+        res = f(term, env) if simple is term else simple.eval(env)
+        term._eval_memo = (key, res)
+        return res
+    return eval
+
+# the counters of the evaluation memo
+eval_stats : dict[str, int] = {"hits": 0, "misses": 0}
+
 class TypedTerm(ABC):
     '''
     The class for (typed) terms.
     Type checking is implemented in the construction of TypedTerm.
     '''
 
+    # whether the instances can be shared in the hash-consed DAG, see `hashcons.intern`
+    # classes whose instances change after construction should set it to False
+    internable : bool = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "__str__" in cls.__dict__:
+            cls.__str__ = _memo_str(cls.__dict__["__str__"])   # type: ignore
+        if cls.__dict__.get("__hash__") is not None:
+            cls.__hash__ = _memo_hash(cls.__dict__["__hash__"])    # type: ignore
+        if "__eq__" in cls.__dict__:
+            cls.__eq__ = _fast_eq(cls.__dict__["__eq__"])  # type: ignore
+        if "eval" in cls.__dict__:
+            cls.eval = _memo_eval(cls.__dict__["eval"])    # type: ignore
+
     def __init__(self, type: Types):
         if not isinstance(type, Types):
             raise TermError("The type should be a Types object.")
@@ -66,11 +150,27 @@ class TypedTerm(ABC):
             if not isinstance(self.type, type):
                 raise ValueError(f"The parameter expression '{self}' should have type '{type.symbol}', but actually has type '{self.type}'.")
             
+    @property
+    def interned(self) -> bool:
+        return "_interned" in self.__dict__
+            
+    @_memo_hash
     def __hash__(self) -> int:
         return hash(str(self))
     
+    @_fast_eq
     def __eq__(self, other : Any) -> bool:
         return isinstance(other, TypedTerm) and str(self) == str(other)
+    
+    def __getstate__(self) -> dict:
+        # the preserved hash is not valid in other processes
+        state = self.__dict__.copy()
+        state.pop("_interned", None)
+        state.pop("_hash", None)
+        state.pop("_str", None)
+        state.pop("_eval_memo", None)
+        state.pop("_free_vars", None)
+        return state
 
 class Var(TypedTerm):
     '''
@@ -112,6 +212,37 @@ class Var(TypedTerm):
         return isinstance(other, Var) and self.id == other.id
 
 
+def free_vars(value : Any) -> frozenset[str]:
+    '''
+    Return the identifiers of the variables in the value. The result is preserved in interned terms.
+    '''
+    if isinstance(value, Var):
+        return frozenset((value.id,))
+
+    elif isinstance(value, TypedTerm):
+        res = value.__dict__.get("_free_vars")
+        if res is None:
+            # the refined program of a prescription is not part of its structure, but its evaluation depends on it
+            res = frozenset().union(*(
+                free_vars(v) for attr, v in value.__dict__.items()
+                if attr not in IGNORED_ATTRS or attr == "SRefined"))
+            if value.interned:
+                value._free_vars = res     # type: ignore
+        return res
+
+    elif isinstance(value, (list, tuple)):
+        return frozenset().union(*(free_vars(v) for v in value))
+
+    return frozenset()
+
+
+def _indexable(term : TypedTerm) -> bool:
+    '''
+    Whether the term can be indexed by its hash: it should be interned (so that it does not change), and its class should keep the hash.
+    '''
+    return term.interned and "_hash" in term.__dict__
+
+
 class Env:
     '''
     The environment relates variable (string) to their definitions.
@@ -119,17 +250,39 @@ class Env:
 
     DEFAULT_PREFIX = "X"
 
+    # the source of the unique stamps of definitions
+    _stamp_counter = itertools.count()
+
     def __init__(self) -> None:
 
         self.decs : dict[str, Types] = {}
 
         self.defs : dict[str, TypedTerm] = {}
 
+        # the index from the definitions to the keys for `append`, see `_lookup`
+        self._index : dict[TypedTerm, str] = {}
+
+        # the unique stamps of the definitions, see `version_key`
+        self._stamps : dict[str, int] = {}
+        self._version_keys : dict[frozenset[str], tuple] = {}
+
     def __eq__(self, other : Env) -> bool:
         if self is other:
             return True
         return self.decs == other.decs and self.defs == other.defs
 
+    def __getstate__(self) -> dict:
+        # the unpickled definitions are not interned, so they are not indexed
+        state = self.__dict__.copy()
+        state["_index"] = {}
+        state["_version_keys"] = {}
+        return state
+
+    def __setstate__(self, state : dict) -> None:
+        self.__dict__.update(state)
+        # the stamps from another process may collide with the stamps in this one
+        self._stamps = {key: next(Env._stamp_counter) for key in self._stamps}
+
     def copy(self) -> Env:
         '''
         Return a shallow copy of this environment.
@@ -137,6 +290,9 @@ class Env:
         res = Env()
         res.decs = self.decs.copy()
         res.defs = self.defs.copy()
+        res._index = self._index.copy()
+        res._stamps = self._stamps.copy()
+        res._version_keys = self._version_keys.copy()
         return res
     
     def sub_env(self, defs: set[str]) -> Env:
@@ -168,22 +324,38 @@ class Env:
         return res
 
 
+    def _lookup(self, term : TypedTerm) -> str | None:
+        '''
+        Return the first key whose definition equals `term`, or `None` if there is none.
+
+        The interned and hashable definitions are found through the index. The others are compared one by one.
+        '''
+        key = self._index.get(term) if _indexable(term) else None
+        if key is not None:
+            return key
+
+        for key in self.defs:
+            if not _indexable(self.defs[key]) and self.defs[key] == term:
+                return key
+
+        return None
+
     def append(self, term : TypedTerm) -> str:
         '''
         Check whether the value already exists in this environment.
         If yes, return the corresponding key.
         If not, create a new item with an auto key and return the key used.
+
+        The term is interned before it is stored.
         '''
-        
-        for key in self.defs:
-            if self.defs[key] == term:
-                return key
+        term = intern(term)
+
+        key = self._lookup(term)
+        if key is not None:
+            return key
             
         name = self._get_unique_name()
-
-        self.decs[name] = term.type
-        self.defs[name] = term
-
+        self._define(name, term)
         return name
     
     def declare(self, name: str, t : Types) -> None:
@@ -212,8 +384,45 @@ class Env:
         if key in self.defs:
             raise TermError(f"The variable '{str(key)}' has been defined.")
 
+        self._define(key, intern(term))
+
+    def _define(self, key : str, term : TypedTerm) -> None:
+        '''
+        Store the definition with a new stamp.
+        '''
         self.decs[key] = term.type
         self.defs[key] = term
+        if _indexable(term):
+            self._index.setdefault(term, key)
+
+        self._stamps[key] = next(Env._stamp_counter)
+        self._version_keys.clear()
+
+    @property
+    def stamp(self) -> int:
+        '''
+        The latest stamp of the definitions, which changes whenever a definition is added or replaced.
+        '''
+        return max(self._stamps.values(), default=-1)
+
+    def version_key(self, names : frozenset[str]) -> tuple:
+        '''
+        Return the stamps of the definitions that the variables `names` depend on, transitively. Evaluations depending on `names` are unchanged as long as this key is unchanged.
+        '''
+        key = self._version_keys.get(names)
+        if key is None:
+            todo = list(names)
+            seen = set(names)
+            while todo:
+                name = todo.pop()
+                if name in self.defs:
+                    for dep in free_vars(self.defs[name]) - seen:
+                        seen.add(dep)
+                        todo.append(dep)
+
+            key = tuple(sorted((name, self._stamps.get(name, -1)) for name in seen))
+            self._version_keys[names] = key
+        return key
 
     def __getitem__(self, key : str) -> TypedTerm:
         if key not in self.defs:
@@ -240,4 +449,7 @@ class Env:
         for key in self.defs:
             res += key + "\n"
         return res
-    
\ No newline at end of file
+    
+
+from .hashcons import intern, IGNORED_ATTRS
+from .rewrite import rewrite
@@ -0,0 +1,106 @@
+'''
+hashcons
+=====
+
+The hash-consing of terms. Structurally equal terms are interned into one shared instance, which also preserves its hash and (once calculated) its string representation. The preserved hash gives O(1) hashing and O(1) rejection of unequal terms. The interned terms form a DAG, in which the common sub-terms are shared.
+
+A term is keyed by its class and its attributes, where the sub-terms are already interned and contribute their identities. Therefore building the key of a node costs O(1) per child. Attribute values that are not hashable (e.g. matrices) also contribute their identities, so that they are never merged by mistake.
+
+Only the terms whose classes are `internable`, together with all their sub-terms, are interned. The other terms are returned as they are.
+'''
+
+from __future__ import annotations
+
+from typing import Any, Hashable
+
+import weakref
+
+from .env import TypedTerm
+
+# the attributes that are not part of the structure, shared with the structural keys of `qrefine.language.semantics.cache`
+# `SRefined` is assigned after construction (see `AstPres`), and the others are preserved information of the terms
+IGNORED_ATTRS = {"type", "SRefined", "_struct_key", "_interned", "_str", "_hash", "_eval_memo", "_free_vars"}
+
+class TermTable:
+    '''
+    The table of interned terms, keyed by their structures. The entries are released together with the terms.
+    '''
+
+    def __init__(self) -> None:
+        self._terms : weakref.WeakValueDictionary[Hashable, TypedTerm] = weakref.WeakValueDictionary()
+
+        self.hits : int = 0
+        self.misses : int = 0
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def _intern_value(self, value : Any) -> tuple[Any, Hashable | None]:
+        '''
+        Intern the sub-terms in an attribute value. Return the new value and its key, or `None` as the key if the value contains terms that cannot be interned.
+        '''
+        if isinstance(value, TypedTerm):
+            value = self.intern(value)
+            return value, ("term", id(value)) if value.interned else None
+
+        elif isinstance(value, (list, tuple)):
+            items = [self._intern_value(v) for v in value]
+            if any(k is None for _, k in items):
+                return value, None
+
+            if isinstance(value, list):
+                value[:] = [v for v, _ in items]
+            else:
+                value = tuple(v for v, _ in items)
+            return value, (type(value), tuple(k for _, k in items))
+
+        elif type(value).__hash__ is not None:
+            return value, ("value", type(value), value)
+
+        return value, ("id", id(value))
+
+    def intern(self, term : TypedTerm) -> TypedTerm:
+        '''
+        Return the shared instance equal to `term`. The sub-terms of `term` are replaced by their shared instances as well.
+        '''
+        if term.interned or not term.internable:
+            return term
+
+        # intern the sub-terms first
+        attr_keys = []
+        for attr in sorted(term.__dict__):
+            if attr in IGNORED_ATTRS:
+                continue
+
+            value, key = self._intern_value(term.__dict__[attr])
+            if key is None:
+                return term
+            term.__dict__[attr] = value
+            attr_keys.append((attr, key))
+
+        key = (type(term), tuple(attr_keys))
+        res = self._terms.get(key)
+        if res is not None:
+            self.hits += 1
+            return res
+
+        self.misses += 1
+        term._interned = True    # type: ignore
+        if type(term).__hash__ is not None:
+            # some terms hash values which are not hashable
+            try:
+                term._hash = hash(term)     # type: ignore
+            except TypeError:
+                pass
+        self._terms[key] = term
+        return term
+
+
+# the global table of interned terms
+term_table = TermTable()
+
+def intern(term : TypedTerm) -> TypedTerm:
+    '''
+    Intern the term in the global table, see `TermTable.intern`.
+    '''
+    return term_table.intern(term)
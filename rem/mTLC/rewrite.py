@@ -0,0 +1,87 @@
+'''
+rewrite
+=====
+
+The algebraic simplification of terms. Rewriting rules are registered for term classes, and each rule rewrites a term into an equivalent one which is cheaper to evaluate, or returns `None` if it does not apply.
+
+The rules are applied at the root of a term whenever its evaluation is not memoized (see `env._memo_eval`). Since the sub-terms are simplified in the same way when they are evaluated, every part of a term is simplified before it is calculated. `simplify` applies the rules bottom-up to a whole term, which also normalizes terms before they are compared.
+'''
+
+from __future__ import annotations
+
+from typing import Callable
+
+import copy
+
+from .env import TypedTerm, Env
+from .hashcons import intern, IGNORED_ATTRS
+
+Rule = Callable[[TypedTerm, Env], "TypedTerm | None"]
+
+# the registered rules of the term classes
+RULES : dict[type, list[Rule]] = {}
+
+# the maximum number of rewritings at one root, which guards against rules rewriting in cycles
+MAX_REWRITES = 64
+
+# the counter of applied rewritings
+rewrite_stats : dict[str, int] = {"rewrites": 0}
+
+def rule(*classes : type) -> Callable[[Rule], Rule]:
+    '''
+    The decorator registering a rewriting rule for the term classes.
+    '''
+    def decorator(f : Rule) -> Rule:
+        for cls in classes:
+            RULES.setdefault(cls, []).append(f)
+        return f
+    return decorator
+
+def rewrite(term : TypedTerm, env : Env) -> TypedTerm:
+    '''
+    Apply the rules at the root of `term` until none of them applies. The result is interned.
+    '''
+    for _ in range(MAX_REWRITES):
+        for f in RULES.get(type(term), ()):
+            res = f(term, env)
+            if res is not None:
+                rewrite_stats["rewrites"] += 1
+                term = intern(res)
+                break
+        else:
+            return term
+    return term
+
+def _simplify_value(value, env : Env):
+    if isinstance(value, TypedTerm):
+        return simplify(value, env)
+    elif isinstance(value, list):
+        return [_simplify_value(v, env) for v in value]
+    elif isinstance(value, tuple):
+        return tuple(_simplify_value(v, env) for v in value)
+    return value
+
+def simplify(term : TypedTerm, env : Env) -> TypedTerm:
+    '''
+    Simplify the whole term bottom-up. Terms whose classes are not `internable` are kept as they are, because they may be changed later.
+    '''
+    if not term.internable:
+        return term
+
+    changes = {}
+    for attr, value in term.__dict__.items():
+        if attr in IGNORED_ATTRS:
+            continue
+        new_value = _simplify_value(value, env)
+        if new_value is not value and new_value != value:
+            changes[attr] = new_value
+
+    if changes:
+        # the copy drops the preserved information of the original term
+        term = copy.copy(term)
+        term.__dict__.update(changes)
+
+    # the rewritten term may contain new sub-terms to simplify
+    term = intern(term)
+    res = rewrite(term, env)
+    return res if res is term else simplify(res, env)
@@ -21,6 +21,30 @@ from .mmethods import is_pdo
 from .mmethods import is_spd
 from .mmethods import is_projector
 
-from .mmethods import Loewner_le
+from .lomethods import Loewner_le
+from .lomethods import projector_le
 
-from .somethods import is_qo
\ No newline at end of file
+from .somethods import is_qo
+from .somethods import kraus_liouville
+from .somethods import liouville_choi
+from .somethods import choi_liouville
+from .somethods import choi_kraus
+from .somethods import kraus_compress
+from .somethods import kraus_apply
+from .somethods import liouville_apply
+
+from .spmethods import proj_basis
+from .spmethods import basis_proj
+from .spmethods import basis_join
+from .spmethods import basis_meet
+from .spmethods import basis_complement
+from .spmethods import basis_le
+
+from .bmethods import batch_close_equal
+from .bmethods import batch_is_Hermitian
+from .bmethods import batch_is_unitary
+from .bmethods import batch_is_projector
+from .bmethods import batch_is_effect
+from .bmethods import batch_is_pdo
+from .bmethods import batch_Loewner_le
+from .bmethods import batch_projector_le
@@ -0,0 +1,70 @@
+'''
+The batched methods for property verification.
+
+Every method takes a stack of `k` square matrices of the same dimension, i.e., an array of shape `(k, d, d)`, and decides the property of all of them within a few NumPy calls. The results are boolean arrays of shape `(k,)`, and agree with the corresponding methods on single matrices.
+'''
+
+import numpy as np
+
+from .general import elementwise_norm
+
+def _dagger(A : np.ndarray) -> np.ndarray:
+    return A.conj().swapaxes(-1, -2)
+
+def batch_close_equal(A : np.ndarray, B : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Check whether the matrices in the stacks `A` and `B` are pairwise equal, according to maximum norm.
+    '''
+    return np.max(elementwise_norm(A - B), axis=(-2, -1)) < precision
+
+def batch_is_Hermitian(A : np.ndarray, precision : float) -> np.ndarray:
+    return batch_close_equal(A, _dagger(A), precision)
+
+def batch_is_unitary(A : np.ndarray, precision : float) -> np.ndarray:
+    return batch_close_equal(A @ _dagger(A), np.eye(A.shape[-1]), precision)
+
+def batch_is_projector(A : np.ndarray, precision : float) -> np.ndarray:
+    return batch_is_Hermitian(A, precision) & batch_close_equal(A @ A, A, precision)
+
+def _batch_eigvalsh(A : np.ndarray, hermitian : np.ndarray) -> np.ndarray:
+    '''
+    Calculate the eigenvalues of the Hermitian matrices in the stack. The rows of the other matrices are filled with `nan`, so that every comparison on them fails.
+    '''
+    res = np.full(A.shape[:-1], np.nan)
+    if np.any(hermitian):
+        res[hermitian] = np.linalg.eigvalsh(A[hermitian])
+    return res
+
+def batch_is_effect(A : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Check whether the matrices represent quantum effects, i.e., they are Hermitian and `0 <= A <= I`.
+    '''
+    hermitian = batch_is_Hermitian(A, precision)
+    e_vals = _batch_eigvalsh(A, hermitian)
+    return hermitian & np.all((e_vals >= -precision) & (e_vals <= 1 + precision), axis=-1)
+
+def batch_is_pdo(A : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Check whether the matrices are partial density operators, i.e., they are semi-positive definite and `tr(A) <= 1`.
+    '''
+    hermitian = batch_is_Hermitian(A, precision)
+    e_vals = _batch_eigvalsh(A, hermitian)
+    return hermitian & np.all(e_vals >= -precision, axis=-1) \
+        & (np.trace(A, axis1=-2, axis2=-1).real <= 1 + precision)
+
+def batch_Loewner_le(A : np.ndarray, B : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Decide the Loewner order `A <= B` of the Hermitian matrices in the stacks pairwise.
+
+    Note: it will not check whether the matrices are Hermitian.
+    '''
+    e_vals = np.linalg.eigvalsh(B - A)
+    return np.all(e_vals >= -precision, axis=-1)
+
+def batch_projector_le(P : np.ndarray, Q : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Decide the Loewner order `P <= Q` of the projectors in the stacks pairwise, which is `Q P = P`.
+
+    Note: it will not check whether the matrices are projectors.
+    '''
+    return batch_close_equal(Q @ P, P, precision)
@@ -0,0 +1,42 @@
+'''
+The methods for the Loewner order.
+'''
+
+import numpy as np
+
+from .general import close_equal
+
+def Loewner_le(A : np.ndarray, B : np.ndarray, precision : float) -> bool:
+    '''
+    Decide the loewner order of two Hermitian matrices A and B.
+
+    It is decided by a Cholesky decomposition of `B - A + precision * I`, which succeeds exactly when `B - A` has no eigenvalue below `-precision`. No eigenvalue is computed.
+
+    Note: it will not check whether A or B is Hermitian.
+
+    Parameters:
+        - A, B : np.ndarray, two square matrices.
+        - precision : float.
+    Returns: bool, whether A <= B in Loewner order.
+
+    '''
+    D = B - A
+
+    try:
+        np.linalg.cholesky(D + precision * np.eye(len(D)))
+        return True
+    except np.linalg.LinAlgError:
+        return False
+    
+def projector_le(P : np.ndarray, Q : np.ndarray, precision : float) -> bool:
+    '''
+    Decide the Loewner order of two projectors P and Q, which is the inclusion of subspaces: `P <= Q` if and only if `Q P = P`.
+
+    Note: it will not check whether P or Q is a projector.
+
+    Parameters:
+        - P, Q : np.ndarray, two projector matrices.
+        - precision : float.
+    Returns: bool, whether P <= Q in Loewner order.
+    '''
+    return close_equal(Q @ P, P, precision)
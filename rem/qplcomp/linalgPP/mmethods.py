@@ -3,7 +3,6 @@ import numpy as np
 
 from .general import close_zero, close_equal
 
-from .vmethods import v_normalized, v_complex_dot
 
 def column_simplest(A : np.ndarray, precision : float) -> np.ndarray:
     '''
@@ -53,9 +52,9 @@ def column_space(A : np.ndarray, precision : float) -> np.ndarray:
     Calculate a set of orthonormal basis of the column space of A.
     This is also the right non-zero space of A, because the right zero space is orthogonal to the column space.
 
-    It is implemented by Schmidt decomposition.
+    It is implemented by a (thin) singular value decomposition, which reveals the rank in one vectorized call.
 
-    Note: the linear dependent vectors are ruled out (with given precision).
+    Note: the linear dependent vectors are ruled out (with given precision). That is, the singular directions with singular values below `precision` are dropped.
 
 
     Parameters:
@@ -67,27 +66,12 @@ def column_space(A : np.ndarray, precision : float) -> np.ndarray:
 
     # get the space dimension
     dim = A.shape[0]
-    ortho = np.array([]).reshape((dim, 0))
-
-    # Schmidt decomposition algorithm
-    for i in range(A.shape[1]):
-        # check whether it is already the whole space
-        if ortho.shape[1] == dim:
-            break
+    if A.shape[1] == 0:
+        return np.zeros((dim, 0), dtype=A.dtype)
 
-        veci = A[:,i]
+    U, S, _ = np.linalg.svd(A, full_matrices=False)
 
-        # subtract the projector within the existing space
-        for j in range(ortho.shape[1]):
-            proj_val = v_complex_dot(veci, ortho[:,j])
-            veci = veci - proj_val * ortho[:,j]
-
-        # check whether the result is zero
-        if not close_zero(veci, precision):
-            veci_normalized = v_normalized(veci)
-            ortho = np.hstack((ortho, veci_normalized.reshape((dim, 1))))
-    
-    return ortho
+    return U[:, S > precision]
 
 
 def row_space(A : np.ndarray, precision: float) -> np.ndarray:
@@ -214,7 +198,7 @@ def is_pdo(A : np.ndarray, precision : float) -> bool:
         return False
     
     # check whether tr(A) <= 1
-    if np.trace(A) > 1 + precision:
+    if np.trace(A).real > 1 + precision:
         return False
     
     return True
@@ -232,27 +216,7 @@ def is_spd(A : np.ndarray, precision : float):
     if not is_Hermitian(A, precision):
         return False
 
-    e_vals = np.linalg.eigvals(A)
-
-    if np.any(e_vals < 0 - precision):
-        return False
-    else:
-        return True
-
-def Loewner_le(A : np.ndarray, B : np.ndarray, precision : float):
-    '''
-    Decide the loewner order of two Hermitian matrices A and B.
-
-    Note: it will not check whether A or B is Hermitian.
-
-    Parameters:
-        - A, B : np.ndarray, two square matrices.
-        - precision : float.
-    Returns: bool, whether A <= B in Loewner order.
-
-    '''
-
-    e_vals = np.linalg.eigvals(B - A)
+    e_vals = np.linalg.eigvalsh(A)
 
     if np.any(e_vals < 0 - precision):
         return False
@@ -274,7 +238,7 @@ def is_effect(A : np.ndarray, precision : float) -> bool:
         return False
 
     # check 0 <= matrix <= I
-    e_vals = np.linalg.eigvals(A)
+    e_vals = np.linalg.eigvalsh(A)
     if np.any(e_vals < 0 - precision) or np.any(e_vals > 1 + precision):
         return False
         
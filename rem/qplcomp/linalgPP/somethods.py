@@ -1,17 +1,90 @@
 '''
 The methods for superoperators.
+
+Besides the Kraus list `[E_i]`, a superoperator `S` on `d`-dimensional operators has the following matrix forms.
+
+- Liouville (transfer matrix): the `d^2 * d^2` matrix `L = sum_i E_i ⊗ conj(E_i)`, which satisfies `vec(S(X)) = L vec(X)` with the row-major vectorization.
+- Choi: the `d^2 * d^2` matrix `J = sum_{c,d} |c><d| ⊗ S(|c><d|)`, which is positive exactly when `S` is completely positive.
 '''
 
-from .mmethods import Loewner_le, is_spd
+from .lomethods import Loewner_le
 
 import numpy as np
 
 def is_qo(kraus : list[np.ndarray], precision : float) -> bool:
-    sum_res = np.sum([m @ m.conj().transpose for m in kraus], axis = 0)
+    '''
+    Decide whether the Kraus operators form a quantum operation, i.e., `sum_i E_i^dagger E_i <= I`.
+    '''
+    sum_res = np.sum([m.conj().transpose() @ m for m in kraus], axis = 0)
+
+    return Loewner_le(sum_res, np.eye(len(sum_res)), precision)
+
+def kraus_liouville(kraus : list[np.ndarray]) -> np.ndarray:
+    '''
+    Calculate the Liouville matrix of the superoperator with the Kraus operators `kraus`.
+    '''
+    K = np.stack(kraus)
+    d = K.shape[1]
+    return np.einsum('iac,ibd->abcd', K, K.conj(), optimize=True).reshape((d*d, d*d))
+
+def liouville_choi(L : np.ndarray) -> np.ndarray:
+    '''
+    Calculate the Choi matrix from the Liouville matrix. The conversion is a reshuffle of the indices.
+    '''
+    d = round(np.sqrt(L.shape[0]))
+    return L.reshape((d, d, d, d)).transpose((2, 0, 3, 1)).reshape((d*d, d*d))
+
+def choi_liouville(J : np.ndarray) -> np.ndarray:
+    '''
+    Calculate the Liouville matrix from the Choi matrix. The conversion is a reshuffle of the indices.
+    '''
+    d = round(np.sqrt(J.shape[0]))
+    return J.reshape((d, d, d, d)).transpose((1, 3, 0, 2)).reshape((d*d, d*d))
+
+def choi_kraus(J : np.ndarray, precision : float) -> list[np.ndarray]:
+    '''
+    Calculate a minimal list of Kraus operators from the Choi matrix of a completely positive superoperator.
+
+    The Kraus operators are the eigenvectors of `J` scaled by the square roots of the eigenvalues, therefore their number is the rank of `J`.
+    '''
+    d = round(np.sqrt(J.shape[0]))
+    eigval, eigvec = np.linalg.eigh(J)
+
+    res = [np.sqrt(eigval[i]) * eigvec[:, i].reshape((d, d)).transpose()
+           for i in range(len(eigval)) if eigval[i] > precision]
+
+    # the zero superoperator
+    if len(res) == 0:
+        res = [np.zeros((d, d), dtype=J.dtype)]
+
+    return res
+
+def kraus_compress(kraus : list[np.ndarray], precision : float) -> list[np.ndarray]:
+    '''
+    Calculate an equivalent list of at most `d^2` Kraus operators.
+
+    The superoperator only depends on `M^dagger M`, where the rows of `M` are the vectorized Kraus operators. The rows of `S V^dagger` in the singular value decomposition `M = U S V^dagger` are therefore equivalent Kraus operators, and the ones with vanishing singular values are dropped.
+    '''
+    K = np.stack(kraus)
+    m, d = K.shape[0], K.shape[1]
+
+    _, S, Vh = np.linalg.svd(K.reshape((m, d*d)), full_matrices=False)
+    keep = S > precision
+
+    if not np.any(keep):
+        return [np.zeros((d, d), dtype=K.dtype)]
+
+    return list((S[keep, None] * Vh[keep]).reshape((-1, d, d)))
 
-    if Loewner_le(sum_res, np.zeros_like(sum_res), precision)\
-    or Loewner_le(np.eye(len(sum_res)), sum_res, precision):
-        return False
-    
-    return True
+def kraus_apply(kraus : list[np.ndarray], X : np.ndarray) -> np.ndarray:
+    '''
+    Calculate `sum_i E_i X E_i^dagger` in a single contraction.
+    '''
+    K = np.stack(kraus)
+    return np.einsum('iab,bc,idc->ad', K, X, K.conj(), optimize=True)
 
+def liouville_apply(L : np.ndarray, X : np.ndarray) -> np.ndarray:
+    '''
+    Calculate the application of the superoperator with Liouville matrix `L` on `X`.
+    '''
+    return (L @ X.reshape(-1)).reshape(X.shape)
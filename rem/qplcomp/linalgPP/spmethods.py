@@ -0,0 +1,97 @@
+'''
+The methods for subspaces.
+
+A subspace is represented by an isometry, that is, a matrix whose columns are an orthonormal basis of the subspace. The lattice operations are conducted on the bases directly.
+'''
+
+import numpy as np
+
+from .general import close_zero
+from .mmethods import column_space
+
+def proj_basis(P : np.ndarray) -> np.ndarray:
+    '''
+    Calculate an orthonormal basis of the subspace represented by the projector `P`.
+
+    The eigenvalues of a projector are either `0` or `1`, therefore the eigenvectors are separated at `1/2`.
+
+    Parameters:
+        - P : np.ndarray, a projector matrix (not checked here).
+    Returns: np.ndarray, a matrix with columns being the orthonormal basis.
+    '''
+    eigval, eigvec = np.linalg.eigh(P)
+    return eigvec[:, eigval > 0.5]
+
+def basis_proj(U : np.ndarray) -> np.ndarray:
+    '''
+    Calculate the projector onto the subspace spanned by the orthonormal basis `U`.
+    '''
+    return U @ U.transpose().conj()
+
+def basis_join(U : np.ndarray, V : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Calculate an orthonormal basis of the join (span) of the subspaces with orthonormal bases `U` and `V`.
+
+    The part of `V` orthogonal to `U` is computed first, and only its range is appended to `U`.
+
+    Parameters:
+        - U, V : np.ndarray, orthonormal bases of the same space dimension.
+        - precision : float.
+    Returns: np.ndarray, a matrix with columns being the orthonormal basis.
+    '''
+    if U.shape[1] == 0:
+        return V
+    if V.shape[1] == 0 or U.shape[1] == U.shape[0]:
+        return U
+
+    R = V - U @ (U.transpose().conj() @ V)
+
+    return np.hstack((U, column_space(R, precision)))
+
+def basis_meet(U : np.ndarray, V : np.ndarray, precision : float) -> np.ndarray:
+    '''
+    Calculate an orthonormal basis of the meet (intersection) of the subspaces with orthonormal bases `U` and `V`.
+
+    It is implemented through the principal angles between the two subspaces. The singular values of `(I - V V^dagger) U` are the sines of the principal angles, and the right singular vectors with zero angles give the intersection.
+
+    Parameters:
+        - U, V : np.ndarray, orthonormal bases of the same space dimension.
+        - precision : float.
+    Returns: np.ndarray, a matrix with columns being the orthonormal basis.
+    '''
+    if U.shape[1] == 0 or V.shape[1] == 0:
+        return np.zeros((U.shape[0], 0), dtype=np.result_type(U, V))
+    
+    R = U - V @ (V.transpose().conj() @ U)
+    _, S, Wh = np.linalg.svd(R)
+
+    # the singular values are sorted in descending order, and missing ones are zero
+    sines = np.zeros(U.shape[1])
+    sines[:len(S)] = S
+    W = Wh.transpose().conj()
+
+    return U @ W[:, sines < precision]
+
+def basis_complement(U : np.ndarray) -> np.ndarray:
+    '''
+    Calculate an orthonormal basis of the orthogonal complement of the subspace with orthonormal basis `U`.
+
+    It is implemented through a complete QR decomposition.
+    '''
+    dim = U.shape[0]
+    if U.shape[1] == 0:
+        return np.eye(dim)
+    
+    Q, _ = np.linalg.qr(U, mode='complete')
+    return Q[:, U.shape[1]:]
+
+def basis_le(U : np.ndarray, V : np.ndarray, precision : float) -> bool:
+    '''
+    Decide whether the subspace with orthonormal basis `U` is included in the one with orthonormal basis `V`. That is, every column of `U` is left unchanged by the projection onto `V`.
+    '''
+    if U.shape[1] > V.shape[1]:
+        return False
+    if U.shape[1] == 0:
+        return True
+    
+    return close_zero(U - V @ (V.transpose().conj() @ U), precision)
@@ -11,6 +11,9 @@ from ..qval import qvallib, QOpt, QSOpt
 from .eqopt import EQOpt
 from .eqso import EQSOpt
 
+# register the simplification rules of the expressions
+from . import simplify
+
 from ...mTLC import Env
 
 def prepare_env() -> Env:
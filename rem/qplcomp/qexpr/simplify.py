@@ -0,0 +1,241 @@
+'''
+The algebraic simplification rules of quantum expressions, registered in `mTLC.rewrite`.
+
+- Daggers are pushed inward, and cancelled in pairs or on the Hermitian operators known from the tags.
+- Double negations, double complements and nested scalings are removed.
+- The idempotent lattice operations (e.g. `P ∧ P`) and the lattice operations with the identity are skipped.
+- The products `P P` of known projectors and `U† U` of unitaries are reduced.
+- The cheap operations on literal operators are folded.
+
+The rules about projectors only apply when the operands are projectors, so that the errors on invalid operands are still raised by the evaluation.
+'''
+
+from __future__ import annotations
+
+from ...mTLC.env import TypedTerm, Env
+from ...mTLC.rewrite import rule
+
+from ..qval import QOpt, QVal
+from ..qval.monomial import Monomial
+
+from .eqopt import *
+from .eiqopt import *
+
+def _qopt(term : TypedTerm, env : Env) -> QOpt | None:
+    '''
+    Return the value of an operator term, or `None` if the evaluation fails. The failures are left to the evaluation of the whole term.
+    '''
+    try:
+        if isinstance(term.type, QOptType):
+            return term.eval(env).qopt     # type: ignore
+        elif isinstance(term.type, IQOptType):
+            return term.eval(env).iqopt.qval   # type: ignore
+    except Exception:
+        pass
+    return None
+
+def _is_projector(term : TypedTerm, env : Env) -> bool:
+    val = _qopt(term, env)
+    return val is not None and val.is_projector
+
+def _is_identity(term : TypedTerm, env : Env) -> bool:
+    val = _qopt(term, env)
+    if val is None or val.monomial is None:
+        return False
+    return val.monomial.close_equal(Monomial.identity(val.monomial.dim), QVal.prec)
+
+def _known_Hermitian(term : TypedTerm, env : Env) -> bool:
+    val = _qopt(term, env)
+    return val is not None and (
+        val.projector_tag == True or val.effect_tag == True or val.pdo_tag == True)
+
+def _is_unitary(term : TypedTerm, env : Env) -> bool:
+    val = _qopt(term, env)
+    return val is not None and val.is_unitary
+
+def _known_projector(term : TypedTerm, env : Env) -> bool:
+    val = _qopt(term, env)
+    return val is not None and val.projector_tag == True
+
+
+################################################
+# operators
+################################################
+
+@rule(EQOptDagger)
+def rule_qopt_dagger(term : EQOptDagger, env : Env) -> EQOptAbstract | None:
+    opt = term.opt
+    if isinstance(opt, EQOptDagger):
+        return opt.opt
+    elif isinstance(opt, EQOpt):
+        return EQOpt(opt.qopt.dagger())
+    elif isinstance(opt, EQOptMul):
+        return EQOptMul(EQOptDagger(opt.optB), EQOptDagger(opt.optA))
+    elif isinstance(opt, (EQOptAdd, EQOptSub, EQOptTensor)):
+        return type(opt)(EQOptDagger(opt.optA), EQOptDagger(opt.optB))
+    elif isinstance(opt, EQOptNeg):
+        return EQOptNeg(EQOptDagger(opt.opt))
+    elif isinstance(opt, EQOptScale):
+        return EQOptScale(opt.c.conjugate(), EQOptDagger(opt.opt))
+    elif _known_Hermitian(opt, env):
+        return opt
+    return None
+
+@rule(EQOptNeg)
+def rule_qopt_neg(term : EQOptNeg, env : Env) -> EQOptAbstract | None:
+    if isinstance(term.opt, EQOptNeg):
+        return term.opt.opt
+    elif isinstance(term.opt, EQOpt):
+        return EQOpt(- term.opt.qopt)
+    return None
+
+@rule(EQOptScale)
+def rule_qopt_scale(term : EQOptScale, env : Env) -> EQOptAbstract | None:
+    if term.c == 1.:
+        return term.opt
+    elif isinstance(term.opt, EQOptScale):
+        return EQOptScale(term.c * term.opt.c, term.opt.opt)
+    elif isinstance(term.opt, EQOpt):
+        return EQOpt(term.c * term.opt.qopt)
+    return None
+
+@rule(EQOptMul)
+def rule_qopt_mul(term : EQOptMul, env : Env) -> EQOptAbstract | None:
+    A, B = term.optA, term.optB
+    if A == B and _known_projector(A, env):
+        return A
+
+    # U† U = U U† = I
+    if (isinstance(A, EQOptDagger) and A.opt == B and _is_unitary(B, env)) or \
+        (isinstance(B, EQOptDagger) and B.opt == A and _is_unitary(A, env)):
+        return EQOpt(QOpt.eye_opt(term.type.qnum))
+
+    if _is_identity(A, env):
+        return B
+    if _is_identity(B, env):
+        return A
+    return None
+
+@rule(EQOptTensor)
+def rule_qopt_tensor(term : EQOptTensor, env : Env) -> EQOptAbstract | None:
+    if _is_identity(term.optA, env) and _is_identity(term.optB, env):
+        return EQOpt(QOpt.eye_opt(term.type.qnum))
+    return None
+
+
+################################################
+# lattice operations
+################################################
+
+@rule(EQOptComplement)
+def rule_qopt_complement(term : EQOptComplement, env : Env) -> EQOptAbstract | None:
+    if isinstance(term.opt, EQOptComplement) and _is_projector(term.opt.opt, env):
+        return term.opt.opt
+    return None
+
+@rule(EQOptConjunct)
+def rule_qopt_conjunct(term : EQOptConjunct, env : Env) -> EQOptAbstract | None:
+    A, B = term.optA, term.optB
+    if A == B and _is_projector(A, env):
+        return A
+    if _is_identity(A, env) and _is_projector(B, env):
+        return B
+    if _is_identity(B, env) and _is_projector(A, env):
+        return A
+    return None
+
+@rule(EQOptDisjunct)
+def rule_qopt_disjunct(term : EQOptDisjunct, env : Env) -> EQOptAbstract | None:
+    A, B = term.optA, term.optB
+    if A == B and _is_projector(A, env):
+        return A
+    if _is_identity(A, env) and _is_projector(B, env):
+        return A
+    if _is_identity(B, env) and _is_projector(A, env):
+        return B
+    return None
+
+@rule(EQOptSasakiConjunct)
+def rule_qopt_sasaki_conjunct(term : EQOptSasakiConjunct, env : Env) -> EQOptAbstract | None:
+    A, B = term.optA, term.optB
+    if A == B and _is_projector(A, env):
+        return A
+    # I ⋒ Q = Q and P ⋒ I = P
+    if _is_identity(A, env) and _is_projector(B, env):
+        return B
+    if _is_identity(B, env) and _is_projector(A, env):
+        return A
+    return None
+
+@rule(EQOptSasakiImply)
+def rule_qopt_sasaki_imply(term : EQOptSasakiImply, env : Env) -> EQOptAbstract | None:
+    A, B = term.optA, term.optB
+    # P ⇝ I = I and I ⇝ Q = Q
+    if _is_identity(B, env) and _is_projector(A, env):
+        return B
+    if _is_identity(A, env) and _is_projector(B, env):
+        return B
+    return None
+
+
+################################################
+# indexed operators
+################################################
+
+@rule(EIQOptDagger)
+def rule_iqopt_dagger(term : EIQOptDagger, env : Env) -> EIQOptAbstract | None:
+    iopt = term.iopt
+    if isinstance(iopt, EIQOptDagger):
+        return iopt.iopt
+    elif isinstance(iopt, EIQOpt):
+        return EIQOpt(iopt.iqopt.dagger())
+    elif isinstance(iopt, EIQOptPair):
+        return EIQOptPair(EQOptDagger(iopt.qopt), iopt.qvar)
+    elif isinstance(iopt, EIQOptMul):
+        return EIQOptMul(EIQOptDagger(iopt.ioptB), EIQOptDagger(iopt.ioptA))
+    elif isinstance(iopt, (EIQOptAdd, EIQOptSub, EIQOptTensor)):
+        return type(iopt)(EIQOptDagger(iopt.ioptA), EIQOptDagger(iopt.ioptB))
+    elif isinstance(iopt, EIQOptNeg):
+        return EIQOptNeg(EIQOptDagger(iopt.iopt))
+    elif isinstance(iopt, EIQOptScale):
+        return EIQOptScale(iopt.c.conjugate(), EIQOptDagger(iopt.iopt))
+    elif _known_Hermitian(iopt, env):
+        return iopt
+    return None
+
+@rule(EIQOptNeg)
+def rule_iqopt_neg(term : EIQOptNeg, env : Env) -> EIQOptAbstract | None:
+    if isinstance(term.iopt, EIQOptNeg):
+        return term.iopt.iopt
+    elif isinstance(term.iopt, EIQOpt):
+        return EIQOpt(- term.iopt.iqopt)
+    return None
+
+@rule(EIQOptScale)
+def rule_iqopt_scale(term : EIQOptScale, env : Env) -> EIQOptAbstract | None:
+    if term.c == 1.:
+        return term.iopt
+    elif isinstance(term.iopt, EIQOptScale):
+        return EIQOptScale(term.c * term.iopt.c, term.iopt.iopt)
+    elif isinstance(term.iopt, EIQOpt):
+        return EIQOpt(term.c * term.iopt.iqopt)
+    return None
+
+@rule(EIQOptMul)
+def rule_iqopt_mul(term : EIQOptMul, env : Env) -> EIQOptAbstract | None:
+    if term.ioptA == term.ioptB and _known_projector(term.ioptA, env):
+        return term.ioptA
+    return None
+
+@rule(EIQOptComplement)
+def rule_iqopt_complement(term : EIQOptComplement, env : Env) -> EIQOptAbstract | None:
+    if isinstance(term.iopt, EIQOptComplement) and _is_projector(term.iopt.iopt, env):
+        return term.iopt.iopt
+    return None
+
+@rule(EIQOptConjunct, EIQOptDisjunct, EIQOptSasakiConjunct)
+def rule_iqopt_idempotent(term : EIQOptAbstract, env : Env) -> EIQOptAbstract | None:
+    A, B = term.ioptA, term.ioptB     # type: ignore
+    if A == B and _is_projector(A, env):
+        return A
+    return None
@@ -17,7 +17,8 @@ from .qvar import QVar
 from .val import QVal, IQVal
 
 from .qvec import QVec
-from .qopt import QOpt, qproj_from_qvec
+from .qopt import QOpt, qproj_from_qvec, tag_stats
+from .qspace import QSubspace
 from .qso import QSOpt
 
 from .iqopt import IQOpt
@@ -8,8 +8,81 @@ from ..error import QPLCompError
 
 from .val import IQVal, QVal
 from .qopt import QOpt
+from .monomial import Monomial
+from .qspace import QSubspace
 from .qvar import QVar
 
+def _pad_tensor(rho_extend : bool) -> np.ndarray:
+    '''
+    Return the one-qubit operator used to pad the missing qubits in a cylinder extension: `|0><0|` for density operators and `I` otherwise.
+    '''
+    if rho_extend:
+        return np.array([[1., 0.], [0., 0.]])
+    else:
+        return np.eye(2)
+
+def _cylinder_mul(A : IQOpt, B : IQOpt, qvarT : QVar) -> np.ndarray:
+    '''
+    Calculate the tensor representation of `A @ B` on `qvarT`, where `A` and `B` are understood as their cylinder extensions.
+
+    The extensions are never materialized. Every qubit of `qvarT` has an output index `o`, a middle index `m` and an input index `i`. For a qubit missing in an operator padded with identity, the middle index is identified with the corresponding index of the other operator, so that the multiplication only contracts the indices that both operators touch. Qubits padded with `|0><0|` contribute a one-qubit tensor instead.
+
+    For `A` on `k` of the `n` qubits, it costs `O(4^n * 2^k)` instead of the `O(8^n)` of dense matrix multiplication.
+    '''
+    n = qvarT.qnum
+    o = lambda v: qvarT.index(v)
+    m = lambda v: n + qvarT.index(v)
+    i = lambda v: 2 * n + qvarT.index(v)
+
+    operands : list = []
+
+    mid : dict[str, int] = {}
+    for v in qvarT:
+        if v in A.qvar and v in B.qvar:
+            mid[v] = m(v)
+        elif v in A.qvar:
+            if B.rho_extend:
+                mid[v] = m(v)
+                operands += [_pad_tensor(True), [m(v), i(v)]]
+            else:
+                mid[v] = i(v)
+        else:
+            if A.rho_extend:
+                mid[v] = m(v)
+                operands += [_pad_tensor(True), [o(v), m(v)]]
+            else:
+                mid[v] = o(v)
+
+    operands += [A.qval.t_repr, [o(v) for v in A.qvar] + [mid[v] for v in A.qvar]]
+    operands += [B.qval.t_repr, [mid[v] for v in B.qvar] + [i(v) for v in B.qvar]]
+
+    out = [o(v) for v in qvarT] + [i(v) for v in qvarT]
+
+    return np.einsum(*operands, out, optimize=True)
+
+def _extend_space(space : QSubspace, qvar : QVar, qvarT : QVar, rho_extend : bool) -> QSubspace:
+    '''
+    Calculate the subspace of the cylinder extension of the projector on `qvar` to `qvarT`, with the given subspace.
+
+    The basis is the tensor product of the original basis and the basis of the padding: `{|0>, |1>}` for identity, and `{|0>}` for `|0><0|`.
+    '''
+    n = qvarT.qnum
+    rank = space.rank
+
+    operands : list = [space.basis.reshape((2,)*qvar.qnum + (rank,)),
+                       [qvarT.index(v) for v in qvar] + [n]]
+    out = list(range(n + 1))
+    for i in range(n):
+        if qvarT[i] not in qvar:
+            if rho_extend:
+                operands += [np.array([1., 0.]), [i]]
+            else:
+                operands += [np.eye(2), [i, n + 1 + i]]
+                out.append(n + 1 + i)
+
+    basis = np.einsum(*operands, out)
+    return QSubspace(basis.reshape((2**n, -1)))
+
 class IQOpt(IQVal):
     '''
     Indexed quantum operators.
@@ -34,15 +107,9 @@ class IQOpt(IQVal):
         if not isinstance(other, IQOpt):
             return False
         
-        # the common qvar
-        qvar_all = self.qvar + other.qvar
-
-        # cylinder extension
-        self_ext = self.extend(qvar_all)
-        other_ext = other.extend(qvar_all)
-        
+        self_ext, other_ext, _ = self._align(other)
         
-        return self_ext.qval == other_ext.qval
+        return self_ext == other_ext
     
     @staticmethod
     def identity(is_rho : bool) -> IQOpt:
@@ -63,30 +130,58 @@ class IQOpt(IQVal):
         if not qvarT.contains(self.qvar):
             raise QPLCompError("The extension target qvar '" + str(qvarT) + "' does not contain the original qvar '" + str(self.qvar) + "'.")
         
-        dim_I = qvarT.qnum - self.qnum
-
-        # different approaches of extensions
-        if self.rho_extend:
-            opt_append = QOpt.ket0_opt(dim_I)
-        else:
-            opt_append = QOpt.eye_opt(dim_I)
+        n = qvarT.qnum
+
+        # a monomial operator stays monomial: the tensor product with the padding, followed by a permutation
+        if self.qval.monomial is not None:
+            missing = [v for v in qvarT if v not in self.qvar]
+            pad = np.zeros(2**len(missing))
+            if self.rho_extend:
+                pad[0] = 1.
+            else:
+                pad[:] = 1.
 
-        temp_opt = self.qval.tensor(opt_append)
+            src = list(self.qvar) + missing
+            data : np.ndarray | Monomial = self.qval.monomial.tensor(Monomial.diag(pad))\
+                .permute([src.index(v) for v in qvarT])
 
-        # rearrange the indices
-        count_ext = 0
-        r = []
-        for i in range(qvarT.qnum):
-            if qvarT[i] in self.qvar:
-                pos = self.qvar.index(qvarT[i])
-                r.append(pos)
-            else:
-                r.append(self.qnum + count_ext)
-                count_ext += 1
+        # the extension is a single contraction of the local tensor with the one-qubit paddings
+        else:
+            operands : list = [self.qval.t_repr, 
+                               [qvarT.index(v) for v in self.qvar] + [n + qvarT.index(v) for v in self.qvar]]
+
+            pad_t = _pad_tensor(self.rho_extend)
+            for i in range(n):
+                if qvarT[i] not in self.qvar:
+                    operands += [pad_t, [i, n + i]]
+
+            data = np.einsum(*operands, list(range(2 * n)))
+
+        opt = QOpt(data,
+                   is_unitary = self.qval.unitary_tag if not self.rho_extend else None,
+                   is_effect = self.qval.effect_tag,
+                   is_pdo = self.qval.pdo_tag if self.rho_extend else None,
+                   is_projector = self.qval.projector_tag,
+                   is_Hermitian = self.qval.hermitian_tag)
+        
+        # extend the basis of the subspace, if it is already known
+        if self.qval._space is not None:
+            opt._space = _extend_space(self.qval._space, self.qvar, qvarT, self.rho_extend)
 
-        opt = temp_opt.permute(r)
         return IQOpt(opt, qvarT, self.rho_extend)
     
+    def _align(self, other : IQOpt) -> tuple[QOpt, QOpt, QVar]:
+        '''
+        Bring `self` and `other` onto a common quantum variable, and return the two operators together with this variable.
+
+        When `self` and `other` are on the same set of variables, only a permutation of `other` is needed and no identity padding is built. Otherwise both are cylinder extended.
+        '''
+        if self.qvar.on_same_var(other.qvar):
+            return self.qval, other.qval.permute(other.qvar.to(self.qvar)), self.qvar
+        
+        qvar_all = self.qvar + other.qvar
+        return self.extend(qvar_all).qval, other.extend(qvar_all).qval, qvar_all
+    
     def __add__(self, other : IQOpt) -> IQOpt:
         '''
         For indexed quantum operators `self` and `other`, return the addition result.
@@ -97,15 +192,11 @@ class IQOpt(IQVal):
 
         assert isinstance(other, IQOpt), "ASSERTION FAILED"
 
-        # the common qvar
-        qvar_all = self.qvar + other.qvar
-
         # cylinder extension
-        self_ext = self.extend(qvar_all)
-        other_ext = other.extend(qvar_all)
+        self_ext, other_ext, qvar_all = self._align(other)
 
         # return the result
-        return IQOpt(self_ext.qval + other_ext.qval, qvar_all,
+        return IQOpt(self_ext + other_ext, qvar_all,
                      self.rho_extend and other.rho_extend)
 
 
@@ -116,7 +207,7 @@ class IQOpt(IQVal):
         - Returns: `IQOpt`.
         '''
 
-        return IQOpt(-self.qval, self.qvar)
+        return IQOpt(-self.qval, self.qvar, self.rho_extend)
     
     def __neg__(self) -> IQOpt:
         return self.neg()
@@ -138,7 +229,7 @@ class IQOpt(IQVal):
         - Returns: `IQOpt`.
         '''
 
-        return IQOpt(self.qval.dagger(), self.qvar)
+        return IQOpt(self.qval.dagger(), self.qvar, self.rho_extend)
     
 
     def __matmul__(self, other : IQOpt) -> IQOpt:
@@ -153,11 +244,19 @@ class IQOpt(IQVal):
         # the common qvar
         qvar_all = self.qvar + other.qvar
 
-        # cylinder extension
-        self_ext = self.extend(qvar_all)
-        other_ext = other.extend(qvar_all)
+        # monomial operators are cheap to extend, and multiply with dense operators in O(d^2)
+        if self.qval.monomial is not None or other.qval.monomial is not None:
+            res = self.extend(qvar_all).qval @ other.extend(qvar_all).qval
 
-        return IQOpt(self_ext.qval @ other_ext.qval, qvar_all,
+        # the cylinder extensions are never built: the multiplication contracts the touched indices only
+        else:
+            res = QOpt(_cylinder_mul(self, other, qvar_all))
+
+        if self.qval.unitary_tag == True and other.qval.unitary_tag == True\
+            and not self.rho_extend and not other.rho_extend:
+            res.assert_unitary()
+
+        return IQOpt(res, qvar_all,
                      self.rho_extend or other.rho_extend)
 
     def scale(self, c : complex | float) -> IQOpt:
@@ -201,14 +300,10 @@ class IQOpt(IQVal):
         '''
         assert isinstance(other, IQOpt), "ASSERTION FAILED"
 
-        # the common qvar
-        qvar_all = self.qvar + other.qvar
-
         # cylinder extension
-        self_ext = self.extend(qvar_all)
-        other_ext = other.extend(qvar_all)
+        self_ext, other_ext, _ = self._align(other)
 
-        return self_ext.qval <= other_ext.qval
+        return self_ext <= other_ext
 
     def __le__(self, other : IQOpt) -> bool:
         return self.Loewner_le(other)
@@ -223,14 +318,10 @@ class IQOpt(IQVal):
         '''
         assert isinstance(other, IQOpt), "ASSERTION FAILED"
 
-        # the common qvar
-        qvar_all = self.qvar + other.qvar
-
         # cylinder extension
-        self_ext = self.extend(qvar_all)
-        other_ext = other.extend(qvar_all)
+        self_ext, other_ext, qvar_all = self._align(other)
 
-        return IQOpt(self_ext.qval | other_ext.qval, qvar_all)
+        return IQOpt(self_ext | other_ext, qvar_all)
     
     def __or__(self, other : IQOpt) -> IQOpt:
         return self.disjunct(other)
@@ -246,14 +337,10 @@ class IQOpt(IQVal):
         '''
         assert isinstance(other, IQOpt), "ASSERTION FAILED"
 
-        # the common qvar
-        qvar_all = self.qvar + other.qvar
-
         # cylinder extension
-        self_ext = self.extend(qvar_all)
-        other_ext = other.extend(qvar_all)
+        self_ext, other_ext, qvar_all = self._align(other)
 
-        return IQOpt(self_ext.qval & other_ext.qval, qvar_all)
+        return IQOpt(self_ext & other_ext, qvar_all)
     
     def __and__(self, other : IQOpt) -> IQOpt:
         return self.conjunct(other)
@@ -321,7 +408,16 @@ class IQOpt(IQVal):
         
         Note: Sasaki implication P -> R := P^\\perp \vee (P \\wedge R)
         '''
-        return (~ self) | (self & other)
+        assert isinstance(other, IQOpt), "ASSERTION FAILED"
+
+        # the complement of `self` is extended with identity, while `self` is extended with `|0><0|`
+        if self.rho_extend:
+            return (~ self) | (self & other)
+
+        # cylinder extension
+        self_ext, other_ext, qvar_all = self._align(other)
+
+        return IQOpt(self_ext.Sasaki_imply(other_ext), qvar_all)
     
     
     def Sasaki_conjunct(self, other : IQOpt) -> IQOpt:
@@ -333,7 +429,15 @@ class IQOpt(IQVal):
         
         Note: Sasaki conjunction P -> R := P \\wedge (P^\\perp \\vee R)
         '''
-        return self & ((~ self) | other)
+        assert isinstance(other, IQOpt), "ASSERTION FAILED"
+
+        if self.rho_extend:
+            return self & ((~ self) | other)
+
+        # cylinder extension
+        self_ext, other_ext, qvar_all = self._align(other)
+
+        return IQOpt(self_ext.Sasaki_conjunct(other_ext), qvar_all)
 
 
     ############################################################################
@@ -34,11 +34,18 @@ class IQSOpt(IQVal):
         if not qvarT.contains(self.qvar):
             raise QPLCompError("The extension target qvar '" + str(qvarT) + "' does not contain the original qvar '" + str(self.qvar) + "'.")
         
-        # extend every Kraus operator
+        # extend all Kraus operators in a single contraction, with the batch index 2n
+        n = qvarT.qnum
+        K = np.stack([E.t_repr for E in self._qval.Kraus])
+        operands : list = [K, [2 * n] + [qvarT.index(v) for v in self.qvar] + [n + qvarT.index(v) for v in self.qvar]]
 
-        new_Kraus = [IQOpt(E, self.qvar).extend(qvarT).qval for E in self._qval.Kraus]
+        for i in range(n):
+            if qvarT[i] not in self.qvar:
+                operands += [np.eye(2), [i, n + i]]
 
-        new_QSO = QSOpt(new_Kraus)
+        new_K = np.einsum(*operands, [2 * n] + list(range(2 * n)))
+
+        new_QSO = QSOpt([QOpt(E) for E in new_K])
         if self._qval.qo:
             new_QSO.assert_qo()
 
@@ -52,6 +59,8 @@ class IQSOpt(IQVal):
         '''
         Calculate the application result of indexed superoperator `self` on the operator `iopt`, and return the result.
 
+        The superoperator is not extended. Its Kraus operators (or Liouville matrix) only contract the indices of its own qubits.
+
         - Parameters:
             - `self` : `IQSOpt`, the indexed superoperator.
             - `iopt` : `IQOpt`, the indexed operator.
@@ -61,12 +70,45 @@ class IQSOpt(IQVal):
 
         # the common qvar
         qvar_all = self.qvar + iopt.qvar
-
-        # cylinder extension
-        self_ext = self.extend(qvar_all)
-        other_ext = iopt.extend(qvar_all)
-
-        return IQOpt(self_ext.qval.apply(other_ext.qval), qvar_all)
+        opt = iopt.extend(qvar_all).qval
+
+        n, k = qvar_all.qnum, self.qnum
+        pos = qvar_all.to(self.qvar)
+        new_row = [2*n + t for t in range(k)]
+        new_col = [2*n + k + t for t in range(k)]
+
+        out = list(range(2*n))
+        for t in range(k):
+            out[pos[t]] = new_row[t]
+            out[n + pos[t]] = new_col[t]
+
+        so = self.qval
+        if so.apply_by_liouville:
+            L = so.liouville.reshape((2,) * (4 * k))
+            new_t_repr = np.einsum(
+                L, new_row + new_col + pos + [n + p for p in pos],
+                opt.t_repr, list(range(2*n)),
+                out, optimize=True)
+        else:
+            K = np.stack([E.t_repr for E in so.Kraus])
+            batch = 2*n + 2*k
+            new_t_repr = np.einsum(
+                K, [batch] + new_row + pos,
+                opt.t_repr, list(range(2*n)),
+                K.conj(), [batch] + new_col + [n + p for p in pos],
+                out, optimize=True)
+
+        res = QOpt(new_t_repr)
+
+        # quantum operator on effect -> effect
+        if so.qo == True and opt.effect_tag == True:
+            res.assert_effect()
+
+        # quantum operator on partial density operator -> partial density operator
+        if so.qo == True and opt.pdo_tag == True:
+            res.assert_pdo()
+
+        return IQOpt(res, qvar_all)
     
     def __add__(self, other : IQSOpt) -> IQSOpt:
         '''
@@ -89,6 +131,23 @@ class IQSOpt(IQVal):
         return IQSOpt(self_ext.qval + other_ext.qval, qvar_all)
 
 
+    def __matmul__(self, other : IQSOpt) -> IQSOpt:
+        '''
+        For indexed quantum superoperators `self` and `other`, return the composition `self ∘ other`, which applies `other` first.
+        Automatic cylinder extension is applied.
+        - Parameters: `self`, `other` : `IQSOpt`.
+        - Returns: `IQSOpt`.
+        '''
+
+        assert isinstance(other, IQSOpt), "ASSERTION FAILED"
+
+        if self.qvar.tuple == other.qvar.tuple:
+            return IQSOpt(self.qval @ other.qval, self.qvar)
+
+        qvar_all = self.qvar + other.qvar
+        return IQSOpt(self.extend(qvar_all).qval @ other.extend(qvar_all).qval, qvar_all)
+
+
     def dagger(self) -> IQSOpt:
         '''
         Return the conjugate transpose of `self`.
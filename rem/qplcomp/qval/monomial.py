@@ -0,0 +1,154 @@
+from __future__ import annotations
+from typing import Sequence
+
+import numpy as np
+
+class Monomial:
+    '''
+    The storage of monomial matrices, i.e., matrices with at most one nonzero entry in every column. It takes `O(d)` memory instead of `O(d^2)`.
+
+    The matrix `M` is stored as a permutation `perm` and the coefficients `coef`, with `M[perm[j], j] = coef[j]` and zero elsewhere. The coefficients may be zero, so that permutations, diagonal operators and projectors in the computational basis are all covered.
+
+    Note: inplace operations are not allowed.
+    '''
+
+    def __init__(self, perm : np.ndarray, coef : np.ndarray):
+        self.perm = perm
+        self.coef = coef
+
+    @staticmethod
+    def identity(d : int) -> Monomial:
+        return Monomial(np.arange(d), np.ones(d))
+
+    @staticmethod
+    def diag(coef : np.ndarray) -> Monomial:
+        return Monomial(np.arange(len(coef)), coef)
+
+    @staticmethod
+    def from_dense(M : np.ndarray, precision : float) -> Monomial | None:
+        '''
+        Return the monomial storage of the matrix `M`, or `None` if `M` is not monomial.
+        '''
+        d = M.shape[0]
+        nonzero = np.abs(M) > precision
+        counts = np.count_nonzero(nonzero, axis=0)
+        if np.any(counts > 1):
+            return None
+
+        rows = np.argmax(nonzero, axis=0)
+        occupied = counts == 1
+
+        # the rows of the nonzero entries should be distinct
+        used = np.zeros(d, dtype=bool)
+        used[rows[occupied]] = True
+        if np.count_nonzero(used) != np.count_nonzero(occupied):
+            return None
+
+        # the empty columns take the remaining rows
+        perm = rows.copy()
+        perm[~occupied] = np.flatnonzero(~used)
+
+        coef = np.where(occupied, M[rows, np.arange(d)], 0.)
+        return Monomial(perm, coef)
+
+    @property
+    def dim(self) -> int:
+        return len(self.perm)
+
+    def to_dense(self) -> np.ndarray:
+        M = np.zeros((self.dim, self.dim), dtype=np.result_type(self.coef, float))
+        M[self.perm, np.arange(self.dim)] = self.coef
+        return M
+
+    def close_equal(self, other : Monomial, precision : float) -> bool:
+        '''
+        Check whether the two monomial matrices are equal, according to maximum norm.
+        '''
+        same = self.perm == other.perm
+        return bool(np.all(np.abs(self.coef - other.coef)[same] < precision)
+                    and np.all(np.abs(self.coef[~same]) < precision)
+                    and np.all(np.abs(other.coef[~same]) < precision))
+
+    def is_unitary(self, precision : float) -> bool:
+        return bool(np.all(np.abs(np.abs(self.coef) - 1.) < precision))
+
+    def is_projector(self, precision : float) -> bool:
+        '''
+        A monomial matrix is a projector exactly when it is diagonal on its nonzero entries, with these entries being `1`.
+        '''
+        nonzero = np.abs(self.coef) >= precision
+        return bool(np.all(self.perm[nonzero] == np.flatnonzero(nonzero))
+                    and np.all(np.abs(self.coef[nonzero] - 1.) < precision))
+
+    def support(self, precision : float) -> np.ndarray:
+        '''
+        Return the computational basis vectors spanning the range, as the columns of a matrix.
+        '''
+        rows = np.sort(self.perm[np.abs(self.coef) >= precision])
+        res = np.zeros((self.dim, len(rows)))
+        res[rows, np.arange(len(rows))] = 1.
+        return res
+
+    ################################################
+    # operations
+    ################################################
+
+    def __add__(self, other : Monomial) -> Monomial | None:
+        '''
+        Return the sum, or `None` if the sum is not monomial.
+        '''
+        nz_self = self.coef != 0.
+        nz_other = other.coef != 0.
+        if np.any((self.perm != other.perm) & nz_self & nz_other):
+            return None
+
+        perm = np.where(nz_self, self.perm, other.perm)
+        if len(np.unique(perm)) != self.dim:
+            return None
+
+        return Monomial(perm, self.coef + other.coef)
+
+    def scale(self, c : complex | float) -> Monomial:
+        return Monomial(self.perm, self.coef * c)
+
+    def dagger(self) -> Monomial:
+        inv = np.empty_like(self.perm)
+        inv[self.perm] = np.arange(self.dim)
+        coef = np.empty_like(self.coef)
+        coef[self.perm] = self.coef.conj()
+        return Monomial(inv, coef)
+
+    def mul(self, other : Monomial) -> Monomial:
+        return Monomial(self.perm[other.perm], self.coef[other.perm] * other.coef)
+
+    def mul_dense(self, D : np.ndarray) -> np.ndarray:
+        '''
+        Calculate `self @ D` for a dense matrix `D`, which scales and permutes the rows.
+        '''
+        res = np.zeros(D.shape, dtype=np.result_type(self.coef, D))
+        res[self.perm] = self.coef[:, None] * D
+        return res
+
+    def rmul_dense(self, D : np.ndarray) -> np.ndarray:
+        '''
+        Calculate `D @ self` for a dense matrix `D`, which scales and permutes the columns.
+        '''
+        res = np.zeros(D.shape, dtype=np.result_type(self.coef, D))
+        res[:, np.arange(self.dim)] = D[:, self.perm] * self.coef[None, :]
+        return res
+
+    def tensor(self, other : Monomial) -> Monomial:
+        perm = (self.perm[:, None] * other.dim + other.perm[None, :]).reshape(-1)
+        coef = np.outer(self.coef, other.coef).reshape(-1)
+        return Monomial(perm, coef)
+
+    def permute(self, perm : Sequence[int]) -> Monomial:
+        '''
+        Permute the order of qubits, in the same way as the transposition of tensor indices.
+        '''
+        n = len(perm)
+        sigma = np.arange(self.dim).reshape((2,)*n).transpose(perm).reshape(-1)
+        sigma_inv = np.empty_like(sigma)
+        sigma_inv[sigma] = np.arange(self.dim)
+
+        return Monomial(sigma_inv[self.perm[sigma]], self.coef[sigma])
@@ -151,4 +151,4 @@ from .qso import QSOpt
 
 qvallib : dict[str, QVal]= {}
 for key in optlib:
-    qvallib[key] = QOpt(optlib[key])
\ No newline at end of file
+    qvallib[key] = QOpt.compact(optlib[key])
\ No newline at end of file
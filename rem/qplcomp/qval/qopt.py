@@ -8,27 +8,35 @@ import numpy as np
 from .. import linalgPP
 
 from .val import QVal
+from .monomial import Monomial
+
+# the counters of the property queries: the ones answered by the full checks, and the unknown ones answered by the inference from the other tags
+tag_stats : dict[str, int] = {"checks": 0, "avoided": 0}
 
 class QOpt(QVal):
     '''
     The class to represent quantum operators. They are matrices without quantum variable indices.
 
+    The operator is stored either densely or in the monomial form (see `Monomial`), which covers the permutation, diagonal and computational basis projector operators. The monomial form is preserved by the operations between monomial operators, and the dense representations are only built on request.
+
     Note: inplace operations are not allowed. Therefore the QOpt here are literal values.
     '''
-    def __init__(self, data : np.ndarray,
+    def __init__(self, data : np.ndarray | Monomial,
                  is_unitary : None | bool = None,
                  is_effect : None | bool = None,
                  is_pdo : None | bool = None,
-                 is_projector : None | bool = None):
+                 is_projector : None | bool = None,
+                 is_Hermitian : None | bool = None):
         '''
 
         Construct a QOpt instance with the given data. 
         
         Parameters
-            - data: np.ndarray, two options:
+            - data: np.ndarray | Monomial, three options:
                 - a tensor representation of the QOpt
                 - a matrix representation of the QOpt
-            - is_unitary, is_effect, is_projector : bool. The known properties of this operator.
+                - a monomial matrix
+            - is_unitary, is_effect, is_projector, is_Hermitian : bool. The known properties of this operator.
 
 
         [index sequence of tensor representation]
@@ -46,16 +54,27 @@ class QOpt(QVal):
         '''
 
         # the tensor representation of this quantum operator
-        self._tensor_repr : np.ndarray 
+        self._tensor_repr : np.ndarray | None = None
 
         # the matrix representation of this quantum operator
-        self._matrix_repr : np.ndarray
+        self._matrix_repr : np.ndarray | None = None
+
+        # the monomial storage of this quantum operator, if it is monomial
+        self._monomial : Monomial | None = None
 
         # the qubit number
         self._qnum : int
 
+        # if the parameter data is a monomial matrix
+        if isinstance(data, Monomial):
+            self._qnum = round(np.log2(data.dim))
+            if (2**self._qnum != data.dim):
+                raise QPLCompError(f"Incorrect matrix dimension: {data.dim} should be some power of 2.")
+
+            self._monomial = data
+
         # if the parameter data is matrix representation
-        if len(data.shape) == 2:
+        elif len(data.shape) == 2:
 
             # check whether it is square
             d0 = data.shape[0]
@@ -92,13 +111,37 @@ class QOpt(QVal):
         self._effect : None | bool = is_effect
         self._pdo : None | bool = is_pdo
         self._projector : None | bool = is_projector
+        self._hermitian : None | bool = is_Hermitian
+
+        # the subspace of this projector, calculated on request
+        self._space : None | QSubspace = None
 
 
+    @staticmethod
+    def compact(data : np.ndarray) -> QOpt:
+        '''
+        Create the QOpt with the given matrix or tensor representation, which is stored in the monomial form if possible.
+        '''
+        d = 2**(len(data.shape) // 2) if len(data.shape) != 2 else data.shape[0]
+        mono = Monomial.from_dense(data.reshape((d, -1)), QVal.prec)
+        if mono is None:
+            return QOpt(data)
+        return QOpt(mono)
+
+    @property
+    def monomial(self) -> Monomial | None:
+        '''
+        Return the monomial storage of this quantum operator, or `None` if it is stored densely.
+        '''
+        return self._monomial
+
     @property
     def t_repr(self) -> np.ndarray:
         '''
         Return the tensor representation of this quantum operator.
         '''
+        if self._tensor_repr is None:
+            self._tensor_repr = self.m_repr.reshape((2,)*self._qnum*2)
         return self._tensor_repr
 
     @property
@@ -106,6 +149,9 @@ class QOpt(QVal):
         '''
         Return the matrix representation of this quantum operator.
         '''
+        if self._matrix_repr is None:
+            assert self._monomial is not None, "ASSERTION FAILED"
+            self._matrix_repr = self._monomial.to_dense()
         return self._matrix_repr
     
     def __str__(self) -> str:
@@ -118,22 +164,46 @@ class QOpt(QVal):
         if self.qnum != other.qnum:
             return False
         
+        if self._monomial is not None and other._monomial is not None:
+            return self._monomial.close_equal(other._monomial, QVal.prec)
+        
         return linalgPP.close_equal(self.m_repr, other.m_repr, QVal.prec)
 
     @property
     def qnum(self) -> int:
         return self._qnum
     
+    def _query_tag(self, attr : str, infer, check) -> bool:
+        '''
+        Return the property recorded in the tag `attr`. An unknown property is inferred from the other tags first, and checked by `check` only as the last resort. The result is recorded in the tag.
+        '''
+        res = self.__dict__[attr]
+        if res is None:
+            res = infer()
+            if res is None:
+                tag_stats["checks"] += 1
+                res = check()
+            else:
+                tag_stats["avoided"] += 1
+
+        self.__dict__[attr] = res
+        return res
+
     @property
     def unitary_tag(self) -> None | bool:
         return self._unitary
     @property
     def is_unitary(self) -> bool:
-        if self._unitary is None:
-            self._unitary = linalgPP.is_unitary(self.m_repr, self.prec)
-        return self._unitary
+        return self._query_tag("_unitary", self._infer_unitary,
+            lambda: self._monomial.is_unitary(self.prec) if self._monomial is not None
+                else linalgPP.is_unitary(self.m_repr, self.prec))
     def assert_unitary(self) -> None:
         self._unitary = True
+    def _infer_unitary(self) -> None | bool:
+        # the only unitary projector is the identity
+        if self._projector == True and self._space is not None:
+            return self._space.rank == 2**self.qnum
+        return None
     
 
     @property
@@ -141,33 +211,129 @@ class QOpt(QVal):
         return self._effect
     @property
     def is_effect(self) -> bool:
-        if self._effect is None:
-            self._effect = linalgPP.is_effect(self.m_repr, self.prec)
-        return self._effect
+        return self._query_tag("_effect", self._infer_effect,
+            lambda: linalgPP.is_effect(self.m_repr, self.prec))
     def assert_effect(self) -> None:
         self._effect = True
+    def _infer_effect(self) -> None | bool:
+        # projectors and partial density operators are effects, which are Hermitian
+        if self._projector == True or self._pdo == True:
+            return True
+        if self._hermitian == False:
+            return False
+        return None
 
     @property
     def pdo_tag(self) -> None | bool:
         return self._pdo
     @property
     def is_pdo(self) -> bool:
-        if self._pdo is None:
-            self._pdo = linalgPP.is_pdo(self.m_repr, self.prec)
-        return self._pdo
+        return self._query_tag("_pdo", self._infer_pdo,
+            lambda: linalgPP.is_pdo(self.m_repr, self.prec))
     def assert_pdo(self) -> None:
         self._pdo = True
+    def _infer_pdo(self) -> None | bool:
+        if self._effect == False or self._hermitian == False:
+            return False
+        # the trace of a projector is its rank
+        if self._projector == True and self._space is not None:
+            return self._space.rank <= 1
+        return None
 
     @property
     def projector_tag(self) -> None | bool:
         return self._projector
     @property
     def is_projector(self) -> bool:
-        if self._projector is None:
-            self._projector = linalgPP.is_projector(self.m_repr, self.prec)
-        return self._projector
+        return self._query_tag("_projector", self._infer_projector,
+            lambda: self._monomial.is_projector(self.prec) if self._monomial is not None
+                else linalgPP.is_projector(self.m_repr, self.prec))
     def assert_projector(self) -> None:
         self._projector = True
+    def _infer_projector(self) -> None | bool:
+        if self._effect == False or self._hermitian == False:
+            return False
+        return None
+
+    @property
+    def hermitian_tag(self) -> None | bool:
+        return self._hermitian
+    @property
+    def is_Hermitian(self) -> bool:
+        return self._query_tag("_hermitian", self._infer_Hermitian,
+            lambda: linalgPP.is_Hermitian(self.m_repr, self.prec))
+    def _infer_Hermitian(self) -> None | bool:
+        if self._known_Hermitian:
+            return True
+        return None
+
+    @property
+    def _known_Hermitian(self) -> bool:
+        '''
+        Whether this operator is known to be Hermitian from the tags, without any check.
+        '''
+        return self._hermitian == True or self._effect == True or self._pdo == True or self._projector == True
+
+    # the tags, the inferences and the batched checks of the properties, see `query_batch`
+    _BATCH_QUERIES = {
+        "unitary": ("_unitary", "_infer_unitary", linalgPP.batch_is_unitary),
+        "effect": ("_effect", "_infer_effect", linalgPP.batch_is_effect),
+        "pdo": ("_pdo", "_infer_pdo", linalgPP.batch_is_pdo),
+        "projector": ("_projector", "_infer_projector", linalgPP.batch_is_projector),
+        "Hermitian": ("_hermitian", "_infer_Hermitian", linalgPP.batch_is_Hermitian),
+    }
+
+    @staticmethod
+    def query_batch(qopts : Sequence[QOpt], prop : str) -> list[bool]:
+        '''
+        Query the property `prop` of many operators at once, which is one of `"unitary"`, `"effect"`, `"pdo"`, `"projector"` and `"Hermitian"`.
+
+        The properties known from the tags are not checked again. The remaining dense operators are stacked by their qubit numbers, and every stack is checked by one batched method (see `linalgPP.bmethods`). The results are recorded in the tags.
+
+        Parameters:
+            - `qopts` : `Sequence[QOpt]`, the operators.
+            - `prop` : `str`, the property.
+        Returns: `list[bool]`, whether every operator has the property.
+        '''
+        if prop not in QOpt._BATCH_QUERIES:
+            raise QPLCompError(f"Unknown property '{prop}' for the batched query.")
+        attr, infer, batch_check = QOpt._BATCH_QUERIES[prop]
+
+        stacks : dict[int, dict[int, QOpt]] = {}
+        for opt in qopts:
+            if opt.__dict__[attr] is not None:
+                continue
+
+            opt.__dict__[attr] = getattr(opt, infer)()
+            if opt.__dict__[attr] is not None:
+                tag_stats["avoided"] += 1
+            # the monomial operators are checked cheaply one by one
+            elif opt._monomial is not None:
+                getattr(opt, "is_" + prop)
+            else:
+                stacks.setdefault(opt.qnum, {})[id(opt)] = opt
+
+        for stack in stacks.values():
+            opts = list(stack.values())
+            res = batch_check(np.stack([opt.m_repr for opt in opts]), QVal.prec)
+            tag_stats["checks"] += len(opts)
+            for opt, r in zip(opts, res):
+                opt.__dict__[attr] = bool(r)
+
+        return [opt.__dict__[attr] for opt in qopts]
+
+    @property
+    def space(self) -> QSubspace:
+        '''
+        Return the subspace represented by this projector. It is calculated once and preserved.
+        '''
+        if self._space is None:
+            # the subspace of a monomial projector is spanned by computational basis vectors
+            if self._monomial is not None and self.is_projector:
+                self._space = QSubspace(self._monomial.support(self.prec))
+            else:
+                self._space = QSubspace.from_qopt(self)
+        return self._space
 
     
     @staticmethod
@@ -178,8 +344,7 @@ class QOpt(QVal):
         Parameters: qubitn : int, the qubit number.
         Returns: QOpt, the identity QOpt.
         '''
-        m_repr = np.eye(2**qubitn)
-        res = QOpt(m_repr)
+        res = QOpt(Monomial.identity(2**qubitn))
 
         res._unitary = True
         res._effect = True
@@ -196,9 +361,9 @@ class QOpt(QVal):
         Parameters: qubitn : int, the qubit number.
         Returns: QOpt, the ket0 QOpt.
         '''
-        m_repr = np.zeros((2**qubitn, 2**qubitn))
-        m_repr[0][0] = 1.
-        res = QOpt(m_repr)
+        coef = np.zeros(2**qubitn)
+        coef[0] = 1.
+        res = QOpt(Monomial.diag(coef))
 
         res._unitary = False
         res._effect = True
@@ -216,8 +381,7 @@ class QOpt(QVal):
         Parameters: qubitn : int, the qubit number.
         Returns: QOpt, the zero QOpt.
         '''
-        m_repr = np.zeros((2**qubitn, 2**qubitn))
-        res = QOpt(m_repr)
+        res = QOpt(Monomial.diag(np.zeros(2**qubitn)))
 
         res._unitary = False
         res._effect = True
@@ -244,7 +408,19 @@ class QOpt(QVal):
         if self.qnum != other.qnum:
             raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
         
-        return QOpt(self.t_repr + other.t_repr)
+        res = None
+        if self._monomial is not None and other._monomial is not None:
+            mono = self._monomial + other._monomial
+            if mono is not None:
+                res = QOpt(mono)
+        
+        if res is None:
+            res = QOpt(self.t_repr + other.t_repr)
+
+        if self._known_Hermitian and other._known_Hermitian:
+            res._hermitian = True
+
+        return res
         
     def neg(self) -> QOpt:
         '''
@@ -253,7 +429,16 @@ class QOpt(QVal):
         Parameters: none.
         Returns: QOpt, the result.
         '''
-        return QOpt(-self.t_repr)
+        if self._monomial is not None:
+            res = QOpt(self._monomial.scale(-1.))
+        else:
+            res = QOpt(-self.t_repr)
+
+        res._unitary = self._unitary
+        if self._known_Hermitian:
+            res._hermitian = True
+
+        return res
     
     def __neg__(self) -> QOpt:
         return self.neg()
@@ -275,9 +460,11 @@ class QOpt(QVal):
         Parameters: none.
         Returns: QOpt, the result.
         '''
-        trans = list(range(self.qnum, self.qnum*2)) + list(range(0, self.qnum))
-
-        res = QOpt(self.t_repr.conj().transpose(trans))
+        if self._monomial is not None:
+            res = QOpt(self._monomial.dagger())
+        else:
+            trans = list(range(self.qnum, self.qnum*2)) + list(range(0, self.qnum))
+            res = QOpt(self.t_repr.conj().transpose(trans))
 
         if self._unitary == True:
             res._unitary = True
@@ -287,6 +474,8 @@ class QOpt(QVal):
             res._pdo = True
         if self._projector == True:
             res._projector = True
+        if self._known_Hermitian:
+            res._hermitian = True
 
         return res
     
@@ -304,11 +493,22 @@ class QOpt(QVal):
         if self.qnum != other.qnum:
             raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
         
-        res = QOpt(self.m_repr @ other.m_repr)
+        if self._monomial is not None and other._monomial is not None:
+            res = QOpt(self._monomial.mul(other._monomial))
+        elif self._monomial is not None:
+            res = QOpt(self._monomial.mul_dense(other.m_repr))
+        elif other._monomial is not None:
+            res = QOpt(other._monomial.rmul_dense(self.m_repr))
+        else:
+            res = QOpt(self.m_repr @ other.m_repr)
         
         if self._unitary == True and other._unitary == True:
             res._unitary = True
 
+        # P P = P for projectors
+        if self is other and self._projector == True:
+            res._projector = True
+
         return res
     
     def __matmul__(self, other : QOpt) -> QOpt:
@@ -324,7 +524,10 @@ class QOpt(QVal):
         Returns: `QOpt`, the result.
         '''
 
-        res = QOpt(self.t_repr * c)
+        if self._monomial is not None:
+            res = QOpt(self._monomial.scale(c))
+        else:
+            res = QOpt(self.t_repr * c)
 
         if abs(c.imag) < QVal.prec and 0. <= c.real <= 1.:
             if self._effect == True:
@@ -332,6 +535,12 @@ class QOpt(QVal):
             if self._pdo == True:
                 res._pdo = True
 
+        if abs(c.imag) < QVal.prec and self._known_Hermitian:
+            res._hermitian = True
+
+        if abs(abs(c) - 1.) < QVal.prec and self._unitary == True:
+            res._unitary = True
+
         return res
     
     def __mul__(self, other : complex | float) -> QOpt:
@@ -347,17 +556,21 @@ class QOpt(QVal):
 
         assert isinstance(other, QOpt), "ASSERTION FAILED"
 
-        new_t_repr = np.tensordot(self.t_repr, other.t_repr, ([], []))
+        if self._monomial is not None and other._monomial is not None:
+            res = QOpt(self._monomial.tensor(other._monomial))
 
-        # adjust the index sequence
-        r = list(range(0, self.qnum))\
-            + list(range(self.qnum*2, self.qnum*2 + other.qnum))\
-            + list(range(self.qnum, self.qnum*2))\
-            + list(range(self.qnum*2 + other.qnum, (self.qnum + other.qnum)*2))
-        
-        new_t_repr = new_t_repr.transpose(r)
+        else:
+            new_t_repr = np.tensordot(self.t_repr, other.t_repr, ([], []))
+
+            # adjust the index sequence
+            r = list(range(0, self.qnum))\
+                + list(range(self.qnum*2, self.qnum*2 + other.qnum))\
+                + list(range(self.qnum, self.qnum*2))\
+                + list(range(self.qnum*2 + other.qnum, (self.qnum + other.qnum)*2))
+            
+            new_t_repr = new_t_repr.transpose(r)
 
-        res = QOpt(new_t_repr)
+            res = QOpt(new_t_repr)
 
         if self._unitary == True and other._unitary == True:
             res._unitary = True
@@ -371,6 +584,9 @@ class QOpt(QVal):
         if self._projector == True and other._projector == True:
             res._projector = True
 
+        if self._known_Hermitian and other._known_Hermitian:
+            res._hermitian = True
+
         return res
     
     def permute(self, perm : Sequence[int]) -> QOpt:
@@ -391,14 +607,27 @@ class QOpt(QVal):
                 raise QPLCompError(f"The permutation {perm} provided is not valid.")
         
 
-        t_repr_perm = list(perm) + [i + self.qnum for i in perm]
-        new_t_repr = self.t_repr.transpose(t_repr_perm)
+        if self._monomial is not None:
+            data = self._monomial.permute(perm)
+        else:
+            t_repr_perm = list(perm) + [i + self.qnum for i in perm]
+            data = self.t_repr.transpose(t_repr_perm)
 
-        return QOpt(new_t_repr, 
+        res = QOpt(data, 
                     is_unitary=self._unitary,
                     is_effect=self._effect,
                     is_pdo=self._pdo,
-                    is_projector=self._projector)
+                    is_projector=self._projector,
+                    is_Hermitian=self._hermitian)
+        
+        # the basis of the subspace is permuted in the same way
+        if self._space is not None:
+            rank = self._space.rank
+            basis = self._space.basis.reshape((2,)*self.qnum + (rank,))
+            basis = basis.transpose(list(perm) + [self.qnum])
+            res._space = QSubspace(basis.reshape((2**self.qnum, rank)))
+
+        return res
     
 
     
@@ -415,10 +644,16 @@ class QOpt(QVal):
         if self.qnum != other.qnum:
             raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
         
+        # known projectors: the order is the inclusion of subspaces
+        if self._projector == True and other._projector == True:
+            if self._space is not None and other._space is not None:
+                return self._space <= other._space
+            return linalgPP.projector_le(self.m_repr, other.m_repr, self.prec)
+
         # TODO #3
-        if not linalgPP.is_Hermitian(self.m_repr, QVal.prec):
+        if not self.is_Hermitian:
             raise QPLCompError("The operator is not Hermitian and cannot compare Loewner order.")
-        if not linalgPP.is_Hermitian(other.m_repr, QVal.prec):
+        if not other.is_Hermitian:
             raise QPLCompError("The operator is not Hermitian and cannot compare Loewner order.")
         
         return linalgPP.Loewner_le(self.m_repr, other.m_repr, self.prec)
@@ -444,21 +679,7 @@ class QOpt(QVal):
         if not self.is_projector or not other.is_projector:
             raise QPLCompError("The two QOpt are not both projectors.")
         
-        # only preserve the 1-eigenvalue vectors
-        stacked = np.hstack(
-            (linalgPP.row_space(self.m_repr, QVal.prec), 
-             linalgPP.row_space(other.m_repr, QVal.prec)))
-        
-        new_m_repr : np.ndarray
-        # check whether it is zero projector
-        if stacked.shape[1] == 0:
-            new_m_repr = (np.zeros_like(self.m_repr))
-        else:
-            # orthonormalization
-            ortho = linalgPP.column_space(stacked, QVal.prec)
-            new_m_repr = ortho @ ortho.transpose().conj()
-
-        return QOpt(new_m_repr, is_unitary=None, is_effect=True, is_projector=True)
+        return (self.space | other.space).qopt
     
     def __or__(self, other : QOpt) -> QOpt:
         return self.disjunct(other)
@@ -476,20 +697,7 @@ class QOpt(QVal):
         ================================================================
         About the algorithm: 
 
-        Step 1. Calculate the space of P and Q, get the matrices of orthonormal basis spaceP an spaceQ.
-        
-        Step 2. The vectors x in the conjunction satisfies both
-        
-                exists a, spaceP @ a = x,
-                exists b, spaceQ @ b = x.
-
-            Therefore we need to find the spaces of a and b satisfying 
-
-                spaceP @ a = spaceQ @ b.
-
-            Therefore we need to find the right-null space of the stacked matrix [spaceP | spaceQ].
-
-        Step 3. Take out the corresponding space of a from the null space, and transform it to the conjunction space by applying spaceP.    
+        The conjunction is calculated on the orthonormal bases of the two subspaces, through the principal angles between them. See `QSubspace.meet`.
         ================================================================
         '''
         assert isinstance(other, QOpt), "ASSERTION FAILED"
@@ -500,31 +708,7 @@ class QOpt(QVal):
         if not self.is_projector or not other.is_projector:
             raise QPLCompError("The two QOpt are not both projectors.")
         
-        spaceP = linalgPP.column_space(self.m_repr, QVal.prec)
-        spaceQ = linalgPP.column_space(other.m_repr, QVal.prec)
-
-        dimP = spaceP.shape[1]
-
-        # only preserve the 1-eigenvalue vectors
-        stacked = np.hstack((spaceP, spaceQ))
-
-        # calculate the right zero space of the stacked matrix [spaceP | spaceQ]
-        rnspace = linalgPP.right_null_space(stacked, QVal.prec)
-
-
-        new_m_repr : np.ndarray
-        # check whether it is zero projector
-        if rnspace.shape[1] == 0:
-            new_m_repr = np.zeros_like(self.m_repr)
-        else:
-            # get a set of vectors for the conjunction space
-            conjunct_space = spaceP @ rnspace[:dimP]
-
-            # orthonormalization
-            ortho = linalgPP.column_space(conjunct_space, QVal.prec)
-            new_m_repr = ortho @ ortho.transpose().conj()
-
-        return QOpt(new_m_repr, is_unitary=None, is_effect=True, is_projector=True)
+        return (self.space & other.space).qopt
 
     def __and__(self, other : QOpt) -> QOpt:
         return self.conjunct(other)
@@ -542,7 +726,15 @@ class QOpt(QVal):
         if not self.is_projector:
             raise QPLCompError("The QOpt instance is not a projector.")
         
-        return QOpt.eye_opt(self.qnum) - self
+        # avoid the decomposition if the basis is not known yet
+        if self._space is not None:
+            return (~ self._space).qopt
+        
+        res = QOpt.eye_opt(self.qnum) - self
+        res._unitary = None
+        res._effect = True
+        res._projector = True
+        return res
     
     def __invert__(self) -> QOpt:
         return self.complement()
@@ -608,6 +800,8 @@ class QOpt(QVal):
 
         if self._pdo == True:
             res._pdo = True
+        if self._known_Hermitian:
+            res._hermitian = True
 
         return res
 
@@ -620,7 +814,15 @@ class QOpt(QVal):
         
         Note: Sasaki implication P -> R := P^\\perp \vee (P \\wedge R)
         '''
-        return (~ self) | (self & other)
+        assert isinstance(other, QOpt), "ASSERTION FAILED"
+
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
+        
+        if not self.is_projector or not other.is_projector:
+            raise QPLCompError("The two QOpt are not both projectors.")
+        
+        return self.space.Sasaki_imply(other.space).qopt
     
     def Sasaki_conjunct(self, other : QOpt) -> QOpt:
         '''
@@ -631,10 +833,19 @@ class QOpt(QVal):
         
         Note: Sasaki conjunction P -> R := P \\wedge (P^\\perp \\vee R)
         '''
-        return self & ((~ self) | other)
+        assert isinstance(other, QOpt), "ASSERTION FAILED"
+
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QOpt should have the same number of qubit numbers.")
+        
+        if not self.is_projector or not other.is_projector:
+            raise QPLCompError("The two QOpt are not both projectors.")
+        
+        return self.space.Sasaki_conjunct(other.space).qopt
 
 
 from .qvec import QVec
+from .qspace import QSubspace
 
 def qproj_from_qvec(qvec : QVec) -> QOpt:
     '''
@@ -643,4 +854,11 @@ def qproj_from_qvec(qvec : QVec) -> QOpt:
     ```
     '''
     v = qvec.v_repr.reshape((2**qvec.qnum, 1))
-    return QOpt(v @ v.conjugate().transpose())
\ No newline at end of file
+
+    # |v><v| is a projector for normalized (or zero) vectors, and a partial density operator for |v| <= 1
+    n2 = float(np.vdot(v, v).real)
+    return QOpt(v @ v.conjugate().transpose(),
+                is_effect = n2 <= 1. + QVal.prec,
+                is_pdo = n2 <= 1. + QVal.prec,
+                is_projector = abs(n2 - 1.) < QVal.prec or n2 < QVal.prec,
+                is_Hermitian = True)
\ No newline at end of file
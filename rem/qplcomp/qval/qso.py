@@ -22,6 +22,14 @@ def Kraus_str(ls : list[QOpt]) -> str:
 class QSOpt(QVal):
     '''
     The class to represent quantum super operators.
+
+    A superoperator is stored in one or more of the following representations, and the missing ones are calculated and cached on request:
+        - the Kraus list `[E_i]`,
+        - the Liouville matrix `L = sum_i E_i ⊗ conj(E_i)`,
+        - the Choi matrix.
+    The operations choose the cheapest representation available.
+
+    Note: inplace operations are not allowed.
     '''
 
     def __init__(self, data, is_qo : None | bool = None):
@@ -31,10 +39,15 @@ class QSOpt(QVal):
         Parameters:
             - `data`:
                 - `list[QOpt]`, the Kraus operators `E_i`. Note that the E_i should be of the same qubit number.
+                - `np.ndarray`, the Liouville matrix.
             - `is_qo`: `None | bool`, whether this superoperator is quantum operation. In otherwords, whether the Kraus operators `E_i` satisfy `0 <= sum E_i E_i^dagger <= I`.
         '''
         self._qnum : int
 
+        self._Krausls : list[QOpt] | None = None
+        self._liouville : np.ndarray | None = None
+        self._choi : np.ndarray | None = None
+
         # data is Kraus representation
         if isinstance(data, list):
             if len(data) == 0:
@@ -49,21 +62,59 @@ class QSOpt(QVal):
                     raise QPLCompError("The Kraus operators should be of the same number of qubits.")
                 
             self._Krausls = data.copy()
+
+        # data is Liouville representation
+        elif isinstance(data, np.ndarray):
+            dim = round(np.sqrt(data.shape[0]))
+            self._qnum = round(np.log2(dim))
+            if data.shape != (4**self._qnum, 4**self._qnum):
+                raise QPLCompError(f"Incorrect Liouville matrix shape: {data.shape}.")
+
+            self._liouville = data
             
         else:
             raise Exception()
         
         self._qo : None | bool = is_qo
+
+    @staticmethod
+    def from_choi(J : np.ndarray, is_qo : None | bool = None) -> QSOpt:
+        '''
+        Create the superoperator with the Choi matrix `J`.
+        '''
+        res = QSOpt(linalgPP.choi_liouville(J), is_qo)
+        res._choi = J
+        return res
         
     @property
     def Kraus(self) -> list[QOpt]:
         '''
-        Return the list of corresponding Kraus operators.
+        Return the list of corresponding Kraus operators. If the superoperator is not given by Kraus operators, a minimal list is calculated from the Choi matrix.
         '''
+        if self._Krausls is None:
+            self._Krausls = [QOpt(E) for E in linalgPP.choi_kraus(self.choi, self.prec)]
         return self._Krausls
-    
+
+    @property
+    def liouville(self) -> np.ndarray:
+        '''
+        Return the Liouville matrix `sum_i E_i ⊗ conj(E_i)`, which acts on the row-major vectorization of operators.
+        '''
+        if self._liouville is None:
+            self._liouville = linalgPP.kraus_liouville([E.m_repr for E in self.Kraus])
+        return self._liouville
+
+    @property
+    def choi(self) -> np.ndarray:
+        '''
+        Return the Choi matrix `sum_{c,d} |c><d| ⊗ S(|c><d|)`.
+        '''
+        if self._choi is None:
+            self._choi = linalgPP.liouville_choi(self.liouville)
+        return self._choi
+
     def __str__(self) -> str:
-        return Kraus_str(self._Krausls)
+        return Kraus_str(self.Kraus)
 
     
     @property
@@ -76,10 +127,31 @@ class QSOpt(QVal):
     @property
     def is_qo(self) -> bool:
         if self._qo is None:
-            self._qo = linalgPP.is_qo([E.m_repr for E in self._Krausls], self.prec)
+            self._qo = linalgPP.is_qo([E.m_repr for E in self.Kraus], self.prec)
         return self._qo
     def assert_qo(self) -> None:
         self._qo = True
+
+    @property
+    def apply_by_liouville(self) -> bool:
+        '''
+        Decide whether the application should use the Liouville matrix instead of the Kraus list.
+
+        The Liouville matrix costs `d^4` and the Kraus list costs `2 m d^3`. The Liouville matrix is only used when it is already available or the Kraus list is not.
+        '''
+        if self._Krausls is None:
+            return True
+        return self._liouville is not None and len(self._Krausls) > 2**self.qnum
+
+    def compress(self) -> QSOpt:
+        '''
+        Return the equivalent superoperator with a compressed list of at most `4^qnum` Kraus operators.
+        '''
+        new_Kraus = [QOpt(E) for E in linalgPP.kraus_compress([E.m_repr for E in self.Kraus], self.prec)]
+        res = QSOpt(new_Kraus, self._qo)
+        res._liouville = self._liouville
+        res._choi = self._choi
+        return res
     
 
     ################################################
@@ -100,10 +172,10 @@ class QSOpt(QVal):
         if self.qnum != opt.qnum:
             raise QPLCompError("The QSOpt instance cannot apply on the QOpt instance. The QSOpt instance is of " + str(self.qnum) + " qubits, but the QOpt instance is of "+ str(opt.qnum) + "qubits.")
 
-        res = QOpt.zero_opt(self.qnum)
-
-        for E in self._Krausls:
-            res = res + E @ opt @ E.dagger()
+        if self.apply_by_liouville:
+            res = QOpt(linalgPP.liouville_apply(self.liouville, opt.m_repr))
+        else:
+            res = QOpt(linalgPP.kraus_apply([E.m_repr for E in self.Kraus], opt.m_repr))
 
         # quantum operator on effect -> effect
         if self._qo == True and opt.effect_tag == True:
@@ -123,15 +195,44 @@ class QSOpt(QVal):
     def __add__(self, other : QSOpt) -> QSOpt:
         '''
         Calculate and return the addition result of `self` and `other`.
+
+        The Liouville matrices are added if both are available. Otherwise the Kraus lists are concatenated, and compressed when they are longer than the number `4^qnum` of the linearly independent operators.
         - Parameters: `self`, `other` : `QSOpt`.
         - Returns: `QSOpt`.
         '''
-        assert isinstance(other, QOpt), "ASSERTION FAILED"
+        assert isinstance(other, QSOpt), "ASSERTION FAILED"
 
         if self.qnum != other.qnum:
             raise QPLCompError(f"Inconsistent qubit numbers: {self.qnum} and {other.qnum}. The two QSOpt should have the same number of qubit numbers.")
+
+        if self._liouville is not None and other._liouville is not None:
+            return QSOpt(self._liouville + other._liouville)
         
-        return QSOpt(self.Kraus + other.Kraus)
+        res = QSOpt(self.Kraus + other.Kraus)
+        if len(res.Kraus) > 4**self.qnum:
+            res = res.compress()
+        return res
+
+    def __matmul__(self, other : QSOpt) -> QSOpt:
+        '''
+        Calculate and return the composition `self ∘ other`, which applies `other` first.
+
+        The Kraus operators `E_i F_j` are built if there are at most `4^qnum` of them. Otherwise the Liouville matrices are multiplied, so that the number of Kraus operators does not grow over compositions.
+        - Parameters: `self`, `other` : `QSOpt`.
+        - Returns: `QSOpt`.
+        '''
+        assert isinstance(other, QSOpt), "ASSERTION FAILED"
+
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit numbers: {self.qnum} and {other.qnum}. The two QSOpt should have the same number of qubit numbers.")
+
+        is_qo = True if self._qo == True and other._qo == True else None
+
+        if self._Krausls is None or other._Krausls is None or\
+            len(self._Krausls) * len(other._Krausls) > 4**self.qnum:
+            return QSOpt(self.liouville @ other.liouville, is_qo)
+
+        return QSOpt([E @ F for E in self.Kraus for F in other.Kraus], is_qo)
 
 
     def dagger(self) -> QSOpt:
@@ -142,5 +243,8 @@ class QSOpt(QVal):
         Returns: QSOpt, the result.
         '''
 
+        if self._Krausls is None:
+            return QSOpt(self.liouville.transpose().conj())
+
         new_Kraus = [item.dagger() for item in self.Kraus]
-        return QSOpt(new_Kraus)
\ No newline at end of file
+        return QSOpt(new_Kraus)
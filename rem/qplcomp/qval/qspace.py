@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from ..error import QPLCompError
+
+import numpy as np
+from .. import linalgPP
+
+from .val import QVal
+from .qopt import QOpt
+
+class QSubspace(QVal):
+    '''
+    The class to represent subspaces, the lattice elements of projectors. A subspace is stored as an orthonormal basis, and the lattice operations work on the bases directly.
+
+    The corresponding projector is only built on request through `qopt`.
+
+    Note: inplace operations are not allowed.
+    '''
+
+    def __init__(self, basis : np.ndarray):
+        '''
+        Construct a QSubspace instance with the given orthonormal basis.
+
+        Parameters:
+            - basis : np.ndarray, a matrix with columns being an orthonormal basis (not checked here).
+        '''
+        if len(basis.shape) != 2:
+            raise QPLCompError(f"Incorrect basis shape: {basis.shape} should be a matrix.")
+
+        dim = basis.shape[0]
+        self._qnum : int = round(np.log2(dim))
+        if 2**self._qnum != dim:
+            raise QPLCompError(f"Incorrect space dimension: {dim} should be some power of 2.")
+
+        self._basis = basis
+
+        # the projector, calculated on request
+        self._qopt : QOpt | None = None
+
+    @staticmethod
+    def from_qopt(P : QOpt) -> QSubspace:
+        '''
+        Create the subspace represented by the projector `P`.
+        '''
+        if not P.is_projector:
+            raise QPLCompError("The QOpt instance is not a projector.")
+        return QSubspace(linalgPP.proj_basis(P.m_repr))
+
+    @property
+    def basis(self) -> np.ndarray:
+        '''
+        Return the orthonormal basis of this subspace.
+        '''
+        return self._basis
+
+    @property
+    def qnum(self) -> int:
+        return self._qnum
+
+    @property
+    def rank(self) -> int:
+        '''
+        Return the dimension of this subspace.
+        '''
+        return self._basis.shape[1]
+
+    @property
+    def qopt(self) -> QOpt:
+        '''
+        Return the projector onto this subspace.
+        '''
+        if self._qopt is None:
+            # the trace of the projector is the rank, and the only unitary projector is the identity
+            self._qopt = QOpt(linalgPP.basis_proj(self._basis),
+                              is_unitary = self.rank == 2**self.qnum,
+                              is_effect = True,
+                              is_pdo = self.rank <= 1,
+                              is_projector = True,
+                              is_Hermitian = True)
+            self._qopt._space = self
+        return self._qopt
+
+    def __str__(self) -> str:
+        return str(self._basis)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, QSubspace):
+            return False
+
+        if self.qnum != other.qnum or self.rank != other.rank:
+            return False
+
+        return other.includes(self)
+
+
+    def includes(self, other : QSubspace) -> bool:
+        '''
+        Decide whether the subspace `other` is included in `self`.
+        '''
+        self._check_qnum(other)
+        return linalgPP.basis_le(other._basis, self._basis, QVal.prec)
+
+    def __le__(self, other : QSubspace) -> bool:
+        return other.includes(self)
+
+    ################################################
+    # Lattice operations
+    ################################################
+
+    def _check_qnum(self, other : QSubspace) -> None:
+        assert isinstance(other, QSubspace), "ASSERTION FAILED"
+
+        if self.qnum != other.qnum:
+            raise QPLCompError(f"Inconsistent qubit number: {self.qnum} and {other.qnum}. The two QSubspace should have the same number of qubit numbers.")
+
+    def join(self, other : QSubspace) -> QSubspace:
+        '''
+        Calculate and return the join (disjunction) of subspaces `self` and `other`.
+        '''
+        self._check_qnum(other)
+        return QSubspace(linalgPP.basis_join(self._basis, other._basis, QVal.prec))
+
+    def __or__(self, other : QSubspace) -> QSubspace:
+        return self.join(other)
+
+    def meet(self, other : QSubspace) -> QSubspace:
+        '''
+        Calculate and return the meet (conjunction) of subspaces `self` and `other`.
+        '''
+        self._check_qnum(other)
+        return QSubspace(linalgPP.basis_meet(self._basis, other._basis, QVal.prec))
+
+    def __and__(self, other : QSubspace) -> QSubspace:
+        return self.meet(other)
+
+    def complement(self) -> QSubspace:
+        '''
+        Calculate and return the orthogonal complement of `self`.
+        '''
+        return QSubspace(linalgPP.basis_complement(self._basis))
+
+    def __invert__(self) -> QSubspace:
+        return self.complement()
+
+    def Sasaki_imply(self, other : QSubspace) -> QSubspace:
+        '''
+        Calculate and return the Sasaki implication P -> R := P^\\perp \\vee (P \\wedge R).
+        '''
+        return (~ self) | (self & other)
+
+    def Sasaki_conjunct(self, other : QSubspace) -> QSubspace:
+        '''
+        Calculate and return the Sasaki conjunction P -> R := P \\wedge (P^\\perp \\vee R).
+        '''
+        return self & ((~ self) | other)
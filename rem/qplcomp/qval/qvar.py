@@ -21,6 +21,12 @@ class QVar:
         
     def __str__(self) -> str:
         return QVar._qvls_str(self._qvls)
+
+    def __eq__(self, other : object) -> bool:
+        return isinstance(other, QVar) and self._qvls == other._qvls
+
+    def __hash__(self) -> int:
+        return hash(self.tuple)
     
     @property
     def qnum(self) -> int:
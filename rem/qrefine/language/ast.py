@@ -204,6 +204,10 @@ class AstAssert(QProgAst):
     
 
 class AstPres(QProgAst):
+
+    # the refinement assigns `SRefined` after construction
+    internable = False
+
     def __init__(self, P : EIQOptAbstract, Q : EIQOptAbstract, SRefined: QProgAst|None = None):
         '''
         This `SRefined` attribute can refer to the subsequent refined programs for this program. If `None`, then the current program is used.
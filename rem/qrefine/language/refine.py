@@ -10,7 +10,13 @@ from .semantics.assertion import wlp
 #############################################################
 
 
-def wlp_check(pres: AstPres, SRefined: TypedTerm, env: Env) -> None:
+def wlp_holds(pres: AstPres, SRefined: QProgAst, env: Env) -> bool:
+    '''
+    Decide `P ⊑ wlp.S.Q` for the prescription `[P, Q]` and the evaluated program `S`. It only reads the arguments, so that the checks of different prescriptions can run in parallel.
+    '''
+    return pres.P.eval(env).iqopt <= wlp(SRefined, pres.Q.eval(env).iqopt, env)
+
+def wlp_check(pres: AstPres, SRefined: TypedTerm, env: Env, holds: bool | None = None) -> None:
     '''
         == Refinement Rule ==
         ```
@@ -21,13 +27,18 @@ def wlp_check(pres: AstPres, SRefined: TypedTerm, env: Env) -> None:
 
         It checks the weakest liberal precondition.
         (it is in the semantics level)
+
+        `holds` is the result of `wlp_holds` if it is already decided, e.g. in another process.
     '''
     SRefined = SRefined.eval(env)
 
     if not isinstance(SRefined, QProgAst):
         raise ValueError("The refined program should be a QProgAst instance.")
 
-    if not pres.P.eval(env).iqopt <= wlp(SRefined, pres.Q.eval(env).iqopt, env):
+    if holds is None:
+        holds = wlp_holds(pres, SRefined, env)
+
+    if not holds:
         msg = "Refinement failed. The relation P <= wlp.S.Q is not satisfied for: \n"
         msg += "P = \n\t" + str(pres.P) + "\n"
         msg += "Q = \n\t" + str(pres.Q) + "\n"
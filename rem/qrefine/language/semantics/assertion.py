@@ -1,8 +1,39 @@
 from ..ast import *
 
+from .cache import EnvCaches, LRUCache, term_key, iqopt_fingerprint
+
+from collections import deque
+import time
+
+# the wlp results of every environment, keyed by the program and the postcondition
+WLP_CACHE_CAPACITY = 256
+wlp_caches = EnvCaches(WLP_CACHE_CAPACITY)
+
+def wlp_cache(env: Env) -> LRUCache:
+    '''
+    Return the wlp cache of the environment, for inspecting the hit/miss counters.
+    '''
+    return wlp_caches[env]
+
 def wlp(prog: QProgAst, post: IQOpt, env: Env) -> IQOpt:
     '''
     Compute the weakest liberal precondition.
+
+    The results are memoized for every environment, keyed on the structure of the program and the fingerprint of the postcondition. The sub-programs are memoized as well.
+    '''
+    cache = wlp_caches[env]
+    key = (term_key(prog), iqopt_fingerprint(post))
+
+    res = cache.get(key)
+    if res is None:
+        res = _wlp(prog, post, env)
+        cache.put(key, res)
+
+    return res
+
+def _wlp(prog: QProgAst, post: IQOpt, env: Env) -> IQOpt:
+    '''
+    Compute the weakest liberal precondition, without the memoization on `prog` itself.
     '''
 
     if isinstance(prog, AstAbort):
@@ -41,27 +72,75 @@ def wlp(prog: QProgAst, post: IQOpt, env: Env) -> IQOpt:
               (~ P).Sasaki_imply(wlp(prog.S0, post, env))
     
     elif isinstance(prog, AstWhile):
-        '''
-        This will terminate because the lattice has finite height.
-        '''
-        flag = True
-        Rn = IQOpt.identity(False)
-        Rn_1 = IQOpt.identity(False)
+        return wlp_while(prog, post, env)
 
-        P = prog.P.eval(env).iqopt
+    else:
+        raise ValueError(f"Unsupported type: {prog}")
 
-        # this is guaranteed to terminate
-        while flag:
-            Rn = Rn_1
-            Rn_1 = P.Sasaki_imply(wlp(prog.S, Rn, env)) & (~ P).Sasaki_imply(post)
 
-            flag = not Rn == Rn_1
+class LoopRecord:
+    '''
+    The record of a fixed-point iteration for a while loop.
+    '''
+    def __init__(self, prog: AstWhile, iterations: int, seconds: float):
+        self.prog = prog
+        self.iterations = iterations
+        self.seconds = seconds
 
-        return Rn    
-    
+    def __str__(self) -> str:
+        return f"while {self.prog.P}: {self.iterations} iterations, {self.seconds:.4f}s"
 
-    else:
-        raise ValueError(f"Unsupported type: {prog}")
+# the records of the latest loop iterations
+loop_records : deque[LoopRecord] = deque(maxlen=100)
+
+def _rank_density(R: IQOpt) -> tuple[int, int]:
+    '''
+    Return the rank of the projector `R` and its qubit number. The rank of its cylinder extension to `n` qubits is `rank * 2^(n - qnum)`.
+    '''
+    return R.qval.space.rank, R.qnum
+
+def wlp_while(prog: AstWhile, post: IQOpt, env: Env) -> IQOpt:
+    '''
+    Compute the weakest liberal precondition of a while loop, as the greatest fixed point of
+
+        R ↦ (P ⇝ wlp.S.R) ∧ (P^⊥ ⇝ post),
+
+    iterated from the identity.
+
+    The iterates form a decreasing chain in the lattice of projectors, therefore two consecutive iterates are equal exactly when their ranks are. The comparison is conducted on the ranks of the (cached) bases, and the iteration is bounded by the lattice height. The iteration count and time are recorded in `loop_records`.
+
+    The basis of the previous iterate is reused: since `R_n <= P^⊥ ⇝ post` for `n >= 1` and the chain is decreasing, the next iterate is `(P ⇝ wlp.S.R_n) ∧ R_n`. The meet is calculated within the basis of `R_n` (see `QSubspace.meet`), whose rank shrinks over the iterations, instead of the one of the termination branch.
+    '''
+    start = time.perf_counter()
+
+    P = prog.P.eval(env).iqopt
+
+    # the branch of termination does not change over the iterations
+    R_break = (~ P).Sasaki_imply(post)
+
+    Rn = IQOpt.identity(False)
+    rank_n, qnum_n = 1, 0
+
+    iterations = 0
+    while True:
+        iterations += 1
+
+        Rn_1 = (R_break if iterations == 1 else Rn) & P.Sasaki_imply(wlp(prog.S, Rn, env))
+        rank_n_1, qnum_n_1 = _rank_density(Rn_1)
+
+        # the chain is decreasing: equal ranks mean equal projectors
+        if rank_n_1 * 2**qnum_n == rank_n * 2**qnum_n_1:
+            break
+
+        # the lattice height is the dimension of the space
+        if iterations > 2**Rn_1.qnum:
+            raise ValueError(f"The fixed-point iteration of the loop\n\n{prog}\n\ndoes not converge.")
+
+        Rn, rank_n, qnum_n = Rn_1, rank_n_1, qnum_n_1
+
+    loop_records.append(LoopRecord(prog, iterations, time.perf_counter() - start))
+
+    return Rn
 
 
 def sp_ex(prog: QProgAst, pre : EIQOpt, env: Env) -> EIQOpt:
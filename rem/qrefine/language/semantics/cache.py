@@ -0,0 +1,139 @@
+'''
+The caches for the semantic calculations.
+
+The terms are identified by structural keys: nested tuples built from the node classes, the literal attributes and the digests of the numerical values. Variables are identified by their names, therefore a cache must never be shared between different environments.
+'''
+
+from __future__ import annotations
+from typing import Any, Hashable
+
+from collections import OrderedDict
+
+import hashlib
+import weakref
+
+import numpy as np
+
+from ....mTLC.env import TypedTerm, Var, Env
+from ....mTLC.hashcons import IGNORED_ATTRS
+from ....qplcomp import QOpt, IQOpt, QSOpt, QVar
+from ....qplcomp.qval import QVal, QVec
+
+from ...error import ValueError
+
+def array_digest(a : np.ndarray) -> bytes:
+    '''
+    Return the digest of the array, quantized with the precision `QVal.prec`. Arrays equal up to the precision have the same digest except at the borders of the quantization.
+    '''
+    q = np.round(np.asarray(a, dtype=complex) / QVal.prec)
+    data = np.stack((q.real, q.imag)).astype(np.int64)
+    return hashlib.blake2b(data.tobytes() + str(a.shape).encode(), digest_size=16).digest()
+
+def iqopt_fingerprint(iqopt : IQOpt) -> tuple:
+    '''
+    Return the fingerprint of an indexed operator: its quantum variable together with the digest of its matrix.
+    '''
+    return (iqopt.qvar.tuple, iqopt.rho_extend, array_digest(iqopt.qval.m_repr))
+
+def _value_key(value : Any) -> Hashable:
+    if isinstance(value, TypedTerm):
+        return term_key(value)
+    elif isinstance(value, IQOpt):
+        return ("IQOpt",) + iqopt_fingerprint(value)
+    elif isinstance(value, QOpt):
+        return ("QOpt", array_digest(value.m_repr))
+    elif isinstance(value, QVec):
+        return ("QVec", array_digest(value.v_repr))
+    elif isinstance(value, QSOpt):
+        return ("QSOpt",) + tuple(array_digest(E.m_repr) for E in value.Kraus)
+    elif isinstance(value, QVar):
+        return ("QVar", value.tuple)
+    elif isinstance(value, np.ndarray):
+        return ("array", array_digest(value))
+    elif isinstance(value, (list, tuple)):
+        return tuple(_value_key(v) for v in value)
+    elif isinstance(value, (str, int, float, complex, bool)) or value is None:
+        return value
+    else:
+        raise ValueError(f"Cannot build the structural key for the value '{value}'.")
+
+def term_key(term : TypedTerm) -> Hashable:
+    '''
+    Return the structural key of the term. The key is calculated once and preserved in the term.
+    '''
+    if isinstance(term, Var):
+        return ("Var", term.id)
+
+    key = term.__dict__.get("_struct_key")
+    if key is None:
+        key = (type(term).__name__,) + tuple(
+            (attr, _value_key(val)) for attr, val in sorted(term.__dict__.items())
+            if attr not in IGNORED_ATTRS)
+        term._struct_key = key  # type: ignore
+
+    return key
+
+
+class LRUCache:
+    '''
+    A cache with the least-recently-used eviction and hit/miss counters.
+    '''
+
+    def __init__(self, capacity : int):
+        self.capacity = capacity
+        self._data : OrderedDict[Hashable, Any] = OrderedDict()
+
+        self.hits : int = 0
+        self.misses : int = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key : Hashable) -> Any | None:
+        '''
+        Return the cached value of `key`, or `None` if it is not cached.
+        '''
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, key : Hashable, value : Any) -> None:
+        self._data[key] = value
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.capacity:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.
+
+    def __str__(self) -> str:
+        return f"{len(self)}/{self.capacity} entries, {self.hits} hits, {self.misses} misses"
+
+
+class EnvCaches:
+    '''
+    The caches attached to environments. Every environment instance has its own cache, which is released together with the environment.
+    '''
+
+    def __init__(self, capacity : int):
+        self.capacity = capacity
+        self._caches : dict[int, LRUCache] = {}
+
+    def __getitem__(self, env : Env) -> LRUCache:
+        key = id(env)
+        if key not in self._caches:
+            self._caches[key] = LRUCache(self.capacity)
+            weakref.finalize(env, self._caches.pop, key, None)
+        return self._caches[key]
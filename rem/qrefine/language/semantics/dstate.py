@@ -0,0 +1,142 @@
+'''
+The density operator states for the forward calculation.
+
+A `DensityState` holds the state as one tensor over a fixed layout of qubits. Operators on `k` of the `n` qubits are applied by contracting only the affected indices, which costs `O(4^n * 2^k)` instead of the `O(8^n)` of extended matrix multiplications.
+'''
+
+from __future__ import annotations
+
+import numpy as np
+
+from ....qplcomp import QOpt, IQOpt, QVar
+from ....qplcomp.qval import QVal
+from ....qplcomp.linalgPP.general import close_zero
+
+class DensityState:
+    '''
+    A (partial) density operator on the qubits of `qvar`, stored as a tensor.
+
+    Qubits outside of the layout are understood to be in the state `|0><0|`, in accordance with the cylinder extension of density operators. The layout grows when an operation touches new qubits.
+
+    [index sequence of the tensor]
+
+    rows:       0,   1, ..., n-1
+    columns:    n, n+1, ..., 2n-1
+    '''
+
+    def __init__(self, tensor : np.ndarray, qvar : QVar):
+        self.tensor = tensor
+        self.qvar = qvar
+
+    @staticmethod
+    def from_iqopt(rho : IQOpt) -> DensityState:
+        return DensityState(rho.qval.t_repr, rho.qvar)
+
+    def to_iqopt(self) -> IQOpt:
+        res = QOpt(self.tensor)
+        res.assert_pdo()
+        return IQOpt(res, self.qvar, True)
+
+    @property
+    def qnum(self) -> int:
+        return self.qvar.qnum
+
+    def copy(self) -> DensityState:
+        return DensityState(self.tensor, self.qvar)
+
+    def is_zero(self) -> bool:
+        return close_zero(self.tensor, QVal.prec)
+
+    def trace(self) -> float:
+        '''
+        Return the trace of the state, i.e., the probability of reaching it.
+        '''
+        d = 2**self.qnum
+        return np.trace(self.tensor.reshape((d, d))).real
+
+    ################################################
+    # layout
+    ################################################
+
+    def extend(self, qvar : QVar) -> DensityState:
+        '''
+        Return the state with the qubits of `qvar` included in the layout. The new qubits are appended in the state `|0><0|`.
+        '''
+        if self.qvar.contains(qvar):
+            return self
+
+        new_qvar = self.qvar + qvar
+        return DensityState(
+            IQOpt(QOpt(self.tensor), self.qvar, True).extend(new_qvar).qval.t_repr,
+            new_qvar)
+
+    def align(self, qvar : QVar) -> DensityState:
+        '''
+        Return the state on exactly the layout `qvar`, which should contain the current layout.
+        '''
+        state = self.extend(qvar)
+        if state.qvar.tuple == qvar.tuple:
+            return state
+
+        perm = state.qvar.to(qvar)
+        n = len(perm)
+        return DensityState(state.tensor.transpose(perm + [i + n for i in perm]), qvar)
+
+    ################################################
+    # operations
+    ################################################
+
+    def conjugate(self, A : IQOpt) -> DensityState:
+        '''
+        Return the state `A rho A^dagger`, where only the indices of the qubits of `A` are contracted.
+        '''
+        state = self.extend(A.qvar)
+        n, k = state.qnum, A.qnum
+
+        pos = state.qvar.to(A.qvar)
+        new_row = [2*n + t for t in range(k)]
+        new_col = [2*n + k + t for t in range(k)]
+
+        out = list(range(2*n))
+        for t in range(k):
+            out[pos[t]] = new_row[t]
+            out[n + pos[t]] = new_col[t]
+
+        tensor = np.einsum(
+            A.qval.t_repr, new_row + pos,
+            state.tensor, list(range(2*n)),
+            A.qval.t_repr.conj(), new_col + [n + p for p in pos],
+            out, optimize=True)
+
+        return DensityState(tensor, state.qvar)
+
+    def reset(self, qvar : QVar) -> DensityState:
+        '''
+        Return the state after the initialization `qvar := 0`, which traces out every qubit of `qvar` and prepares it in `|0><0|`.
+        '''
+        state = self.extend(qvar)
+        n = state.qnum
+
+        tensor = state.tensor
+        for p in state.qvar.to(qvar):
+            traced = np.trace(tensor, axis1=p, axis2=n+p)
+
+            idx : list = [slice(None)] * (2*n)
+            idx[p] = 0
+            idx[n+p] = 0
+            tensor = np.zeros(tensor.shape, dtype=np.result_type(tensor, float))
+            tensor[tuple(idx)] = traced
+
+        return DensityState(tensor, state.qvar)
+
+    def scale(self, c : float) -> DensityState:
+        return DensityState(c * self.tensor, self.qvar)
+
+    def __add__(self, other : DensityState) -> DensityState:
+        if not isinstance(other, DensityState):
+            return NotImplemented
+
+        qvar_all = self.qvar + other.qvar
+        return DensityState(
+            self.align(qvar_all).tensor + other.align(qvar_all).tensor,
+            qvar_all)
@@ -4,17 +4,23 @@ The (finite step) forward calculation of this language.
 
 
 from .. import *
-import numpy as np
-from ....qplcomp import QOpt, IQOpt, QSOpt, IQSOpt
+from ....qplcomp import IQOpt
 
 from .extract import extract
+from .dstate import DensityState
+from .vstate import PureEnsemble
 
 from ...error import ValueError
 
+from collections import deque
+
+State = DensityState | PureEnsemble
+
+# the loop unrolling stops when the trace of the continuing branch drops below this threshold
+WHILE_EPSILON = 1e-10
+# the maximum number of unrolled iterations of a loop
+WHILE_MAX_ITERATIONS = 10000
 
-P0 = QOpt(np.array([[1., 0.], [0., 0.]]))
-E10 = QOpt(np.array([[0., 1.], [0., 0.]]))
-ESet0 = QSOpt([P0, E10])
 
 class EIQOptCalc(EIQOptAbstract):
     '''
@@ -55,8 +61,6 @@ def calc(prog : QProgAst, rho : IQOpt, env: Env) -> IQOpt:
     Check of program and input state is implemented here.
     '''
 
-    rho.rho_extend = True
-
     extracted_prog = extract(prog)
 
     # check whether the program can be calculated
@@ -67,46 +71,45 @@ def calc(prog : QProgAst, rho : IQOpt, env: Env) -> IQOpt:
     if not rho.qval.is_pdo:
         raise ValueError("The input rho is not a partial density operator.")
     
-    return calc_iter(extracted_prog, rho, env)
+    # simulate on state vectors if rho has a small rank
+    state : State | None = PureEnsemble.from_iqopt(rho)
+    if state is None:
+        state = DensityState.from_iqopt(rho)
+
+    return calc_iter(extracted_prog, state, env).to_iqopt()
     
 
 
-def calc_iter(prog : TypedTerm, rho : IQOpt, env: Env) -> IQOpt:
+def calc_iter(prog : TypedTerm, rho : State, env: Env) -> State:
     '''
     Calculate the execution result of program `prog` on input state `rho`.
 
-    Returns: `IQOpt`, the result of execution.
+    Returns: `DensityState` or `PureEnsemble`, the result of execution.
     '''
-    rho.rho_extend = True
 
     # return zero if the input is zero
-    if rho == IQOpt.zero(is_rho=True):
-        return IQOpt.zero(is_rho=True)
+    if rho.is_zero():
+        return rho
     
     prog.type_checking(QProgType())
     prog = prog.eval(env)
 
     if isinstance(prog, AstAbort):
-        return IQOpt.zero(is_rho=True)
+        return rho.scale(0.)
     
     elif isinstance(prog, AstSkip):
         return rho
     
     elif isinstance(prog, AstInit):
-        res = rho
-        for q in prog.eqvar.eval(env).qvar:
-            IESet0 = IQSOpt(ESet0, QVar([q]))
-            res = IESet0.apply(res)
-            res.rho_extend = True
-        return res
+        return rho.reset(prog.eqvar.eval(env).qvar)
     
     elif isinstance(prog, AstUnitary):
         U = prog.U.eval(env).iqopt
-        return U @ rho @ U.dagger()
+        return rho.conjugate(U)
     
     elif isinstance(prog, AstAssert):
         P = prog.P.eval(env).iqopt
-        return P @ rho @ P
+        return rho.conjugate(P)
     
     elif isinstance(prog, AstPres):
         if prog.SRefined is None:
@@ -115,36 +118,73 @@ def calc_iter(prog : TypedTerm, rho : IQOpt, env: Env) -> IQOpt:
     
     elif isinstance(prog, AstSeq):
         rho1 = calc_iter(prog.S0, rho, env)
-        return calc_iter(prog.S1, rho, env)
+        return calc_iter(prog.S1, rho1, env)
     
     elif isinstance(prog, AstProb):
         rho_0 = calc_iter(prog.S0, rho, env)
         rho_1 = calc_iter(prog.S1, rho, env)
-        return (1-prog.p) * rho_0 + prog.p * rho_1
+        return rho_0.scale(1-prog.p) + rho_1.scale(prog.p)
     
     elif isinstance(prog, AstIf):
         # branch of res == 1
         P = prog.P.eval(env).iqopt
-        rho_1 = calc_iter(prog.S1, P @ rho @ P, env)
+        rho_1 = calc_iter(prog.S1, rho.conjugate(P), env)
         
         # branch of res == 0
         P_comp = ~ P
-        rho_0 = calc_iter(prog.S0, P_comp @ rho @ P_comp, env)
+        rho_0 = calc_iter(prog.S0, rho.conjugate(P_comp), env)
 
         return rho_1 + rho_0
     
     elif isinstance(prog, AstWhile):
-        P = prog.P.eval(env).iqopt
-        P_comp = ~ P
+        return calc_while(prog, rho, env)
+    
+    else:
+        raise ValueError(f"Cannot execute the program\n\n{prog}")
 
-        # branch of `break`
-        rho_break = P_comp @ rho @ P_comp
 
-        # branch of `continue`
-        new_prog = AstSeq(prog.S, prog)
-        rho_continue = calc_iter(new_prog, P @ rho @ P, env)
 
-        return rho_break + rho_continue
-    
-    else:
-        raise ValueError(f"Cannot execute the program\n\n{prog}")
\ No newline at end of file
+def calc_while(prog : AstWhile, rho : State, env: Env) -> State:
+    '''
+    Calculate the execution result of a while loop by unrolling it iteratively. The terminated branches are accumulated, and the unrolling stops when the trace of the continuing branch drops below `WHILE_EPSILON`.
+
+    The iteration count and the residual trace are recorded in `while_records`.
+
+    Raises: `ValueError` if the loop does not converge within `WHILE_MAX_ITERATIONS` iterations.
+    '''
+    P = prog.P.eval(env).iqopt
+    P_comp = ~ P
+
+    rho_break = rho.conjugate(P_comp)
+    rho_continue = rho.conjugate(P)
+
+    # `calc_iter` leaves the states that are zero up to `QVal.prec` unchanged
+    iterations = 0
+    while not rho_continue.is_zero() and rho_continue.trace() >= WHILE_EPSILON:
+        iterations += 1
+        if iterations > WHILE_MAX_ITERATIONS:
+            raise ValueError(f"The execution of the loop\n\n{prog}\n\ndoes not converge within {WHILE_MAX_ITERATIONS} iterations. The residual trace is {rho_continue.trace()}.")
+
+        rho_iter = calc_iter(prog.S, rho_continue, env)
+        rho_break = rho_break + rho_iter.conjugate(P_comp)
+        rho_continue = rho_iter.conjugate(P)
+
+    while_records.append(WhileRecord(prog, iterations, rho_continue.trace()))
+
+    return rho_break
+
+
+class WhileRecord:
+    '''
+    The record of an unrolled execution of a while loop.
+    '''
+    def __init__(self, prog: AstWhile, iterations: int, residual: float):
+        self.prog = prog
+        self.iterations = iterations
+        self.residual = residual
+
+    def __str__(self) -> str:
+        return f"while {self.prog.P}: {self.iterations} iterations, residual trace {self.residual:.3e}"
+
+# the records of the latest loop executions
+while_records : deque[WhileRecord] = deque(maxlen=100)
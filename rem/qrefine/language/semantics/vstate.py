@@ -0,0 +1,178 @@
+'''
+The pure state ensembles for the forward calculation.
+
+A `PureEnsemble` represents the density operator `sum_i |psi_i><psi_i|` by the list of unnormalized state vectors `psi_i`, which costs `O(m * 2^n)` memory instead of `O(4^n)`. Unitaries and assertions act on every vector, while initializations, `if` and probabilistic choices split the vectors into branches. When the number of branches exceeds `MAX_BRANCHES`, the calculation continues on a `DensityState`.
+'''
+
+from __future__ import annotations
+
+import numpy as np
+
+from ....qplcomp import IQOpt, QVar
+from ....qplcomp.qval import QVal
+
+from .dstate import DensityState
+
+# the maximum number of vectors in an ensemble before falling back to density operators
+MAX_BRANCHES = 16
+
+class PureEnsemble:
+    '''
+    A (partial) density operator on the qubits of `qvar`, stored as a batch of unnormalized state vectors.
+
+    Qubits outside of the layout are understood to be in the state `|0>`, in accordance with the cylinder extension of density operators.
+
+    [index sequence of the tensor]
+
+    branch:     0
+    qubits:     1, 2, ..., n
+    '''
+
+    def __init__(self, tensor : np.ndarray, qvar : QVar):
+        self.tensor = tensor
+        self.qvar = qvar
+
+    @staticmethod
+    def from_iqopt(rho : IQOpt) -> PureEnsemble | None:
+        '''
+        Decompose `rho` into the ensemble of its eigenvectors. Return `None` if the rank of `rho` exceeds `MAX_BRANCHES`.
+        '''
+        w, V = np.linalg.eigh(rho.qval.m_repr)
+        keep = w > QVal.prec
+        if np.count_nonzero(keep) > MAX_BRANCHES:
+            return None
+
+        vecs = (V[:, keep] * np.sqrt(w[keep])).T
+        return PureEnsemble(vecs.reshape((-1,) + (2,) * rho.qnum), rho.qvar)
+
+    def to_density(self) -> DensityState:
+        d = 2**self.qnum
+        M = self.tensor.reshape((-1, d))
+        rho = M.T @ M.conj()
+        return DensityState(rho.reshape((2,) * (2 * self.qnum)), self.qvar)
+
+    def to_iqopt(self) -> IQOpt:
+        return self.to_density().to_iqopt()
+
+    @property
+    def qnum(self) -> int:
+        return self.qvar.qnum
+
+    @property
+    def branches(self) -> int:
+        return self.tensor.shape[0]
+
+    def is_zero(self) -> bool:
+        # the largest entry of a positive operator lies on the diagonal
+        if self.branches == 0:
+            return True
+        diag = np.sum(np.abs(self.tensor)**2, axis=0)
+        return np.max(diag) < QVal.prec
+
+    def trace(self) -> float:
+        '''
+        Return the trace of the state, i.e., the probability of reaching it.
+        '''
+        return float(np.sum(np.abs(self.tensor)**2))
+
+    ################################################
+    # layout
+    ################################################
+
+    def extend(self, qvar : QVar) -> PureEnsemble:
+        '''
+        Return the ensemble with the qubits of `qvar` included in the layout. The new qubits are appended in the state `|0>`.
+        '''
+        if self.qvar.contains(qvar):
+            return self
+
+        new_qvar = self.qvar + qvar
+        k = new_qvar.qnum - self.qnum
+        tensor = np.zeros(self.tensor.shape + (2,) * k, dtype=self.tensor.dtype)
+        tensor[(...,) + (0,) * k] = self.tensor
+        return PureEnsemble(tensor, new_qvar)
+
+    def align(self, qvar : QVar) -> PureEnsemble:
+        '''
+        Return the ensemble on exactly the layout `qvar`, which should contain the current layout.
+        '''
+        state = self.extend(qvar)
+        if state.qvar.tuple == qvar.tuple:
+            return state
+
+        perm = state.qvar.to(qvar)
+        return PureEnsemble(state.tensor.transpose([0] + [i + 1 for i in perm]), qvar)
+
+    def _prune(self) -> PureEnsemble | DensityState:
+        '''
+        Drop the vanishing branches, and fall back to `DensityState` if there are still too many of them.
+        '''
+        norms = np.sum(np.abs(self.tensor.reshape((self.branches, -1)))**2, axis=1)
+        state = PureEnsemble(self.tensor[norms > QVal.prec**2], self.qvar)
+        if state.branches > MAX_BRANCHES:
+            return state.to_density()
+        return state
+
+    ################################################
+    # operations
+    ################################################
+
+    def conjugate(self, A : IQOpt) -> PureEnsemble:
+        '''
+        Return the ensemble of `A rho A^dagger`, where only the indices of the qubits of `A` are contracted.
+        '''
+        state = self.extend(A.qvar)
+        n, k = state.qnum, A.qnum
+
+        pos = [p + 1 for p in state.qvar.to(A.qvar)]
+        new = [n + 1 + t for t in range(k)]
+
+        out = list(range(n + 1))
+        for t in range(k):
+            out[pos[t]] = new[t]
+
+        tensor = np.einsum(
+            A.qval.t_repr, new + pos,
+            state.tensor, list(range(n + 1)),
+            out, optimize=True)
+
+        return PureEnsemble(tensor, state.qvar)
+
+    def reset(self, qvar : QVar) -> PureEnsemble | DensityState:
+        '''
+        Return the ensemble after the initialization `qvar := 0`. Every branch splits into the `|0>` and `|1>` components of each qubit, both of which are then prepared in `|0>`.
+        '''
+        state : PureEnsemble | DensityState = self.extend(qvar)
+        for i, q in enumerate(qvar.tuple):
+            if isinstance(state, DensityState):
+                return state.reset(QVar(list(qvar.tuple[i:])))
+
+            p = state.qvar.index(q) + 1
+            idx0 : list = [slice(None)] * state.tensor.ndim
+            idx1 : list = [slice(None)] * state.tensor.ndim
+            idx0[p] = 0
+            idx1[p] = 1
+
+            kept = state.tensor.copy()
+            kept[tuple(idx1)] = 0.
+            moved = np.zeros_like(state.tensor)
+            moved[tuple(idx0)] = state.tensor[tuple(idx1)]
+
+            state = PureEnsemble(np.concatenate((kept, moved)), state.qvar)._prune()
+
+        return state
+
+    def scale(self, c : float) -> PureEnsemble:
+        return PureEnsemble(np.sqrt(c) * self.tensor, self.qvar)
+
+    def __add__(self, other : PureEnsemble | DensityState) -> PureEnsemble | DensityState:
+        if isinstance(other, DensityState):
+            return self.to_density() + other
+
+        qvar_all = self.qvar + other.qvar
+        return PureEnsemble(
+            np.concatenate((self.align(qvar_all).tensor, other.align(qvar_all).tensor)),
+            qvar_all)._prune()
+
+    def __radd__(self, other : DensityState) -> DensityState:
+        return other + self.to_density()
@@ -1,3 +1,4 @@
 from .mls import MLS
+from .cache import ProofCache
 
 from .prover_parsing_build import parse_sentence
\ No newline at end of file
@@ -0,0 +1,234 @@
+'''
+The persistent cache of verified commands.
+
+Every verified command is stored on disk together with the frame it results in. It is addressed by a chained key, which is the digest of the key of the previous command, the text of the command and the content of the files it imports. Therefore a key identifies the whole prefix of the script, and editing a sentence invalidates it together with all the sentences after it. On a re-run, the commands of an unchanged prefix are replayed from the stored frames without parsing or numerical calculation.
+
+The frames are stored without their environments. An environment is only stored by the command which changes it (a declaration, a definition or the end of a refinement), and the frames of the following commands refer to it by the key of that command. The total size of the cache is bounded by `CACHE_MAX_BYTES`, and the least recently used entries are removed first.
+
+The root key is the digest of the paths, sizes and modification times of the source files of `rem`, so that any change of the implementation invalidates the cache as well.
+
+Note: the entries are unpickled, and unpickling can execute arbitrary code. The cache must only be stored in a directory writable by the user alone. A directory owned by another user, or writable by the group or others, is refused, and the cache is then disabled.
+'''
+
+from __future__ import annotations
+from typing import Any
+
+import hashlib
+import os
+import pickle
+import tempfile
+
+from .prover_parsing_build import lexer
+
+# the default directory of the cache, which can be set by the environment variable `REM_CACHE_DIR`
+CACHE_DIR = os.environ.get("REM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "rem"))
+
+# whether the editor uses the cache, which is turned off by setting the environment variable `REM_CACHE=0`
+CACHE_ENABLED = os.environ.get("REM_CACHE", "1") != "0"
+
+# the bound of the total size of the cache in bytes, which can be set in megabytes by the environment variable `REM_CACHE_MAX_MB`
+CACHE_MAX_BYTES = int(os.environ.get("REM_CACHE_MAX_MB", "256")) * 2**20
+
+# the fraction of the bound that the cache is shrunk to once it exceeds the bound
+CACHE_SHRINK_RATIO = 0.75
+
+# the version of the stored format
+CACHE_VERSION = 2
+
+def _digest(*parts: bytes) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    for part in parts:
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+def source_digest() -> str:
+    '''
+    Return the digest of the paths, the sizes and the modification times of the source files of `rem`. The content is not read.
+    '''
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith(".py"):
+                path = os.path.join(dirpath, name)
+                st = os.stat(path)
+                entries.append(f"{os.path.relpath(path, root)}:{st.st_size}:{st.st_mtime_ns}")
+    return _digest("\n".join(entries).encode())
+
+def _import_digests(sentence: str) -> list[bytes]:
+    '''
+    Return the paths and the content digests of the files imported in the sentence.
+    '''
+    res = []
+    lexer.input(sentence)
+    for token in lexer:
+        if token.type == 'PATH':
+            try:
+                with open(token.value, "rb") as f:
+                    content = hashlib.blake2b(f.read(), digest_size=20).digest()
+            except OSError:
+                content = b"missing"
+            res.append(token.value.encode() + b"\0" + content)
+    return res
+
+
+def _trusted(directory: str) -> bool:
+    '''
+    Check whether the directory is owned by the user and not writable by anyone else, so that the entries in it can be unpickled. A missing directory is created with these permissions.
+    '''
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        st = os.stat(directory)
+    except OSError:
+        return False
+
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        return False
+    return st.st_mode & 0o022 == 0
+
+
+class ProofCache:
+    '''
+    The content-addressed store of verified commands in a directory. The entries are written atomically, and unreadable entries are treated as missing, so that several processes can share a directory.
+
+    Every entry consists of the command, its frame without the environment, the output and the key of the environment (`None` for the initial environment of the prover). The environments are stored in separate files, see `put_env`.
+    '''
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.root_key = _digest(str(CACHE_VERSION).encode(), source_digest().encode())
+
+        # the cache is disabled if the directory cannot be trusted
+        self.enabled : bool = _trusted(directory)
+
+        self.hits : int = 0
+        self.misses : int = 0
+
+        # the total size of the files, calculated when it is first needed
+        self._size : int | None = None
+
+        # the latest environment loaded, so that the replayed frames share it
+        self._env : tuple[str, Any] | None = None
+
+    def key(self, prev_key: str, sentence: str) -> str:
+        '''
+        Return the key of the sentence executed after the command of `prev_key`.
+        '''
+        return _digest(prev_key.encode(), sentence.encode(), *_import_digests(sentence))
+
+    def _path(self, key: str, kind: str = "cmd") -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.{kind}.pkl")
+
+    def _load(self, path: str) -> Any | None:
+        if not self.enabled:
+            return None
+        try:
+            with open(path, "rb") as f:
+                res = pickle.load(f)
+            # mark the entry as recently used
+            os.utime(path)
+        except Exception:
+            return None
+        return res
+
+    def _store(self, path: str, value: Any) -> None:
+        '''
+        Store the value atomically. The cache is only an acceleration, so the failures are ignored.
+        '''
+        if not self.enabled:
+            return
+        temp = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as f:
+                temp = f.name
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, path)
+        except Exception:
+            if temp is not None and os.path.exists(temp):
+                os.remove(temp)
+            return
+
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += os.path.getsize(path)
+        if self._size > self.max_bytes:
+            self.shrink()
+
+    def _files(self) -> list[tuple[float, int, str]]:
+        '''
+        Return the last use, the size and the path of every stored file.
+        '''
+        res = []
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                if name.endswith(".pkl"):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    res.append((st.st_mtime, st.st_size, path))
+        return res
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._files())
+
+    def shrink(self) -> None:
+        '''
+        Remove the least recently used files until the total size is within `CACHE_SHRINK_RATIO` of the bound. The entries whose environments are removed become misses.
+        '''
+        files = sorted(self._files())
+        size = sum(size for _, size, _ in files)
+        for _, file_size, path in files:
+            if size <= self.max_bytes * CACHE_SHRINK_RATIO:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            size -= file_size
+        self._size = size
+
+    def get(self, key: str) -> tuple[Any, Any, str | None, str | None] | None:
+        '''
+        Return the stored entry of the command, as the command, the frame without the environment, the output and the key of the environment, or `None` if it is missing.
+        '''
+        res = self._load(self._path(key))
+        if res is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return res
+
+    def put(self, key: str, cmd: Any, frame: Any, output: str | None, env_key: str | None) -> None:
+        '''
+        Store the entry of the command. The frame is stored without its environment, which is referred to by `env_key`.
+        '''
+        stored = frame.copy()
+        stored.env = None
+        self._store(self._path(key), (cmd, stored, output, env_key))
+
+    def get_env(self, env_key: str) -> Any | None:
+        '''
+        Return the environment stored by the command of `env_key`, or `None` if it is missing.
+        '''
+        if self._env is not None and self._env[0] == env_key:
+            return self._env[1]
+
+        res = self._load(self._path(env_key, "env"))
+        if res is not None:
+            self._env = (env_key, res)
+        return res
+
+    def put_env(self, env_key: str, env: Any) -> None:
+        '''
+        Store the environment changed by the command of `env_key`.
+        '''
+        self._env = (env_key, env)
+        self._store(self._path(env_key, "env"), env)
@@ -1,9 +1,10 @@
 
 from ...mTLC.env import Env
-from ..prover.ast import RemAst
+from ..prover.ast import RemAst, StepStatement
 
 
-from .prover_parsing_build import parse_sentence, ParsingError, LexingError, ValueError
+from .prover_parsing_build import parse_sentence, first_sentence, ParsingError, LexingError, ValueError
+from .cache import ProofCache
 
 from ..language import AstPres
 
@@ -11,6 +12,9 @@ from ..prover.prover import Prover, Frame
 
 import numpy as np
 
+import time
+from multiprocessing.pool import Pool
+
 from ...qplcomp import prepare_env
 
 class MLS:
@@ -20,7 +24,7 @@ class MLS:
     it integrates the parser, pass input to prover and pass the output to TUI
     '''
 
-    def __init__(self):
+    def __init__(self, cache: ProofCache | None = None):
         self.prover = Prover(prepare_env())
 
         self.cmd_stack: list[RemAst] = []
@@ -32,6 +36,12 @@ class MLS:
 
         self.error : str = ''
 
+        # the persistent cache of verified commands, the keys of the commands in `cmd_stack`, and the keys and stamps of their environments (see `ProofCache`)
+        self.cache = cache
+        self.key_stack: list[str] = []
+        self.env_key_stack: list[tuple[str | None, int]] = []
+        self._initial_stamp = self.prover.current_frame.env.stamp
+
     @property
     def verified_code(self) -> str:
         return ''.join(self.code_stack)
@@ -86,6 +96,12 @@ class MLS:
         '''
 
         self.error = ''
+
+        # STEP 0, replay the command from the cache
+        if self.cache is not None:
+            replayed = self._replay(new_code)
+            if replayed is not None:
+                return replayed
         
         # STEP 1, parse the command
         res, remaining = parse_sentence(self.prover.current_frame.env, new_code)
@@ -104,14 +120,113 @@ class MLS:
             self.error = str(e)
             return None
 
-        self.cmd_stack.append(res[0])
-        self.code_stack.append(res[1])
+        self._push(res[0], res[1], output)
+
+        return remaining, output
+
+    def _cache_key(self, sentence: str) -> str:
+        assert self.cache is not None
+        prev_key = self.key_stack[-1] if len(self.key_stack) > 0 else self.cache.root_key
+        return self.cache.key(prev_key, sentence)
+
+    def _push(self, cmd: RemAst, sentence: str, output: str|None, env_key: str|None = None, replayed: bool = False) -> None:
+        '''
+        Record the command executed by the prover, and store it in the cache. The environment is only stored if the command changes it, and `env_key` is the key of the replayed environment otherwise.
+        '''
+        self.cmd_stack.append(cmd)
+        self.code_stack.append(sentence)
+
+        if self.cache is not None:
+            key = self._cache_key(sentence)
+            env = self.prover.current_frame.env
+
+            if not replayed:
+                prev_env_key, prev_stamp = self.env_key_stack[-1] if len(self.env_key_stack) > 0 else (None, self._initial_stamp)
+                if env is self.prover.frame_stack[-2].env and env.stamp == prev_stamp:
+                    env_key = prev_env_key
+                else:
+                    env_key = key
+                    self.cache.put_env(key, env)
+                self.cache.put(key, cmd, self.prover.current_frame, output, env_key)
+
+            self.key_stack.append(key)
+            self.env_key_stack.append((env_key, env.stamp))
 
         # focus on the latest frame
         self.selected_frame_id = len(self) - 1
 
+    def _replay(self, code: str) -> tuple[str, str|None] | None:
+        '''
+        Replay the first command of the code from the cache.
+
+        Return the unparsed code and the output, or None if the command is not cached.
+        '''
+        assert self.cache is not None
+        try:
+            sentence, remaining = first_sentence(code)
+        except Exception:
+            return None
+
+        if sentence is None:
+            return None
+
+        entry = self.cache.get(self._cache_key(sentence))
+        if entry is None:
+            return None
+
+        cmd, frame, output, env_key = entry
+        env = self.prover.frame_stack[0].env if env_key is None else self.cache.get_env(env_key)
+        if env is None:
+            return None
+
+        frame.env = env
+        self.prover.push_frame(frame)
+        self._push(cmd, sentence, output, env_key, replayed = True)
+
         return remaining, output
 
+    def step_forward_steps(self, code: str, pool: Pool) -> list[tuple[str, str|None, float]]:
+        '''
+        Step forward over the successive `Step` commands at the beginning of the code, where the refinement checks of different goals run in parallel in the process pool. Any other command is executed by `step_forward` alone.
+
+        Return the unparsed code, the output and the time of every executed command. It stops at the first failed command and sets the error.
+        '''
+        self.error = ''
+
+        if self.cache is not None:
+            start = time.perf_counter()
+            replayed = self._replay(code)
+            if replayed is not None:
+                return [(replayed[0], replayed[1], time.perf_counter() - start)]
+
+        # parse the successive Step commands, which do not change the environment
+        env = self.prover.current_frame.env
+        parsed : list[tuple[RemAst, str, str]] = []
+        remaining = code
+        while True:
+            res, rest = parse_sentence(env, remaining)
+            if isinstance(res, Exception) or not isinstance(res[0], StepStatement):
+                break
+            parsed.append((res[0], res[1], rest))
+            remaining = rest
+
+        if len(parsed) <= 1:
+            start = time.perf_counter()
+            step = self.step_forward(code)
+            return [] if step is None else [(step[0], step[1], time.perf_counter() - start)]
+
+        results = []
+        try:
+            steps = self.prover.execute_steps([cmd for cmd, _, _ in parsed], pool)
+            for (cmd, cmd_code, rest), (output, cmd_time) in zip(parsed, steps):
+                self._push(cmd, cmd_code, output)
+                results.append((rest, output, cmd_time))
+
+        except Exception as e:
+            self.error = str(e)
+
+        return results
+
     def step_backward(self) -> str|None:
         '''
         step backward
@@ -128,6 +243,9 @@ class MLS:
             res = self.code_stack.pop()
             self.cmd_stack.pop()
             self.prover.pop_frame()
+            if self.cache is not None:
+                self.key_stack.pop()
+                self.env_key_stack.pop()
 
         # adjust selected_frame_id
         self.selected_frame_id = len(self) - 1
@@ -0,0 +1,119 @@
+# the module that generates programs backwards from the postcondition
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import heapq
+import itertools
+
+import numpy as np
+
+from ....mTLC import TypedTerm
+
+from ....qplcomp import *
+from ....qplcomp.qval import QVal
+
+from ...language.ast import *
+from ...language.semantics.assertion import wlp
+from ...language.semantics.cache import array_digest
+
+from .enum_gen import EnumWorker
+
+# the number of expanded suffixes kept for the subsumption pruning
+SUBSUMPTION_WINDOW = 256
+
+class BackwardWorker(EnumWorker):
+    '''
+    The worker for the goal-directed backward generation.
+
+    The programs are sequences of atoms (see `EnumWorker`), built backwards from the postcondition `Q`. The frontier keeps the suffixes `S` together with `W = wlp.S.Q`, and prepending an atom `A` only costs `wlp.A.W`, which is shared by all the candidates with the suffix `S`. The frontier is expanded best first, by the fraction of `P` covered by `W`.
+
+    The suffixes are pruned soundly:
+    - the suffixes with the same wlp as a previous one not longer than them (the observational equivalence),
+    - the suffixes whose wlp is contained in the wlp of an expanded suffix not longer than them, since wlp is monotone and every completion of them is then dominated. The containment is decided after a rank check.
+
+    The ranks and the coverage are calculated by traces, which require `Q` to be a projector. Otherwise, only the first pruning is applied, and the frontier is expanded breadth first.
+
+    `max_depth` is the maximum number of atoms.
+    '''
+
+    def search(self, pres: AstPres, index: int = 0, worker_num: int = 1) -> Iterator[TypedTerm]:
+        '''
+        Search for a program refining `pres`, and yield every candidate checked. The solution is kept in `sol`.
+
+        The suffixes are partitioned among the workers by their last atom.
+        '''
+        P = pres.P.eval(self.gen_env).iqopt     # type: ignore
+        post = pres.Q.eval(self.gen_env).iqopt  # type: ignore
+
+        qvarT = self.qvars + P.qvar + post.qvar
+        P_m = P.extend(qvarT).qval.m_repr
+        P_tr = np.trace(P_m).real
+        by_trace = post.qval.is_projector and P.qval.is_projector and P_tr > QVal.prec
+
+        def coverage(W_m: np.ndarray) -> float:
+            # tr(P W) / tr(P), which is 1 exactly when P <= W for projectors
+            return np.vdot(P_m, W_m).real / P_tr if by_trace else 0.
+
+        # the smallest sizes of the suffixes with every wlp
+        seen : dict[bytes, int] = {}
+        expanded : list[tuple[np.ndarray, float, int]] = []
+
+        def subsumed(W_m: np.ndarray, rank: float, size: int) -> bool:
+            for E_m, E_rank, E_size in expanded:
+                if E_size <= size and E_rank >= rank - 0.5 \
+                    and abs(np.vdot(E_m, W_m).real - rank) < QVal.prec * W_m.shape[0]:
+                    return True
+            return False
+
+        counter = itertools.count()
+
+        # the frontier of (priority, size, tie, program, wlp, matrix)
+        frontier : list = []
+        heapq.heappush(frontier, (0., 0, next(counter), None, post, None))
+
+        while frontier:
+            _, size, _, prog_S, W, W_m = heapq.heappop(frontier)
+
+            if W_m is not None and by_trace:
+                if subsumed(W_m, np.trace(W_m).real, size):
+                    continue
+                if len(expanded) < SUBSUMPTION_WINDOW:
+                    expanded.append((W_m, np.trace(W_m).real, size))
+
+            if size >= self.max_depth:
+                continue
+
+            for i, (prog_A, A) in enumerate(self._atoms[1:]):
+                if size == 0 and i % worker_num != index:
+                    continue
+
+                try:
+                    W_A = wlp(A, W, self.gen_env)
+                    W_A_m = W_A.extend(qvarT).qval.m_repr
+                except Exception:
+                    continue
+
+                key = array_digest(W_A_m)
+                if seen.get(key, self.max_depth + 1) <= size + 1:
+                    continue
+                seen[key] = size + 1
+
+                prog = prog_A if prog_S is None else AstSeq(prog_A, prog_S)     # type: ignore
+                self.gen_count += 1
+                yield prog
+
+                score = coverage(W_A_m)
+                try:
+                    solved = score > 1 - QVal.prec if by_trace else P <= W_A
+                    if solved and by_trace:
+                        solved = P <= W_A
+                except Exception:
+                    solved = False
+
+                if solved:
+                    self.sol = prog
+                    return
+
+                heapq.heappush(frontier, (-score, size + 1, next(counter), prog, W_A, W_A_m))
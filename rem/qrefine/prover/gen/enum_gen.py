@@ -0,0 +1,218 @@
+# the module that enumerates programs for the generation
+
+from __future__ import annotations
+
+from typing import Iterator
+
+import itertools
+import zlib
+
+from ....mTLC import TypedTerm
+
+from ....qplcomp import *
+from ....qplcomp.qexpr.eqopt import *
+from ....qplcomp.qexpr.eiqopt import *
+from ....qplcomp.qexpr.eqvar import EQVar
+
+from ...language.ast import *
+from ...language.semantics.assertion import wlp
+from ...language.semantics.cache import array_digest
+
+from .gen_machine import GenWorker, GenChannel, GEN_BATCH_SIZE
+
+# a level of the enumeration: the programs of one size, together with their wlp on the postcondition
+Level = list[tuple[TypedTerm, IQOpt]]
+
+def stable_hash(prog: TypedTerm) -> int:
+    '''
+    The hash of the program which is the same in all processes, for partitioning the candidates.
+    '''
+    return zlib.crc32(str(prog).encode())
+
+def worker_enum(pres: AstPres, worker: EnumWorker, index: int, channel: GenChannel):
+    '''
+    The process of enumerative generation. The candidates are partitioned among the `worker_num` processes by `stable_hash`, and the process reports to `channel` as `worker_gen` does.
+    '''
+    for prog in worker.search(pres, index, len(channel.counts)):
+
+        worker.current_prog = prog
+
+        # report the progress
+        if worker.gen_count % GEN_BATCH_SIZE == 0:
+            channel.counts[index] = worker.gen_count
+            if index == 0:
+                channel.set_status(str(prog))
+
+    channel.counts[index] = worker.gen_count
+    if worker.sol is not None:
+        channel.results.put(worker.sol)
+    else:
+        with channel.finished.get_lock():
+            channel.finished.value += 1   # type: ignore
+
+class EnumWorker(GenWorker):
+    '''
+    The worker for the enumerative generation.
+
+    The programs are enumerated bottom-up by size, where the atoms are skip, initializations, unitaries and the defined programs, and the composite programs are `A; S` with an atom `A`, `if P then S1 else S0 end` and `if P then S1 else S0 end; S`. The sequences are nested to the right, which covers all programs up to the associativity.
+
+    A program is represented by its wlp on the postcondition `Q` of the goal, since the wlp of `A; S` and `if P then S1 else S0 end` only depend on the wlp of `S`, `S1` and `S0`. Therefore programs with the same wlp are observationally equivalent, and only the first of them is kept (the observational equivalence pruning). A candidate solves the goal exactly when `P <= wlp.S.Q`.
+
+    The wlp of `if P then S1 else S0 end; S` depends on the wlp of `S1` and `S0` on `wlp.S.Q` instead. These programs are enumerated from the levels on the postcondition `wlp.S.Q`, which are calculated on demand (see `_post_levels`).
+
+    `max_depth` is the maximum size of the programs, i.e., the number of atoms and conditionals.
+    '''
+
+    def __init__(self, gen_env: Env, qvars: QVar, retry_times: int, max_depth):
+        super().__init__(gen_env, qvars, retry_times, max_depth)
+
+        self._atoms : list[tuple[TypedTerm, QProgAst]] = []
+        self._guards : list[tuple[TypedTerm, IQOpt, IQOpt]] = []
+        self.scan_atoms()
+
+        # the levels on the intermediate postconditions, with the fingerprints seen in them
+        self._sub_levels : dict[bytes, tuple[list[Level], set[bytes]]] = {}
+
+    def _iopt_terms(self) -> list[TypedTerm]:
+        '''
+        The indexed operators available: the definitions, and the defined operators on all the orders of quantum variables.
+        '''
+        res : list[TypedTerm] = [Var(key, self.gen_env) for key in self._iopts]
+        for qnum in sorted(self._opt_qnum_map):
+            if qnum == 0 or qnum > self.qvars.qnum:
+                continue
+            for key in self._opt_qnum_map[qnum]:
+                for qvls in itertools.permutations(self.qvars._qvls, qnum):
+                    res.append(EIQOptPair(Var(key, self.gen_env), EQVar(QVar(list(qvls)))))   # type: ignore
+        return res
+
+    def scan_atoms(self) -> None:
+        '''
+        Collect the atomic programs and the guards, where the unitaries and the projectors are verified in batches.
+        '''
+        terms : list[tuple[TypedTerm, IQOpt]] = []
+        for term in self._iopt_terms():
+            try:
+                terms.append((term, term.eval(self.gen_env).iqopt))    # type: ignore
+            except Exception:
+                pass
+
+        QOpt.query_batch([iqopt.qval for _, iqopt in terms], "unitary")
+        QOpt.query_batch([iqopt.qval for _, iqopt in terms], "projector")
+
+        self._atoms = [(AstSkip(), AstSkip())]
+        for qnum in range(1, self.qvars.qnum + 1):
+            for qvls in itertools.combinations(self.qvars._qvls, qnum):
+                prog = AstInit(EQVar(QVar(list(qvls))))
+                self._atoms.append((prog, prog))
+        for term, iqopt in terms:
+            if iqopt.qval.unitary_tag:
+                prog = AstUnitary(term)     # type: ignore
+                self._atoms.append((prog, prog))
+        for key in self._progs:
+            var = Var(key, self.gen_env)
+            self._atoms.append((var, var.eval(self.gen_env)))  # type: ignore
+
+        self._guards = [(term, iqopt, ~iqopt) for term, iqopt in terms if iqopt.qval.projector_tag]
+
+    def _fingerprint(self, value: IQOpt) -> bytes:
+        return array_digest(value.extend(self.qvars + value.qvar).qval.m_repr)
+
+    def _post_levels(self, post: IQOpt, size: int) -> list[Level]:
+        '''
+        Return the levels of the programs up to `size` on the postcondition `post`, which are extended on demand and kept during the search.
+        '''
+        levels, seen = self._sub_levels.setdefault(self._fingerprint(post), ([], set()))
+        while len(levels) < size:
+            levels.append(list(self._level(levels, len(levels) + 1, post, seen)))
+        return levels
+
+    def _level(self, levels: list[Level], size: int, post: IQOpt,
+               seen: set[bytes], owned: tuple[int, int] | None = None) -> Iterator[tuple[TypedTerm, IQOpt]]:
+        '''
+        Enumerate the new programs of `size`, with their wlp on `post`. The programs observationally equivalent to the ones in `seen` are skipped, and `seen` is updated.
+
+        If `owned = (index, worker_num)` is given, only the candidates of this partition are considered.
+        '''
+        def new(prog: TypedTerm, value_of) -> tuple[TypedTerm, IQOpt] | None:
+            if owned is not None and stable_hash(prog) % owned[1] != owned[0]:
+                return None
+            try:
+                value = value_of()
+                key = self._fingerprint(value)
+            except Exception:
+                return None
+            if key in seen:
+                return None
+            seen.add(key)
+            return prog, value
+
+        if size == 1:
+            for prog, S in self._atoms:
+                res = new(prog, lambda: wlp(S, post, self.gen_env))
+                if res is not None:
+                    yield res
+            return
+
+        # A; S
+        for prog_S, value_S in levels[size - 2]:
+            for prog_A, A in self._atoms[1:]:
+                res = new(AstSeq(prog_A, prog_S),   # type: ignore
+                          lambda: wlp(A, value_S, self.gen_env))
+                if res is not None:
+                    yield res
+
+        # if P then S1 else S0 end
+        for size1 in range(1, size - 1):
+            for prog_S1, value_S1 in levels[size1 - 1]:
+                for prog_S0, value_S0 in levels[size - 2 - size1]:
+                    for prog_P, P, P_c in self._guards:
+                        res = new(AstIf(prog_P, prog_S1, prog_S0),   # type: ignore
+                                  lambda: P.Sasaki_imply(value_S1) & P_c.Sasaki_imply(value_S0))
+                        if res is not None:
+                            yield res
+
+        # if P then S1 else S0 end; S, where S1 and S0 are taken from the levels on wlp.S.post
+        for size_S in range(1, size - 2):
+            for prog_S, value_S in levels[size_S - 1]:
+                sub_levels = self._post_levels(value_S, size - 2 - size_S)
+                for size1 in range(1, size - 1 - size_S):
+                    for prog_S1, value_S1 in sub_levels[size1 - 1]:
+                        for prog_S0, value_S0 in sub_levels[size - 2 - size_S - size1]:
+                            for prog_P, P, P_c in self._guards:
+                                res = new(AstSeq(AstIf(prog_P, prog_S1, prog_S0), prog_S),   # type: ignore
+                                          lambda: P.Sasaki_imply(value_S1) & P_c.Sasaki_imply(value_S0))
+                                if res is not None:
+                                    yield res
+
+    def search(self, pres: AstPres, index: int = 0, worker_num: int = 1) -> Iterator[TypedTerm]:
+        '''
+        Search for a program refining `pres`, and yield every candidate checked. The solution is kept in `sol`.
+
+        The candidates of the largest size in every round are partitioned among the workers, and each of them is checked by its own worker. The smaller sizes are completed by every worker, without the checks, so that all the workers have the same levels to build the candidates.
+        '''
+        P = pres.P.eval(self.gen_env).iqopt     # type: ignore
+        post = pres.Q.eval(self.gen_env).iqopt  # type: ignore
+
+        levels : list[Level] = []
+        seen : set[bytes] = set()
+        self._sub_levels = {}
+
+        for size in range(1, self.max_depth + 1):
+            # complete the previous level
+            if size >= 2:
+                levels.append(list(self._level(levels, size - 1, post, seen)))
+
+            # check the own candidates of this level
+            for prog, value in self._level(levels, size, post, seen.copy(), (index, worker_num)):
+                self.gen_count += 1
+                yield prog
+
+                try:
+                    solved = P <= value
+                except Exception:
+                    solved = False
+
+                if solved:
+                    self.sol = prog
+                    return
@@ -6,7 +6,7 @@ from typing import Any, Sequence
 
 from rem.mTLC.env import TermError
 
-from ....mTLC import TypedTerm
+from ....mTLC import TypedTerm, intern, simplify
 
 from ....qplcomp import *
 from ....qplcomp.qexpr.eqopt import *
@@ -15,42 +15,153 @@ from ....qplcomp.qexpr.eiqopt import *
 from ...language.ast import *
 from ...language.refine import wlp_check
 
+from .prefilter import CandidateFilter, PrefilterStats
+
 import random
 import platform
+import hashlib
+import ctypes
 
 import multiprocessing as mp
 
-def worker_gen(pres: AstPres, workers: list[GenWorker], index: int):
+# the number of programs generated and verified together by a worker
+GEN_BATCH_SIZE = 50
+
+# the maximum length (in bytes) of the candidate text in the status channel
+GEN_STATUS_LEN = 4096
+
+# the number of slots of the shared filter of tested programs, and the number of programs it holds before it is cleared
+BLOOM_SIZE = 1 << 22
+BLOOM_CAPACITY = BLOOM_SIZE // 10
+
+# the generation modes: random generation (`GenWorker`), enumeration (`EnumWorker`) or backward generation (`BackwardWorker`)
+GEN_MODES = ("random", "enum", "backward")
+
+class SharedBloomFilter:
+    '''
+    The Bloom filter of program fingerprints in shared memory, which deduplicates the tested programs across the workers with a bounded memory.
+
+    Every slot takes a byte, so that the concurrent insertions never lose each other and no lock is needed. The filter is cleared once it holds `BLOOM_CAPACITY` programs, where the false positive rate would be about 1%. A false positive only skips an untested program, and a racing clearance only forgets some tested ones.
+    '''
+
+    HASH_NUM = 4
+
+    def __init__(self, worker_num: int):
+        self.slots = mp.RawArray('B', BLOOM_SIZE)
+        self.inserts = mp.RawArray('q', worker_num)
+
+        # the checks and the hits of the workers
+        self.checks = mp.RawArray('q', worker_num)
+        self.hits = mp.RawArray('q', worker_num)
+
+    @staticmethod
+    def fingerprint(prog: TypedTerm) -> list[int]:
+        '''
+        Return the slots of the program. The fingerprint is calculated from the string representation, which is preserved in the interned programs.
+        '''
+        digest = hashlib.blake2b(str(prog).encode(), digest_size=4 * SharedBloomFilter.HASH_NUM).digest()
+        return [int.from_bytes(digest[4*i : 4*i+4], "little") % BLOOM_SIZE
+                for i in range(SharedBloomFilter.HASH_NUM)]
+
+    def contains(self, slots: list[int], index: int) -> bool:
+        self.checks[index] += 1
+        res = all(self.slots[i] for i in slots)
+        if res:
+            self.hits[index] += 1
+        return res
+
+    def add(self, slots: list[int], index: int) -> None:
+        for i in slots:
+            self.slots[i] = 1
+        self.inserts[index] += 1
+
+        if sum(self.inserts) >= BLOOM_CAPACITY:
+            ctypes.memset(self.slots, 0, BLOOM_SIZE)
+            for i in range(len(self.inserts)):
+                self.inserts[i] = 0
+
+    @property
+    def hit_rate(self) -> float:
+        checks = sum(self.checks)
+        return sum(self.hits) / checks if checks > 0 else 0.
+
+class GenChannel:
+    '''
+    The communication between the generation processes and the main process. Only the counters, the candidate text and the solution cross the processes, and the workers with their environments stay in their own processes.
+
+    - `counts`: the attempts of the workers in shared memory. Every worker only writes its own slot, so no lock is needed.
+    - `status`: the text of the current candidate of the first worker.
+    - `results`: the queue of solutions, where the first one is taken.
+    - `finished`: the number of workers which finished without a solution.
+    - `tested`: the filter of the programs tested by all the workers.
+    - `prefilter`: the reject rates of the stages before the full check.
+    '''
+
+    def __init__(self, worker_num: int):
+        self.counts = mp.Array('q', worker_num, lock=False)
+        self.status = mp.Array('c', GEN_STATUS_LEN)
+        self.results = mp.SimpleQueue()
+        self.finished = mp.Value('i', 0)
+        self.tested = SharedBloomFilter(worker_num)
+        self.prefilter = PrefilterStats(worker_num)
 
-    # workers: list of workers pass in through ListProxy
-    worker = workers[index]
+    @property
+    def exhausted(self) -> bool:
+        return self.finished.value == len(self.counts)   # type: ignore
+
+    @property
+    def attempt_total(self) -> int:
+        return sum(self.counts)
 
-    tested_progs : set[TypedTerm] = set()
+    def set_status(self, text: str) -> None:
+        data = text.encode()
+        if len(data) >= GEN_STATUS_LEN:
+            data = data[:GEN_STATUS_LEN - 4] + b"..."
+        self.status.value = data    # type: ignore
+
+    def get_status(self) -> str:
+        return self.status.value.decode(errors="ignore")  # type: ignore
+
+def worker_gen(pres: AstPres, worker: GenWorker, index: int, channel: GenChannel):
+
+    prefilter = CandidateFilter(pres, worker.gen_env, worker.qvars, channel.prefilter, index)
 
     while True:
         
-        # generate a new program
-        worker.prog_gen()
+        # generate new programs, whose operators are verified in a batch
+        for prog in worker.prog_gen_batch(GEN_BATCH_SIZE):
+            # skip the programs tested by any worker
+            slots = SharedBloomFilter.fingerprint(prog)
+            if channel.tested.contains(slots, index):
+                continue
 
-        if worker.current_prog is not None:
-            if worker.current_prog in tested_progs:
+            worker.current_prog = prog
+
+            # reject the program by the cheap necessary conditions first
+            if prefilter.reject(prog):
+                channel.tested.add(slots, index)
                 continue
 
             try:
 
                 # check the refinement relationship
-                wlp_check(pres, worker.current_prog, worker.gen_env)
+                wlp_check(pres, prog, worker.gen_env)
+                prefilter.record_check(True)
 
                 # return if the current program pass the checking
-                worker.sol = worker.current_prog
-                workers[index] = worker
+                worker.sol = prog
+                channel.counts[index] = worker.gen_count
+                channel.results.put(prog)
                 return
             
             except:
-                if worker.gen_count % 50 == 0:
-                    workers[index] = worker
+                prefilter.record_check(False)
+                channel.tested.add(slots, index)
 
-                tested_progs.add(worker.current_prog)
+        # report the progress
+        channel.counts[index] = worker.gen_count
+        if index == 0:
+            channel.set_status(str(worker.current_prog))
                 
 class GenMachine:
 
@@ -58,7 +169,6 @@ class GenMachine:
         mp.set_start_method('fork')
 
     def __init__(self, gen_env : Env):
-        self.mng = mp.Manager()
         self.working : bool = False
 
         self.goal : AstPres | None = None
@@ -68,11 +178,13 @@ class GenMachine:
 
         self._max_depth : int = 3
         self._worker_num : int = 8
+        self._mode : str = "random"
 
         self.retry_times : int = 10
 
-        # two proxy lists for the communication between the main process and the workers
-        self.workers = self.mng.list([])
+        # the communication with the workers of the current generation
+        self.channel : GenChannel | None = None
+        self._sol : TypedTerm | None = None
 
         self.threads : list[mp.Process] = []
 
@@ -80,17 +192,16 @@ class GenMachine:
 
     @property
     def attempt_total(self) -> int:
-        return sum([w.gen_count for w in self.workers])
+        return self.channel.attempt_total if self.channel is not None else 0
     
     @property
     def sol(self) -> TypedTerm | None:
         '''
         return the solution if it is found
         '''
-        for w in self.workers:
-            if w.sol is not None:
-                return w.sol
-        return None
+        if self._sol is None and self.channel is not None and not self.channel.results.empty():
+            self._sol = self.channel.results.get()
+        return self._sol
     
     def __str__(self) -> str:
         '''
@@ -103,8 +214,14 @@ class GenMachine:
             res += f"// Solution found ({self.attempt_total}):\n"
             res += f"{self.sol}"
             return res
-        elif len(self.workers) > 0:
-            return f"// Searching ({self.attempt_total}) ...\n\n{self.workers[0].current_prog}"
+        elif self.channel is not None and self.channel.exhausted:
+            return f"// No solution found ({self.attempt_total}) within size {self.max_depth}."
+        elif self.channel is not None:
+            res = f"// Searching ({self.attempt_total}, {self.channel.tested.hit_rate:.0%} duplicated) ...\n"
+            rates = str(self.channel.prefilter)
+            if rates:
+                res += f"// Rejected by: {rates}\n"
+            return res + f"\n{self.channel.get_status()}"
         else:
             return self.info
         
@@ -136,6 +253,22 @@ class GenMachine:
         if self.working and self.goal is not None:
             self.gen(self.goal)
 
+    @property
+    def mode(self) -> str:
+        return self._mode
+    
+    @mode.setter
+    def mode(self, mode: str) -> None:
+        '''
+        Configure the generation on the fly.
+        '''
+        if mode not in GEN_MODES:
+            raise ValueError(f"Unknown generation mode '{mode}'. Choose from {GEN_MODES}.")
+        self._mode = mode
+
+        if self.working and self.goal is not None:
+            self.gen(self.goal)
+
     @property
     def worker_num(self) -> int:
         return self._worker_num
@@ -160,7 +293,8 @@ class GenMachine:
 
         self.working = True
         self.goal = goal
-        self.workers[:] = []
+        self.channel = None
+        self._sol = None
         self.threads: list[mp.Process] = []
 
         ############################################################################################
@@ -182,17 +316,34 @@ class GenMachine:
                 
 
 
-        for i in range(self.worker_num):
-            self.workers.append(
-                GenWorker(
+        self.channel = GenChannel(self.worker_num)
+
+        if self.mode in ("enum", "backward"):
+            # the workers of these modes extend `GenWorker`, so they are imported here to avoid the import cycle
+            from .enum_gen import EnumWorker, worker_enum
+            from .backward_gen import BackwardWorker
+
+            # the atoms are scanned once, and inherited by the forked workers
+            worker = (EnumWorker if self.mode == "enum" else BackwardWorker)(
                     self.gen_env, 
                     collect_qvars, 
                     self.retry_times,
-                    self.max_depth))
+                    self.max_depth)
+
+        for i in range(self.worker_num):
+            if self.mode in ("enum", "backward"):
+                target = worker_enum
+            else:
+                target = worker_gen
+                worker = GenWorker(
+                        self.gen_env, 
+                        collect_qvars, 
+                        self.retry_times,
+                        self.max_depth)
             
             self.threads.append(
-                mp.Process(target=worker_gen, 
-                           args=(goal, self.workers, i))
+                mp.Process(target=target, 
+                           args=(goal, worker, i, self.channel))
             )
 
         for t in self.threads:
@@ -210,7 +361,8 @@ class GenMachine:
 
         self.goal = None
         self.working = False
-        self.workers[:] = []
+        self.channel = None
+        self._sol = None
 
         self.info = "// Ready to generate."
 
@@ -224,6 +376,21 @@ class GenMachine:
         self.threads = []
         self.working = False
 
+def _required_props(prog: TypedTerm) -> list[tuple[TypedTerm, str]]:
+    '''
+    Collect the operators in the program that should be unitaries or projectors, together with the properties.
+    '''
+    res : list[tuple[TypedTerm, str]] = []
+    if isinstance(prog, AstUnitary):
+        res.append((prog.U, "unitary"))
+    elif isinstance(prog, (AstAssert, AstIf, AstWhile)):
+        res.append((prog.P, "projector"))
+
+    for value in prog.__dict__.values():
+        if isinstance(value, QProgAst):
+            res += _required_props(value)
+    return res
+
 class GenWorker:
     '''
     The worker for executing an generation.
@@ -286,9 +453,40 @@ class GenWorker:
         '''
         res = self.random_prog_gen(self.max_depth)
         self.gen_count += 1
+
+        # the simplified programs are normalized, so that trivially equivalent programs are tested once
+        # the interned programs share their sub-terms, and are hashed in O(1) for `tested_progs`
+        if res is not None:
+            res = intern(simplify(res, self.gen_env))
+
         self.current_prog = res
         return res
 
+    def prog_gen_batch(self, n: int) -> list[TypedTerm]:
+        '''
+        Generate `n` programs, and return the ones whose operators are valid.
+
+        The unitaries and the projectors required by the programs are collected first, and then verified together by `QOpt.query_batch`. The verified properties are kept in the tags, so that the later checks of the surviving programs are free.
+        '''
+        progs : list[tuple[TypedTerm, list[tuple[QOpt, str]]]] = []
+        for _ in range(n):
+            prog = self.prog_gen()
+            if prog is None:
+                continue
+
+            try:
+                required = [(term.eval(self.gen_env).iqopt.qval, prop)  # type: ignore
+                            for term, prop in _required_props(prog)]
+            except Exception:
+                continue
+            progs.append((prog, required))
+
+        for prop in ("unitary", "projector"):
+            QOpt.query_batch([opt for _, required in progs for opt, p in required if p == prop], prop)
+
+        return [prog for prog, required in progs
+                if all(getattr(opt, prop + "_tag") for opt, prop in required)]
+
     #############################################################
     # qvar generation
     #############################################################
@@ -623,4 +821,3 @@ class GenWorker:
 
         if P is not None and S is not None:
             return AstWhile(P, S)   # type: ignore
-                
\ No newline at end of file
@@ -0,0 +1,180 @@
+# the module that rejects the generated candidates by cheap necessary conditions
+
+from __future__ import annotations
+
+import multiprocessing as mp
+
+import numpy as np
+
+from ....mTLC import TypedTerm
+
+from ....qplcomp import *
+from ....qplcomp.qval import QVal
+
+from ...language.ast import *
+from ...language.semantics.assertion import wlp
+
+# the stages of the prefilter, in the order they are applied
+PREFILTER_STAGES = ("support", "trace", "sample")
+
+# the maximum number of random states in the range of the precondition tested in the sample stage
+PREFILTER_SAMPLES = 4
+
+# the probability of a sample state leaving the wlp, above which it is a counterexample
+PREFILTER_PRECISION = 1e-6
+
+def _scan(prog: TypedTerm, env: Env) -> tuple[QVar, bool] | None:
+    '''
+    Return the quantum variables that the program acts on, and whether it only consists of skips and unitaries. Return `None` for the programs beyond the generation rules, e.g. loops or assertions in the definitions.
+    '''
+    prog = prog.eval(env)
+
+    if isinstance(prog, AstSkip):
+        return QVar([]), True
+
+    elif isinstance(prog, AstInit):
+        return prog.eqvar.eval(env).qvar, False     # type: ignore
+
+    elif isinstance(prog, AstUnitary):
+        return prog.U.eval(env).iqopt.qvar, True    # type: ignore
+
+    elif isinstance(prog, AstSeq):
+        S0 = _scan(prog.S0, env)
+        S1 = _scan(prog.S1, env)
+        if S0 is None or S1 is None:
+            return None
+        return S0[0] + S1[0], S0[1] and S1[1]
+
+    elif isinstance(prog, AstIf):
+        S1 = _scan(prog.S1, env)
+        S0 = _scan(prog.S0, env)
+        if S1 is None or S0 is None:
+            return None
+        return prog.P.eval(env).iqopt.qvar + S1[0] + S0[0], False  # type: ignore
+
+    else:
+        return None
+
+class PrefilterStats:
+    '''
+    The counters of the prefilter in shared memory, with a slot for every worker and stage. Every worker only writes its own slots, so no lock is needed.
+
+    The last stage is the full `wlp_check`. A stage is only counted for the candidates it applies to, so that the rate of a stage is the fraction of the candidates it rejects among the ones it examines.
+    '''
+
+    STAGES = PREFILTER_STAGES + ("wlp",)
+
+    def __init__(self, worker_num: int):
+        self.entered = mp.RawArray('q', worker_num * len(self.STAGES))
+        self.rejected = mp.RawArray('q', worker_num * len(self.STAGES))
+
+    def record(self, index: int, stage: int, rejected: bool) -> None:
+        i = index * len(self.STAGES) + stage
+        self.entered[i] += 1
+        if rejected:
+            self.rejected[i] += 1
+
+    def reject_rates(self) -> dict[str, float]:
+        '''
+        Return the reject rates of the stages which examined any candidate.
+        '''
+        n = len(self.STAGES)
+        res = {}
+        for stage, name in enumerate(self.STAGES):
+            entered = sum(self.entered[stage::n])
+            if entered > 0:
+                res[name] = sum(self.rejected[stage::n]) / entered
+        return res
+
+    def __str__(self) -> str:
+        return ", ".join(f"{name} {rate:.0%}" for name, rate in self.reject_rates().items())
+
+class CandidateFilter:
+    '''
+    The cascade of necessary conditions of `P <= wlp.S.Q` for a goal `[P, Q]`, which rejects the failing candidates before the full `wlp_check`. The stages are sound, i.e., they only reject the candidates failing the full check.
+
+    - support: if `S` does not act on the variables of `Q`, then `wlp.S.Q = Q`, and the candidate fails when `P <= Q` does not hold.
+    - trace: if `S` only consists of unitaries, then `wlp.S.Q` has the trace of `Q`, and the candidate fails when `tr(P) > tr(Q)`.
+    - sample: if `P` is a projector, `P <= W` for `W = wlp.S.Q` implies `<v|W|v> >= 1` for every state `v` in the range of `P`. It is tested on a few random states in the range of `P`, which avoids the eigenvalue decomposition of the full check. The wlp is memoized, so that the full check of a passing candidate does not calculate it again.
+
+    The quantities of the goal are calculated once when the filter is created, in the process of the worker.
+    '''
+
+    def __init__(self, pres: AstPres, env: Env, qvars: QVar, stats: PrefilterStats, index: int):
+        self.env = env
+        self.stats = stats
+        self.index = index
+
+        P = pres.P.eval(env).iqopt     # type: ignore
+        Q = pres.Q.eval(env).iqopt     # type: ignore
+
+        self.post : IQOpt = Q
+        self.post_qvar : QVar = Q.qvar
+        self.qvarT : QVar = qvars + P.qvar + Q.qvar
+
+        P_m = P.extend(self.qvarT).qval.m_repr
+        Q_m = Q.extend(self.qvarT).qval.m_repr
+        P_tr = np.trace(P_m).real
+
+        self.pre_le_post : bool = P <= Q
+        self.trace_exceeded : bool = P_tr > np.trace(Q_m).real + QVal.prec * P_m.shape[0]
+
+        # the random orthonormal states in the range of P, as the columns
+        self.samples : np.ndarray | None = None
+
+        sample_num = min(PREFILTER_SAMPLES, int(round(P_tr)))
+        if P.qval.is_projector and sample_num > 0:
+            rng = np.random.default_rng()
+            G = rng.standard_normal((P_m.shape[0], sample_num)) \
+                + 1j * rng.standard_normal((P_m.shape[0], sample_num))
+            self.samples = np.linalg.qr(P_m @ G)[0]
+
+    def _leaving_prob(self, prog: TypedTerm) -> float:
+        '''
+        Return the largest probability that a sample state is outside of `wlp.S.Q`.
+        '''
+        assert self.samples is not None, "ASSERTION FAILED"
+
+        W_m = wlp(prog.eval(self.env), self.post, self.env).extend(self.qvarT).qval.m_repr     # type: ignore
+        V = self.samples
+        return 1. - float(np.min(np.sum(V.conj() * (W_m @ V), axis=0).real))
+
+    def reject(self, prog: TypedTerm) -> bool:
+        '''
+        Decide whether the candidate fails by the stages, and record the results. The candidates that cannot be analysed pass to the full check.
+        '''
+        try:
+            scanned = _scan(prog, self.env)
+        except Exception:
+            scanned = None
+
+        if scanned is not None:
+            qvar, unitary_only = scanned
+
+            if not self.pre_le_post:
+                rejected = qvar.disjoint(self.post_qvar)
+                self.stats.record(self.index, 0, rejected)
+                if rejected:
+                    return True
+
+            if unitary_only:
+                self.stats.record(self.index, 1, self.trace_exceeded)
+                if self.trace_exceeded:
+                    return True
+
+        if self.samples is not None:
+            try:
+                rejected = self._leaving_prob(prog) > PREFILTER_PRECISION
+            except Exception:
+                return False
+            self.stats.record(self.index, 2, rejected)
+            if rejected:
+                return True
+
+        return False
+
+    def record_check(self, passed: bool) -> None:
+        '''
+        Record the result of the full check.
+        '''
+        self.stats.record(self.index, len(PREFILTER_STAGES), not passed)
@@ -1,34 +1,110 @@
 
 from __future__ import annotations
+from typing import Iterator
 
 from ...qplcomp import Env, EQOpt
-from ..language import AstPres, ValueError, EIQOptPair
+from ..language import AstPres, ValueError, EIQOptPair, QProgAst
 
 from .ast import *
 from ..language.semantics.state import calc
 
 from ..language import refine
 
-from copy import deepcopy
+from copy import copy
+from multiprocessing.pool import Pool
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+import weakref
 
+# the path of a node in the proof tree, as the attribute names from the root
+Path = tuple[str, ...]
+
+
+def _pres_paths(root: QProgAst, goals: list[AstPres]) -> list[Path]:
+    '''
+    Return the paths of the prescriptions `goals` in the program `root`.
+    '''
+    found : dict[int, list[Path]] = {}
+    stack : list[tuple[QProgAst, Path]] = [(root, ())]
+    while stack:
+        node, path = stack.pop()
+        found.setdefault(id(node), []).append(path)
+        for attr, value in node.__dict__.items():
+            if isinstance(value, QProgAst):
+                stack.append((value, path + (attr,)))
+
+    return [found[id(goal)].pop() for goal in goals]
+
+def _replace(root: QProgAst, path: Path, node: QProgAst) -> QProgAst:
+    '''
+    Return the program `root` with the node at `path` replaced by `node`. Only the nodes along the path are copied, and the other nodes are shared.
+    '''
+    if len(path) == 0:
+        return node
+    res = copy(root)
+    setattr(res, path[0], _replace(getattr(root, path[0]), path[1:], node))
+    return res
+
+
+# the pickled environment shipped to the process pool, with the environment and its version in the main process
+_env_payload : tuple[weakref.ref, tuple[int, int], str, bytes] | None = None
+
+# the environment received by a process of the pool, with its key
+_pool_env : tuple[str, Env] | None = None
+
+def _pickle_env(env: Env) -> tuple[str, bytes]:
+    '''
+    Return the key and the pickled data of the environment. They are calculated again only when the environment or its definitions change.
+    '''
+    global _env_payload
+    version = (len(env.decs), env.stamp)
+    if _env_payload is None or _env_payload[0]() is not env or _env_payload[1] != version:
+        data = pickle.dumps(env, protocol=pickle.HIGHEST_PROTOCOL)
+        _env_payload = (weakref.ref(env), version, hashlib.blake2b(data, digest_size=20).hexdigest(), data)
+    return _env_payload[2], _env_payload[3]
+
+def _wlp_job(job: tuple[AstPres, QProgAst, str, str]) -> tuple[bool|None, float]:
+    '''
+    The refinement check in the process pool. The job consists of the goal, the program, and the key and the file of the pickled environment, which is only loaded when the process does not hold the environment of the key yet.
+
+    Return the result and the time, where the result is `None` if the check raises an error, so that the error is raised again when the command is executed.
+    '''
+    global _pool_env
+    start = time.perf_counter()
+    try:
+        pres, S, key, path = job
+        if _pool_env is None or _pool_env[0] != key:
+            with open(path, "rb") as f:
+                _pool_env = (key, pickle.load(f))
+        holds = refine.wlp_holds(pres, S, _pool_env[1])
+    except Exception:
+        holds = None
+    return holds, time.perf_counter() - start
 
 
 class Frame:
     '''
     An exclusive proof frame of the prover.
+
+    The frames are persistent: a frame is never changed after the command creating it is executed. The successive frames share the environment, the proof tree and the goals as long as they are unchanged, and a refinement step only copies the nodes along the path to the refined prescription (see `refine_goal`).
     '''
     def __init__(self, env: Env, 
                  refine_proof_name: str,
                  refine_proof: AstPres|None,
                  info: str | Exception = ""):
-        self.env : Env = env.copy()
+        self.env : Env = env
         self.refine_proof_name = refine_proof_name
-        self.refine_proof = deepcopy(refine_proof)
+        self.refine_proof = refine_proof
 
-        if self.refine_proof is None:
-            self.current_goals = []
-        if self.refine_proof:
+        # the unsolved prescriptions, and their paths in the proof tree
+        self.current_goals : list[AstPres] = []
+        self.goal_paths : list[Path] = []
+        if self.refine_proof is not None:
             self.current_goals = self.refine_proof.get_prescription()
+            self.goal_paths = _pres_paths(self.refine_proof, self.current_goals)
 
     @property
     def refinement_mode(self) -> bool:
@@ -54,10 +130,22 @@ class Frame:
         return res
 
     def copy(self) -> Frame:
-        return Frame(
-            self.env, 
-            self.refine_proof_name,
-            self.refine_proof)
+        '''
+        Return a shallow copy. The environment and the proof tree are shared, and should be replaced instead of being modified.
+        '''
+        return copy(self)
+
+    def refine_goal(self, goal: AstPres) -> None:
+        '''
+        Replace the first goal by `goal`, which is the refined copy of it, and update the goals with the prescriptions in the refinement.
+        '''
+        assert self.refine_proof is not None
+        path = self.goal_paths[0]
+        self.refine_proof = _replace(self.refine_proof, path, goal)    # type: ignore
+
+        subgoals = goal.get_prescription()
+        self.current_goals = subgoals + self.current_goals[1:]
+        self.goal_paths = [path + p for p in _pres_paths(goal, subgoals)] + self.goal_paths[1:]
     
     def __str__(self) -> str:
         return self.goals_str
@@ -69,10 +157,12 @@ class Interpreter:
     '''
 
     @staticmethod
-    def exe(cmd: RemAst, frame: Frame) -> tuple[Frame, str|None]:
+    def exe(cmd: RemAst, frame: Frame, holds: bool|None = None) -> tuple[Frame, str|None]:
         '''
         Execute a command in the frame.
         Return the result frame and the output of this command.
+
+        `holds` is the decided result of the refinement check of a `StepStatement` command (see `exe_steps`).
         '''
         new_frame = frame.copy()
 
@@ -80,11 +170,13 @@ class Interpreter:
 
         # VAR ID ':' ... '.'
         if isinstance(cmd, Declaration):
+            new_frame.env = frame.env.copy()
             new_frame.env.declare(cmd.id, cmd.type)
             output = f"Declared Var: {cmd.id}."
 
         # DEF ID ASSIGN eqopt '.'
         elif isinstance(cmd, Definition):
+            new_frame.env = frame.env.copy()
             new_frame.env[cmd.id] = cmd.term
             output = f"Defined Term: {cmd.id}."
 
@@ -100,6 +192,7 @@ class Interpreter:
             new_frame.refine_proof_name = cmd.id
             new_frame.refine_proof = cmd.prescription
             new_frame.current_goals = [cmd.prescription]
+            new_frame.goal_paths = [()]
 
             output = f"Refinement starts."
 
@@ -109,12 +202,15 @@ class Interpreter:
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
+            # refine a copy of the goal, so that the previous frames are not changed
+            goal = copy(frame.current_goals[0])
             refine.wlp_check(
-                new_frame.current_goals[0], 
+                goal, 
                 cmd.statement, 
-                frame.env)
+                frame.env,
+                holds)
 
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+            new_frame.refine_goal(goal)
             
             output = f"Refinement step succeeded."
 
@@ -123,12 +219,14 @@ class Interpreter:
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
+            # refine a copy of the goal, so that the previous frames are not changed
+            goal = copy(frame.current_goals[0])
             refine.rule_seq_break(
-                new_frame.current_goals[0],
+                goal,
                 cmd.mid_assertion,
                 frame.env)
 
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+            new_frame.refine_goal(goal)
             
             output = f"Refinement step succeeded."
 
@@ -137,12 +235,14 @@ class Interpreter:
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
+            # refine a copy of the goal, so that the previous frames are not changed
+            goal = copy(frame.current_goals[0])
             refine.rule_if(
-                new_frame.current_goals[0],
+                goal,
                 cmd.P,
                 frame.env)
 
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+            new_frame.refine_goal(goal)
             
             output = f"Refinement step succeeded."
 
@@ -151,13 +251,15 @@ class Interpreter:
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
+            # refine a copy of the goal, so that the previous frames are not changed
+            goal = copy(frame.current_goals[0])
             refine.rule_while(
-                new_frame.current_goals[0],
+                goal,
                 cmd.P, 
                 cmd.inv, 
                 frame.env)
 
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+            new_frame.refine_goal(goal)
             
             output = f"Refinement step succeeded."
 
@@ -166,12 +268,14 @@ class Interpreter:
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
+            # refine a copy of the goal, so that the previous frames are not changed
+            goal = copy(frame.current_goals[0])
             refine.weaken_pre(
-                new_frame.current_goals[0],
+                goal,
                 cmd.pre, 
                 frame.env)
 
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+            new_frame.refine_goal(goal)
             
             output = f"Refinement step succeeded."
 
@@ -180,12 +284,14 @@ class Interpreter:
             if len(frame.current_goals) == 0:
                 raise ValueError("There is no prescriptions to refine.")
             
+            # refine a copy of the goal, so that the previous frames are not changed
+            goal = copy(frame.current_goals[0])
             refine.strengthen_post(
-                new_frame.current_goals[0],
+                goal,
                 cmd.post, 
                 frame.env)
 
-            new_frame.current_goals = new_frame.current_goals[0].get_prescription() + new_frame.current_goals[1:]
+            new_frame.refine_goal(goal)
             
             output = f"Refinement step succeeded."
 
@@ -196,6 +302,7 @@ class Interpreter:
             
             # switch the goals
             new_frame.current_goals = [new_frame.current_goals[cmd.n-1]] + new_frame.current_goals[:cmd.n-1] + new_frame.current_goals[cmd.n:]
+            new_frame.goal_paths = [new_frame.goal_paths[cmd.n-1]] + new_frame.goal_paths[:cmd.n-1] + new_frame.goal_paths[cmd.n:]
 
             output = f"Goal switched."
 
@@ -208,10 +315,12 @@ class Interpreter:
                 raise ValueError("Goals not clear.")
 
             # register this refinement result
+            new_frame.env = frame.env.copy()
             new_frame.env[frame.refine_proof_name] = frame.refine_proof
 
             new_frame.refine_proof = None
             new_frame.current_goals = []
+            new_frame.goal_paths = []
 
             output = f"Refinement ends."
 
@@ -264,4 +373,41 @@ class Interpreter:
         else:
             raise Exception("Not Implemented Command.")
 
-        return new_frame, output
\ No newline at end of file
+        return new_frame, output
+
+    @staticmethod
+    def exe_steps(cmds: list[StepStatement], frame: Frame, pool: Pool) -> Iterator[tuple[Frame, str|None, float]]:
+        '''
+        Execute the successive `StepStatement` commands in the frame, where the refinement checks of different goals run in parallel in the process pool.
+
+        The goal of every command is determined by the programs of the previous commands, so all the checks are dispatched at once. The environment is pickled once into a temporary file, and every job only carries its goal and program. The results are committed in the order of the commands as `exe` does.
+        Yield the result frame, the output and the time of every command. The first failed command raises its error.
+        '''
+        # determine the goals of the commands
+        jobs = []
+        goals = frame.current_goals
+        for cmd in cmds:
+            if len(goals) == 0:
+                break
+            try:
+                S = cmd.statement.eval(frame.env)
+            except Exception:
+                break
+            if not isinstance(S, QProgAst):
+                break
+            jobs.append((goals[0], S))
+            goals = S.get_prescription() + goals[1:]
+
+        key, data = _pickle_env(frame.env)
+        with tempfile.NamedTemporaryFile(prefix="rem-env-", suffix=".pkl", delete=False) as f:
+            f.write(data)
+        try:
+            checks = pool.map(_wlp_job, [(pres, S, key, f.name) for pres, S in jobs], chunksize=1)
+        finally:
+            os.remove(f.name)
+
+        for i, cmd in enumerate(cmds):
+            holds, check_time = checks[i] if i < len(checks) else (None, 0.)
+            start = time.perf_counter()
+            frame, output = Interpreter.exe(cmd, frame, holds)
+            yield frame, output, check_time + time.perf_counter() - start
\ No newline at end of file
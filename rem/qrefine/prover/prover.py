@@ -1,5 +1,8 @@
 
 from __future__ import annotations
+from typing import Iterator
+
+from multiprocessing.pool import Pool
 
 from ...qplcomp import Env
 
@@ -31,6 +34,20 @@ class Prover:
         self.frame_stack.append(frame)
         return output
 
+    def execute_steps(self, cmds: list[StepStatement], pool: Pool) -> Iterator[tuple[str|None, float]]:
+        '''
+        Push successive `StepStatement` commands, whose refinement checks run in parallel in the process pool (see `Interpreter.exe_steps`). The frames are pushed in order, and the first failed command raises its error.
+        '''
+        for frame, output, check_time in Interpreter.exe_steps(cmds, self.current_frame, pool):
+            self.frame_stack.append(frame)
+            yield output, check_time
+
+    def push_frame(self, frame: Frame) -> None:
+        '''
+        Push a frame which is already calculated, e.g. replayed from a cache.
+        '''
+        self.frame_stack.append(frame)
+
     def pop_frame(self) -> None:
         '''
         Pop the current frame.
@@ -0,0 +1,45 @@
+'''
+The tests of the backward generation against brute-force search over the sequences of atoms.
+'''
+
+import functools
+import itertools
+import random
+
+import pytest
+
+from rem.qrefine.language.ast import AstSeq
+from rem.qrefine.prover.gen.backward_gen import BackwardWorker
+from rem.qplcomp import QVar
+
+GOALS = [
+    (("P00", "Pnot00", ["q0", "q1"]), ["q0", "q1"]),
+    (("P0", "P1", ["q0"]), ["q0", "q1", "t"]),
+    (("P00", "P00", ["q0", "q1"]), ["q0", "q1", "t"]),
+    (("P0", "P1", ["t"]), ["q0", "t"]),
+    (("Pnot00", "P00", ["q0", "q1"]), ["q0", "q1"]),
+]
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("args, qvars", GOALS)
+def test_backward_complete(example_env, goal, passes, seed, args, qvars):
+    '''
+    The backward generation finds a sequence of atoms refining the goal exactly when one exists up to the maximum depth, and the solution passes the full check.
+    '''
+    rng = random.Random(seed)
+    depth = 3
+    pres = goal(*args)
+    worker = BackwardWorker(example_env, QVar(qvars), 10, depth)
+    worker._atoms = [worker._atoms[0]] + rng.sample(worker._atoms[1:], min(5, len(worker._atoms) - 1))
+
+    for _ in worker.search(pres):
+        pass
+
+    exists = any(
+        passes(pres, functools.reduce(lambda S, A: AstSeq(A, S), reversed(seq)))
+        for n in range(1, depth + 1)
+        for seq in itertools.product([prog for prog, _ in worker._atoms[1:]], repeat=n)
+    )
+    assert (worker.sol is not None) == exists
+    if worker.sol is not None:
+        assert passes(pres, worker.sol)
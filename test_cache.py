@@ -0,0 +1,104 @@
+'''
+The differential tests of the proof cache: the runs replayed from the cache should agree with the runs without it.
+'''
+
+import os
+
+from rem.qrefine.mls import MLS, ProofCache
+
+SOURCE = open("examples/sec6_1.rem").read()
+
+# the sentence inserted in the middle of the script, which changes the environment
+EDIT_AT = SOURCE.index("// The example in the draft.")
+EDITED = SOURCE[:EDIT_AT] + "Def XX := X * X.\nShow Def.\n\n" + SOURCE[EDIT_AT:]
+
+def run(code: str, cache: ProofCache | None, m: MLS | None = None) -> tuple[MLS, list[str | None]]:
+    '''
+    Step forward through the code, and return the language server and the outputs.
+    '''
+    m = MLS(cache) if m is None else m
+    outputs = []
+    while True:
+        res = m.step_forward(code)
+        if res is None:
+            break
+        code, output = res
+        outputs.append(output)
+    return m, outputs
+
+def frames(m: MLS) -> list[str]:
+    return [str(frame) + frame.env.get_items() for frame in m.prover.frame_stack]
+
+def test_replay(tmp_path):
+    ref, ref_outputs = run(SOURCE, None)
+
+    cache = ProofCache(str(tmp_path))
+    run(SOURCE, cache)
+    assert cache.hits == 0 and cache.misses > 0
+
+    cache = ProofCache(str(tmp_path))
+    m, outputs = run(SOURCE, cache)
+    assert cache.misses == 0 and cache.hits == len(ref)
+    assert outputs == ref_outputs
+    assert frames(m) == frames(ref)
+    assert m.error == ref.error
+
+def test_invalidation(tmp_path):
+    run(SOURCE, ProofCache(str(tmp_path)))
+
+    ref, ref_outputs = run(EDITED, None)
+    prefix = len(run(SOURCE[:EDIT_AT], None)[0])
+
+    cache = ProofCache(str(tmp_path))
+    m, outputs = run(EDITED, cache)
+    assert cache.hits == prefix and cache.misses == len(ref) - prefix
+    assert outputs == ref_outputs
+    assert frames(m) == frames(ref)
+
+def test_step_backward(tmp_path):
+    '''
+    Stepping backward over replayed commands and forward over different ones agrees with the run without the cache.
+    '''
+    run(SOURCE, ProofCache(str(tmp_path)))
+
+    ref, ref_outputs = run(EDITED, None)
+
+    m, outputs = run(SOURCE, ProofCache(str(tmp_path)))
+    tail = len(m) - len(run(SOURCE[:EDIT_AT], None)[0])
+    for _ in range(tail):
+        assert m.step_backward() is not None
+    m, rest = run(EDITED[len(m.verified_code):], None, m)
+
+    assert outputs[:len(outputs) - tail] + rest == ref_outputs
+    assert frames(m) == frames(ref)
+
+def test_size_bound(tmp_path):
+    full = ProofCache(str(tmp_path / "full"))
+    run(SOURCE, full)
+    run(EDITED, full)
+    max_bytes = full._scan_size() // 2
+
+    cache = ProofCache(str(tmp_path / "bounded"), max_bytes)
+    run(SOURCE, cache)
+    run(EDITED, cache)
+    assert cache._scan_size() <= max_bytes
+
+    # the evicted commands are executed again
+    cache = ProofCache(str(tmp_path / "bounded"), max_bytes)
+    ref, ref_outputs = run(EDITED, None)
+    m, outputs = run(EDITED, cache)
+    assert cache.misses > 0
+    assert outputs == ref_outputs
+
+def test_untrusted_directory(tmp_path):
+    directory = tmp_path / "shared"
+    directory.mkdir()
+    os.chmod(directory, 0o777)
+
+    cache = ProofCache(str(directory))
+    assert not cache.enabled
+
+    ref, ref_outputs = run(SOURCE, None)
+    m, outputs = run(SOURCE, cache)
+    assert outputs == ref_outputs
+    assert os.listdir(directory) == []
@@ -0,0 +1,77 @@
+'''
+The tests of the enumerative generation against brute-force enumeration.
+'''
+
+import random
+
+import pytest
+
+from rem.qrefine.language.ast import AstSeq, AstIf
+from rem.qrefine.language.semantics.assertion import wlp
+from rem.qrefine.prover.gen.enum_gen import EnumWorker
+from rem.qplcomp import QVar, Var, EQVar
+from rem.qplcomp.qexpr.eiqopt import EIQOptPair
+
+def brute_force(worker: EnumWorker, post, size: int, env) -> dict[bytes, int]:
+    '''
+    Enumerate all the programs up to `size` from the atoms and the guards of the worker, and return the smallest size reaching every wlp.
+    '''
+    trees = {1: [prog for prog, _ in worker._atoms]}
+    for n in range(2, size + 1):
+        trees[n] = []
+        for a in range(1, n):
+            trees[n] += [AstSeq(A, S) for A in trees[a] for S in trees[n - a]]
+        for a in range(1, n - 1):
+            trees[n] += [AstIf(P, S1, S0) for P, _, _ in worker._guards
+                         for S1 in trees[a] for S0 in trees[n - 1 - a]]
+
+    res : dict[bytes, int] = {}
+    for n in trees:
+        for prog in trees[n]:
+            try:
+                res.setdefault(worker._fingerprint(wlp(prog.eval(env), post, env)), n)
+            except Exception:
+                pass
+    return res
+
+@pytest.mark.parametrize("seed, post, qvars", [
+    (0, ("P0", ["q0"]), ["q0", "q1", "t"]),
+    (1, ("P00", ["q0", "q1"]), ["q0", "q1", "t"]),
+    (2, ("P0", ["q1"]), ["q0", "q1"]),
+])
+def test_enum_complete(example_env, seed, post, qvars):
+    '''
+    The enumeration reaches every wlp at the smallest size of the programs reaching it, and the recorded wlp are the ones of the programs.
+    '''
+    env = example_env
+    rng = random.Random(seed)
+    size = 4
+    worker = EnumWorker(env, QVar(qvars), 10, size)
+    worker._atoms = [worker._atoms[0]] + rng.sample(worker._atoms[1:], 3)
+    worker._guards = rng.sample(worker._guards, 2)
+    post_val = EIQOptPair(Var(post[0], env), EQVar(QVar(post[1]))).eval(env).iqopt   # type: ignore
+
+    levels, seen, reached = [], set(), {}
+    for n in range(1, size + 1):
+        levels.append(list(worker._level(levels, n, post_val, seen)))
+        for prog, value in levels[-1]:
+            key = worker._fingerprint(value)
+            assert worker._fingerprint(wlp(prog.eval(env), post_val, env)) == key, str(prog)
+            reached.setdefault(key, n)
+
+    for key, n in brute_force(worker, post_val, size, env).items():
+        assert reached.get(key, size + 1) <= n
+
+@pytest.mark.parametrize("args, qvars", [
+    (("P00", "Pnot00", ["q0", "q1"]), ["q0", "q1"]),
+    (("P0", "P1", ["q0"]), ["q0", "q1"]),
+])
+def test_enum_solution(example_env, goal, passes, args, qvars):
+    '''
+    The search finds a solution, which passes the full check.
+    '''
+    pres = goal(*args)
+    worker = EnumWorker(example_env, QVar(qvars), 10, 2)
+    for _ in worker.search(pres):
+        pass
+    assert worker.sol is not None and passes(pres, worker.sol)
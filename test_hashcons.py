@@ -0,0 +1,52 @@
+'''
+The tests of the hash-consing of terms in `mTLC.hashcons`.
+'''
+
+from rem.mTLC.hashcons import intern, term_table
+from rem.qplcomp import prepare_env, Var, QVar, EQVar
+from rem.qplcomp.qexpr.eqopt import EQOptMul, EQOptDagger
+from rem.qplcomp.qexpr.eiqopt import EIQOptPair
+from rem.qrefine.language.ast import AstSeq, AstSkip, AstInit, AstUnitary, AstIf
+from rem.qrefine.language.semantics.cache import term_key
+
+env = prepare_env()
+
+def program():
+    '''
+    Build `[q0] :=0; if P0[q1] then H[q0]; else skip end; (CX^\\dagger * CX)[q0 q1]` from scratch.
+    '''
+    return AstSeq(
+        AstInit(EQVar(QVar(["q0"]))),
+        AstSeq(
+            AstIf(EIQOptPair(Var("P0", env), EQVar(QVar(["q1"]))),
+                  AstUnitary(EIQOptPair(Var("H", env), EQVar(QVar(["q0"])))),
+                  AstSkip()),
+            AstUnitary(EIQOptPair(EQOptMul(EQOptDagger(Var("CX", env)), Var("CX", env)), EQVar(QVar(["q0", "q1"]))))))
+
+def test_equal_terms_shared():
+    a = intern(program())
+    b = intern(program())
+    assert a.interned and a is b
+    assert a.S1.S1.U is b.S1.S1.U
+
+def test_different_terms_apart():
+    a = intern(AstUnitary(EIQOptPair(Var("CX", env), EQVar(QVar(["q0", "q1"])))))
+    b = intern(AstUnitary(EIQOptPair(Var("CX", env), EQVar(QVar(["q1", "q0"])))))
+    c = intern(AstUnitary(EIQOptPair(Var("SWAP", env), EQVar(QVar(["q0", "q1"])))))
+    assert a is not b and a is not c and b is not c
+    assert a != b and a != c
+
+def test_preserved_information_ignored():
+    '''
+    The information preserved in a term, e.g. its structural key, does not change its identity in the table.
+    '''
+    a = program()
+    term_key(a)
+    a.S1.S0.__dict__["_str"] = str(a.S1.S0)
+    assert intern(a) is intern(program())
+
+def test_table_hits():
+    before = term_table.hits
+    for _ in range(3):
+        intern(program())
+    assert term_table.hits - before >= 3
@@ -0,0 +1,41 @@
+'''
+The randomized tests of the Sasaki operations of indexed projectors, which work on the orthonormal bases of the aligned operators. They should agree with the lattice formulas `P ⇝ R = P^⊥ ∨ (P ∧ R)` and `P ⋒ R = P ∧ (P^⊥ ∨ R)`, including the operators extended as density operators.
+'''
+
+import numpy as np
+import pytest
+
+from rem.qplcomp import QOpt, IQOpt, QVar
+from rem.qplcomp.qval import qvallib
+
+REGISTERS = [["a"], ["b"], ["a", "b"], ["b", "a"], ["b", "c"]]
+
+def random_projector(rng: np.random.Generator, qnum: int) -> QOpt:
+    dim = 2**qnum
+    rank = rng.integers(0, dim + 1)
+    G = rng.standard_normal((dim, rank)) + 1j * rng.standard_normal((dim, rank))
+    V = np.linalg.qr(G)[0] if rank > 0 else np.zeros((dim, 0))
+    return QOpt(V @ V.conj().T)
+
+def random_iqopt(rng: np.random.Generator) -> IQOpt:
+    qvls = REGISTERS[rng.integers(len(REGISTERS))]
+    return IQOpt(random_projector(rng, len(qvls)), QVar(qvls), bool(rng.integers(2)))
+
+@pytest.mark.parametrize("seed", range(4))
+def test_sasaki_formulas(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(50):
+        P, R = random_iqopt(rng), random_iqopt(rng)
+        assert P.Sasaki_imply(R) == (~P) | (P & R)
+        assert P.Sasaki_conjunct(R) == P & ((~P) | R)
+
+def test_sasaki_density_extension():
+    P0_a = IQOpt(qvallib["P0"], QVar(["a"]), True)
+    P0_b = IQOpt(qvallib["P0"], QVar(["b"]))
+    Pm_b = IQOpt(qvallib["Pm"], QVar(["b"]))
+
+    imply = P0_a.Sasaki_imply(P0_b)
+    assert imply.qvar.tuple == ("a", "b")
+    assert np.allclose(np.diag(imply.qval.m_repr), [1., 0., 1., 1.])
+
+    assert np.allclose(P0_a.Sasaki_conjunct(Pm_b).qval.m_repr, 0.)
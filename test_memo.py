@@ -0,0 +1,53 @@
+'''
+The tests of the evaluation memo of terms, keyed by the stamps of the definitions (see `mTLC.env`).
+'''
+
+from rem.mTLC import eval_stats
+from rem.qplcomp import prepare_env, Var, QVar, EQVar, EQOpt
+from rem.qplcomp.qexpr.eqopt import EQOptMul, EQOptTensor
+from rem.qplcomp.qexpr.eiqopt import EIQOptPair
+
+base = prepare_env()
+
+def expr(env):
+    '''
+    Build `((A * H) ⊗ X)[q0 q1]` from scratch, where `A` is defined differently in the environments.
+    '''
+    return EIQOptPair(EQOptTensor(EQOptMul(Var("A", env), Var("H", env)), Var("X", env)), EQVar(QVar(["q0", "q1"])))
+
+def with_A(name):
+    env = base.copy()
+    env["A"] = EQOpt(base[name].qopt)    # type: ignore
+    return env
+
+def direct(name):
+    H, X = base["H"].qopt, base["X"].qopt     # type: ignore
+    return (base[name].qopt @ H).tensor(X)     # type: ignore
+
+def test_equal_terms_share_memo():
+    env = with_A("Z")
+    # the table of interned terms is weak, so the first term is kept alive
+    term = expr(env)
+    res = term.eval(env)
+
+    hits = eval_stats["hits"]
+    assert expr(env).eval(env) is res
+    assert eval_stats["hits"] == hits + 1
+
+def test_memo_follows_definitions():
+    '''
+    The same term evaluated in environments with different definitions of `A` gets the value of each of them.
+    '''
+    env_Z, env_Y = with_A("Z"), with_A("Y")
+    for _ in range(2):
+        for env, name in ((env_Z, "Z"), (env_Y, "Y")):
+            assert expr(env).eval(env).iqopt.qval == direct(name)
+
+def test_memo_kept_by_unrelated_definitions():
+    env = with_A("Z")
+    term = expr(env)
+    res = term.eval(env)
+
+    extended = env.copy()
+    extended["B"] = EQOpt(base["Y"].qopt)     # type: ignore
+    assert expr(extended).eval(extended) is res
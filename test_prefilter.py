@@ -0,0 +1,36 @@
+'''
+The tests of the soundness of the prefilter of generated candidates against the full `wlp_check`.
+'''
+
+import random
+
+from rem.qrefine.prover.gen.gen_machine import GenWorker
+from rem.qrefine.prover.gen.prefilter import CandidateFilter, PrefilterStats, PREFILTER_STAGES
+from rem.qplcomp import QVar
+
+GOALS = [
+    (("P00", "Pnot00", ["q0", "q1"]), ["q0", "q1"]),
+    (("P0", "P1", ["q0"]), ["q0", "q1", "t"]),
+    (("P00", "P00", ["q0", "q1"]), ["q0", "q1", "t"]),
+    (("P0", "P1", ["t"]), ["q0", "t"]),
+    (("Pnot00", "P00", ["q0", "q1"]), ["q0", "q1"]),
+]
+
+def test_prefilter_sound(example_env, goal, passes):
+    '''
+    No candidate rejected by the prefilter passes the full check, and every stage rejects some candidates.
+    '''
+    random.seed(0)
+    stats = PrefilterStats(len(GOALS))
+    for index, (args, qvars) in enumerate(GOALS):
+        pres = goal(*args)
+        worker = GenWorker(example_env, QVar(qvars), 10, 3)
+        cfilter = CandidateFilter(pres, example_env, QVar(qvars), stats, index)
+        for _ in range(6):
+            for prog in worker.prog_gen_batch(50):
+                if cfilter.reject(prog):
+                    assert not passes(pres, prog), str(prog)
+
+    n = len(stats.STAGES)
+    for stage, name in enumerate(PREFILTER_STAGES):
+        assert sum(stats.rejected[stage::n]) > 0, name
@@ -0,0 +1,176 @@
+'''
+The randomized differential tests of the simplification rules in `qplcomp.qexpr.simplify`. Random operator expressions are evaluated with and without the rules, and the results should agree, including the failures on invalid operands.
+'''
+
+import random
+import sys
+
+import pytest
+
+from rem.mTLC import TypedTerm, simplify
+from rem.mTLC.rewrite import RULES, rewrite_stats
+from rem.qplcomp import prepare_env, Var, QVar, EQOpt, EIQOpt, EQVar
+from rem.qplcomp.qexpr.eqopt import *
+from rem.qplcomp.qexpr.eiqopt import *
+
+env_module = sys.modules["rem.mTLC.env"]
+
+env = prepare_env()
+
+# the predefined operators by their qubit numbers
+OPTS = {
+    n : [key for key in env.defs if env[key].type.qnum == n]   # type: ignore
+    for n in (1, 2)
+}
+
+QVARS = ["a", "b", "c"]
+
+def _forget(term):
+    '''
+    Drop the evaluation memos in the term, so that it is evaluated again.
+    '''
+    if isinstance(term, TypedTerm):
+        term.__dict__.pop("_eval_memo", None)
+        for value in term.__dict__.values():
+            _forget(value)
+    elif isinstance(term, (list, tuple)):
+        for value in term:
+            _forget(value)
+
+def _eval(term, monkeypatch, rules: bool):
+    '''
+    Evaluate the term from scratch, with or without the rewriting rules. Return the exception if the evaluation fails.
+    '''
+    _forget(term)
+    with monkeypatch.context() as m:
+        if not rules:
+            m.setattr(env_module, "rewrite", lambda term, env: term)
+        try:
+            return term.eval(env)
+        except Exception as e:
+            return e
+        finally:
+            _forget(term)
+
+def _assert_agree(res, ref, term):
+    if isinstance(ref, Exception):
+        assert isinstance(res, Exception), f"{term} should fail with {ref!r}"
+    elif isinstance(ref, EQOpt):
+        assert isinstance(res, EQOpt) and res.qopt == ref.qopt, str(term)
+    else:
+        assert isinstance(res, EIQOpt) and res.iqopt == ref.iqopt, str(term)
+
+def random_qopt(rng: random.Random, qnum: int, depth: int) -> EQOptAbstract:
+    '''
+    Generate a random operator expression. The operands of the binary operations are often the same, so that the rules about idempotence and cancellation apply.
+    '''
+    if depth == 0 or rng.random() < 0.2:
+        key = rng.choice(OPTS[qnum])
+        return Var(key, env) if rng.random() < 0.7 else EQOpt(env[key].qopt)   # type: ignore
+
+    choice = rng.randrange(6)
+    if choice == 0:
+        # the double daggers, negations and complements are cancelled
+        op = rng.choice([EQOptDagger, EQOptNeg, EQOptComplement])
+        A = op(random_qopt(rng, qnum, depth - 1))
+        return op(A) if rng.random() < 0.3 else A
+    elif choice == 1:
+        c = rng.choice([1., -1., 0.5, 1j, 2. - 1j])
+        return EQOptScale(complex(c), random_qopt(rng, qnum, depth - 1))
+    elif choice == 2 and qnum == 2:
+        return EQOptTensor(random_qopt(rng, 1, depth - 1), random_qopt(rng, 1, depth - 1))
+    elif choice == 3:
+        # U† U and U U†
+        A = random_qopt(rng, qnum, depth - 1)
+        return EQOptMul(EQOptDagger(A), A) if rng.random() < 0.5 else EQOptMul(A, EQOptDagger(A))
+    else:
+        op = rng.choice([EQOptAdd, EQOptSub, EQOptMul, EQOptConjunct, EQOptDisjunct, EQOptSasakiConjunct, EQOptSasakiImply])
+        A = random_qopt(rng, qnum, depth - 1)
+        r = rng.random()
+        if r < 0.4:
+            B = A
+        elif r < 0.6:
+            B = Var("I", env) if qnum == 1 else EQOptTensor(Var("I", env), Var("I", env))
+            if rng.random() < 0.5:
+                A, B = B, A
+        else:
+            B = random_qopt(rng, qnum, depth - 1)
+        return op(A, B)
+
+def random_iqopt(rng: random.Random, depth: int) -> EIQOptAbstract:
+    '''
+    Generate a random indexed operator expression.
+    '''
+    if depth == 0 or rng.random() < 0.2:
+        qnum = rng.choice([1, 2])
+        qvar = EQVar(QVar(rng.sample(QVARS, qnum)))
+        res = EIQOptPair(random_qopt(rng, qnum, rng.randrange(2)), qvar)
+        return res if rng.random() < 0.7 else EIQOpt(res.eval(env).iqopt)
+
+    choice = rng.randrange(4)
+    if choice == 0:
+        op = rng.choice([EIQOptDagger, EIQOptNeg, EIQOptComplement])
+        A = op(random_iqopt(rng, depth - 1))
+        return op(A) if rng.random() < 0.3 else A
+    elif choice == 1:
+        c = rng.choice([1., -1., 0.5, 1j])
+        return EIQOptScale(complex(c), random_iqopt(rng, depth - 1))
+    else:
+        op = rng.choice([EIQOptAdd, EIQOptSub, EIQOptMul, EIQOptTensor, EIQOptConjunct, EIQOptDisjunct, EIQOptSasakiConjunct, EIQOptSasakiImply])
+        A = random_iqopt(rng, depth - 1)
+        B = A if rng.random() < 0.4 else random_iqopt(rng, depth - 1)
+        return op(A, B)
+
+def _terms(gen, seed: int, n: int):
+    rng = random.Random(seed)
+    res = []
+    while len(res) < n:
+        try:
+            res.append(gen(rng))
+        except Exception:
+            # the ill-typed expressions are rejected on construction
+            pass
+    return res
+
+@pytest.mark.parametrize("seed", range(4))
+def test_qopt_rules(monkeypatch, seed):
+    before = rewrite_stats["rewrites"]
+    for term in _terms(lambda rng: random_qopt(rng, rng.choice([1, 2]), 3), seed, 150):
+        ref = _eval(term, monkeypatch, rules=False)
+        _assert_agree(_eval(term, monkeypatch, rules=True), ref, term)
+        _assert_agree(_eval(simplify(term, env), monkeypatch, rules=False), ref, term)
+    assert rewrite_stats["rewrites"] > before
+
+@pytest.mark.parametrize("seed", range(4))
+def test_iqopt_rules(monkeypatch, seed):
+    before = rewrite_stats["rewrites"]
+    for term in _terms(lambda rng: random_iqopt(rng, 3), seed, 100):
+        ref = _eval(term, monkeypatch, rules=False)
+        _assert_agree(_eval(term, monkeypatch, rules=True), ref, term)
+        _assert_agree(_eval(simplify(term, env), monkeypatch, rules=False), ref, term)
+    assert rewrite_stats["rewrites"] > before
+
+def test_every_rule_applies(monkeypatch):
+    '''
+    The random expressions exercise every registered rule.
+    '''
+    applied = set()
+    wrapped = {}
+    for cls, rules in RULES.items():
+        wrapped[cls] = []
+        for f in rules:
+            def g(term, env, f=f):
+                res = f(term, env)
+                if res is not None:
+                    applied.add(f.__name__)
+                return res
+            wrapped[cls].append(g)
+
+    with monkeypatch.context() as m:
+        m.setattr(sys.modules["rem.mTLC.rewrite"], "RULES", wrapped)
+        for term in _terms(lambda rng: random_qopt(rng, rng.choice([1, 2]), 3), 0, 300):
+            simplify(term, env)
+        for term in _terms(lambda rng: random_iqopt(rng, 3), 0, 300):
+            simplify(term, env)
+
+    assert applied == {f.__name__ for rules in RULES.values() for f in rules}